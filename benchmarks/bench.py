@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""SamsPy benchmarks.
+Times the numerical hot paths at realistic batch sizes, records the
+results as JSON, and compares two records for regressions.
+
+    python3 benchmarks/bench.py run [-o results.json] [-k name] [-r 7]
+    python3 benchmarks/bench.py compare baseline.json [results.json]
+
+'compare' without a second file runs the benchmarks first.  It exits
+with status 1 when any benchmark is slower than the baseline by more
+than the threshold (-t, default 0.25 = 25%), or when a command takes
+longer to import than its budget in STARTUP.
+
+Each benchmark times batches of calls of one function, 'repeat' times,
+and records the best (and median) time per call.  Batches hold at
+least the registered number of calls, doubled until a batch takes
+MINBATCH seconds.  Best times are the
+least disturbed by other load, so comparisons use them.
+"""
+
+import argparse
+import copy
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+# benchmark the working tree, not an installed samspy
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import numpy as np
+import yaml
+
+from samspy import loader
+from samspy.vehicle import multistage, propel, sweep, montecarlo, memo
+from samspy.vehicle import model as dmodel, sensitivity
+from samspy.vehicle.propeldb import PropellantDB
+from samspy.traj import orbit, kepler, lambert, atmosphere
+from samspy.cmds import sto
+from samspy.writers.Text import Text
+from samspy.writers.BufferedText import BufferedText
+
+SHARE = os.path.join(os.path.dirname(HERE), 'samspy', 'share')
+BASELINE = os.path.join(HERE, 'baseline.json')
+
+# name -> (setup function returning the timed callable, calls per batch)
+BENCHMARKS = {}
+# shortest batch timed, seconds
+MINBATCH = 0.05
+# command module -> import time budget, seconds in a new interpreter
+STARTUP = { 'lvbasic': 0.1, 'lvserve': 0.1, 'sto': 0.1, 'lvsweep': 0.1,
+    'lvmc': 0.1 }
+
+def bench(name, number):
+    "Register a benchmark setup function."
+    def register(setup):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return register
+
+def loadshare(filename):
+    "Load an example data file."
+    with open(os.path.join(SHARE, filename), 'r') as fh:
+        return yaml.safe_load(fh)
+
+def vehicle(nstages):
+    "Example design with 'nstages' stages below the payload."
+    base = loadshare('protolv.yaml')
+    proto = base['stages']['Proto LV-2']
+    design = copy.deepcopy(base)
+    design['stageorder'] = [ 'stage%d' % n for n in range(nstages) ] + \
+        ['payload']
+    stages = { 'payload': base['stages']['payload'] }
+    for n in range(nstages):
+        scale = 0.5 ** (n - nstages + 1)
+        stages['stage%d' % n] = dict(proto, Mwet=proto['Mwet'] * scale,
+            Mdry=proto['Mdry'] * scale)
+    design['stages'] = stages
+    return design
+
+@bench('multistage.rocketeq', 10000)
+def setup_rocketeq():
+    return lambda: multistage.rocketeq(2873.4, 23693.0, 8645.0)
+
+for nstages in (2, 4, 8):
+    @bench('multistage.performance[%d]' % nstages, 1000)
+    def setup_performance(nstages=nstages):
+        design = vehicle(nstages)
+        return lambda: multistage.performance(design)
+
+    @bench('memo.performance[%d,hit]' % nstages, 1000)
+    def setup_memo_performance(nstages=nstages):
+        design = vehicle(nstages)
+        cache = memo.Memo()
+        return lambda: cache.performance(design)
+
+@bench('multistage.performance_batch[100000]', 1)
+def setup_performance_batch():
+    rng = np.random.default_rng(1)
+    design = loadshare('protolv.yaml')
+    order, Mwet, Mdry, Isp = multistage.batchcolumns([design] * 100000)
+    Mwet = Mwet * rng.uniform(0.9, 1.1, Mwet.shape)
+    return lambda: multistage.performance_batch(order, Mwet, Mdry, Isp)
+
+@bench('multistage.stagedeltaV', 10000)
+def setup_stagedeltav():
+    design = loadshare('protolv.yaml')
+    return lambda: multistage.stagedeltaV(design['stageorder'],
+        design['stages'])
+
+@bench('multistage.Staging.update', 10000)
+def setup_staging_update():
+    design = loadshare('protolv.yaml')
+    staging = multistage.Staging(design['stageorder'], design['stages'])
+    return lambda: staging.update('Proto LV-2', Mwet=4400.0)
+
+@bench('model.DesignModel.set+rows', 1000)
+def setup_model_edit():
+    design = loadshare('protolv.yaml')
+    model = dmodel.DesignModel(design, loadshare('propellants.yaml'))
+    values = itertools.cycle([ 203.0 + n for n in range(7) ])
+    def edit():
+        model.set('Proto LV-3', Mdry=next(values))
+        return [ model.get('rows', name) for name in model.stageorder ]
+    return edit
+
+@bench('sensitivity.sensitivities', 1000)
+def setup_sensitivities():
+    design = loadshare('protolv.yaml')
+    return lambda: sensitivity.sensitivities(design)
+
+@bench('propel.deduce[raw]', 10000)
+def setup_deduce_raw():
+    ppltdata = loadshare('propellants.yaml')
+    return lambda: propel.deduce(ppltdata, 'lox-rp1', 15048.0)
+
+@bench('propel.deduce[db]', 10000)
+def setup_deduce_db():
+    propeldb = PropellantDB(loadshare('propellants.yaml'))
+    return lambda: propel.deduce(propeldb, 'lox-rp1', 15048.0)
+
+@bench('propel.flows', 10000)
+def setup_flows():
+    design = loadshare('protolv.yaml')
+    stageperf = dict(multistage.performance(design)['Proto LV-1'],
+        gRange=propel.grange(design))
+    pplt = propel.deduce(loadshare('propellants.yaml'), 'lox-rp1', 15048.0)
+    return lambda: propel.flows(pplt, stageperf)
+
+@bench('yaml.safe_load[protolv]', 100)
+def setup_safe_load():
+    with open(os.path.join(SHARE, 'protolv.yaml'), 'rb') as fh:
+        content = fh.read()
+    return lambda: yaml.safe_load(content)
+
+@bench('loader.parse[protolv]', 100)
+def setup_loader_parse():
+    with open(os.path.join(SHARE, 'protolv.yaml'), 'rb') as fh:
+        content = fh.read()
+    return lambda: loader.parse(content)
+
+@bench('loader.loaddesign[cached]', 1000)
+def setup_loaddesign():
+    path = os.path.join(SHARE, 'protolv.yaml')
+    loader.loaddesign(path)
+    return lambda: loader.loaddesign(path)
+
+@bench('orbit.Elliptical.fill_params', 10000)
+def setup_fill_params():
+    def fill():
+        orbit.Elliptical(apo=96378.1, peri=6673.1,
+            mu=sto.muEarth).fill_params()
+    return fill
+
+@bench('orbit.Elliptical.velo', 10000)
+def setup_velo():
+    ell = orbit.Elliptical(apo=96378.1, peri=6673.1, mu=sto.muEarth)
+    ell.fill_params()
+    return lambda: ell.velo(42164.0)
+
+@bench('orbit.Elliptical.planechange', 10000)
+def setup_planechange():
+    ito = orbit.Elliptical(apo=96378.1, peri=42164.0, mu=sto.muEarth)
+    sto_orbit = orbit.Elliptical(apo=96378.1, peri=6673.1, mu=sto.muEarth)
+    return lambda: ito.planechange(sto_orbit, 0.3927)
+
+@bench('orbit.OrbitArray.fill_params[100000]', 1)
+def setup_orbitarray():
+    apo = np.linspace(42164.0, 200000.0, 100000)
+    def fill():
+        orbit.OrbitArray(apo=apo, peri=6673.1, mu=sto.muEarth).fill_params()
+    return fill
+
+@bench('sto.leo_ito_sto_geo', 2000)
+def setup_leo_ito_sto_geo():
+    return lambda: sto.leo_ito_sto_geo(295.0, 90000.0, 22.5)
+
+@bench('sto.leo_ito_sto_geo_grid[1000x90]', 1)
+def setup_sto_grid():
+    sto_sl = np.linspace(36000.0, 400000.0, 1000)[:, None]
+    incline = np.linspace(0.0, 89.0, 90)
+    return lambda: sto.leo_ito_sto_geo_grid(295.0, sto_sl, incline)
+
+@bench('sto.leo_ito_sto_geo_split[1000x90]', 1)
+def setup_sto_split():
+    sto_sl = np.linspace(36000.0, 400000.0, 1000)[:, None]
+    incline = np.linspace(0.0, 89.0, 90)
+    return lambda: sto.leo_ito_sto_geo_split(295.0, sto_sl, incline)
+
+@bench('kepler.propagate[100x1000]', 1)
+def setup_kepler():
+    orbits = orbit.OrbitArray(apo=np.linspace(7000.0, 90000.0, 100),
+        peri=6673.1, mu=sto.muEarth)
+    times = np.linspace(0.0, 86400.0, 1000)
+    return lambda: kepler.propagate(orbits, times)
+
+@bench('lambert.porkchop[100x100]', 1)
+def setup_porkchop():
+    leo = orbit.Elliptical(mu=sto.muEarth).set_circular(6673.1)
+    geo = orbit.Elliptical(mu=sto.muEarth).set_circular(42164.0)
+    departures = np.linspace(0.0, 86164.0, 100)
+    tofs = np.linspace(3.0 * 3600, 8.0 * 3600, 100)
+    return lambda: lambert.porkchop(leo, geo, departures, tofs)
+
+@bench('atmosphere.density_at', 10000)
+def setup_density_at():
+    return lambda: atmosphere.density_at(12345.0)
+
+@bench('atmosphere.density[100000]', 1)
+def setup_density():
+    z = np.linspace(0.0, 100000.0, 100000)
+    return lambda: atmosphere.density(z)
+
+@bench('sweep.evaluate', 1000)
+def setup_sweep_evaluate():
+    design = loadshare('protolv.yaml')
+    propeldb = PropellantDB(loadshare('propellants.yaml'))
+    return lambda: sweep.evaluate(design, propeldb)
+
+@bench('montecarlo.montecarlo[100000]', 1)
+def setup_montecarlo():
+    design = loadshare('protolv.yaml')
+    ppltdata = loadshare('propellants.yaml')
+    uncertain = { 'samples': 100000, 'seed': 1, 'stages': { 'Proto LV-1': {
+        'Mdry': { 'dist': 'normal', 'mean': 2886.0, 'sd': 30.0 } } } }
+    return lambda: montecarlo.montecarlo(design, ppltdata, uncertain)
+
+@bench('Text.putfmtrow', 10000)
+def setup_text():
+    writer = Text(io.StringIO())
+    return lambda: writer.putfmtrow('deltaV (m/s, ft/s)', '%11.4f',
+        [2896.9686, 9504.4906])
+
+@bench('BufferedText.putfmtrow', 10000)
+def setup_bufferedtext():
+    writer = BufferedText(io.StringIO())
+    return lambda: writer.putfmtrow('deltaV (m/s, ft/s)', '%11.4f',
+        [2896.9686, 9504.4906])
+
+for command in STARTUP:
+    @bench('startup.%s' % command, 1)
+    def setup_startup(command=command):
+        argv = [ sys.executable, '-c', 'import samspy.cmds.' + command ]
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(HERE))
+        return lambda: subprocess.run(argv, env=env, check=True)
+
+def run(names, repeat):
+    """Run the named benchmarks.
+    Returns:
+      dict of name to timings (seconds per call)
+    """
+    results = {}
+    for name in names:
+        setup, number = BENCHMARKS[name]
+        func = setup()
+        timer = timeit.Timer(func)
+        # warm up, and grow batches to at least MINBATCH seconds
+        while timer.timeit(number) < MINBATCH:
+            number *= 2
+        times = timer.repeat(repeat, number)
+        times = sorted(t / number for t in times)
+        results[name] = { 'best': times[0], 'median': times[len(times)//2],
+            'number': number, 'repeat': repeat }
+    return results
+
+def record(results):
+    "Results with a description of the machine and versions."
+    return { 'meta': { 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count() },
+        'results': results }
+
+def select(pattern):
+    "Names of benchmarks containing 'pattern'."
+    return [ name for name in BENCHMARKS if pattern is None or pattern in name ]
+
+def compare(baseline, current, threshold):
+    """Compare best times of 'current' against 'baseline'.
+    Returns:
+      list of report lines, list of names of regressions
+    """
+    lines = [ '%-40s %12s %12s %8s' % ('benchmark', 'baseline us',
+        'current us', 'ratio') ]
+    regressions = []
+    for name, timing in current['results'].items():
+        if name not in baseline['results']:
+            lines.append('%-40s %12s %12.3f %8s' % (name, '-',
+                timing['best'] * 1.0e6, 'new'))
+            continue
+        before = baseline['results'][name]['best']
+        ratio = timing['best'] / before
+        flag = ''
+        if ratio > 1.0 + threshold:
+            flag = '  SLOWER'
+            regressions.append(name)
+        elif ratio < 1.0 / (1.0 + threshold):
+            flag = '  faster'
+        lines.append('%-40s %12.3f %12.3f %8.2f%s' % (name, before * 1.0e6,
+            timing['best'] * 1.0e6, ratio, flag))
+    for command, budget in STARTUP.items():
+        timing = current['results'].get('startup.' + command)
+        if timing and timing['best'] > budget:
+            lines.append('startup.%s takes %.3f s, over its budget of %.3f s'
+                % (command, timing['best'], budget))
+            if 'startup.' + command not in regressions:
+                regressions.append('startup.' + command)
+    return lines, regressions
+
+def parseargs(argv):
+    "Parse command line arguments."
+
+    parser = argparse.ArgumentParser(prog='bench')
+    sub = parser.add_subparsers(dest='command', required=True)
+    runp = sub.add_parser('run', help="run benchmarks, write JSON results")
+    runp.add_argument("-o", "--output",
+            help="results file (default stdout; see also --baseline)")
+    runp.add_argument("--baseline", action="store_true",
+            help="write the results as the new baseline, %s" % BASELINE)
+    cmpp = sub.add_parser('compare', help="compare results to a baseline")
+    cmpp.add_argument("baseline", nargs='?', default=BASELINE,
+            help="baseline results file (default %(default)s)")
+    cmpp.add_argument("current", nargs='?',
+            help="results file to compare (default: run now)")
+    cmpp.add_argument("-t", "--threshold", type=float, default=0.25,
+            help="slowdown ratio counted as a regression")
+    for subp in (runp, cmpp):
+        subp.add_argument("-k", "--select",
+                help="only benchmarks whose name contains this")
+        subp.add_argument("-r", "--repeat", type=int, default=7,
+                help="timing repetitions")
+    return parser.parse_args(argv[1:])
+
+def main(argv=None):
+    """Run or compare benchmarks."""
+
+    if argv is None:
+        argv = sys.argv
+    parsed = parseargs(argv)
+
+    if parsed.command == 'run':
+        current = record(run(select(parsed.select), parsed.repeat))
+        output = BASELINE if parsed.baseline else parsed.output
+        if output:
+            with open(output, 'w') as fh:
+                json.dump(current, fh, indent=1, sort_keys=True)
+                fh.write('\n')
+        else:
+            json.dump(current, sys.stdout, indent=1, sort_keys=True)
+            sys.stdout.write('\n')
+        return 0
+
+    with open(parsed.baseline) as fh:
+        baseline = json.load(fh)
+    if parsed.current:
+        with open(parsed.current) as fh:
+            current = json.load(fh)
+    else:
+        current = record(run(select(parsed.select), parsed.repeat))
+    lines, regressions = compare(baseline, current, parsed.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print('%d regression(s) over %d%%: %s' % (len(regressions),
+            round(parsed.threshold * 100), ', '.join(regressions)))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,91 @@
+#-*- coding: utf-8 -*-
+
+"""On-disk cache of data derived from source files.
+Entries are pickled into the cache directory, one per (source file, tag),
+and are invalidated when the source file changes: a changed mtime or
+size triggers a content hash check, and a changed hash a rebuild.
+A matching mtime and size is trusted only for a source last modified
+well (SAFETY seconds) before its entry was written; a file changed
+again within its filesystem's mtime granularity may keep both, so more
+recently modified sources are always hash checked.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+# bump when the layout of cached entries changes
+VERSION = 2
+
+# seconds a source must be older than its entry for the mtime to be
+# trusted; covers coarse (e.g. 2 s FAT) mtime granularity
+SAFETY = 2.0
+
+def cachedir():
+    """Return the cache directory.
+    $SAMSPY_CACHE if set (an empty value disables caching),
+    else ~/.cache/samspy.
+    """
+    path = os.environ.get('SAMSPY_CACHE')
+    if path is None:
+        path = os.path.join(os.path.expanduser('~'), '.cache', 'samspy')
+    return path
+
+def cachefile(path, tag):
+    """Name of the cache file for source 'path' and 'tag'."""
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(cachedir(), '%s-%s.pickle' % (tag, key[:20]))
+
+def readentry(cfile):
+    """Read a cache entry; None if missing, stale format or unreadable."""
+    try:
+        with open(cfile, 'rb') as fh:
+            entry = pickle.load(fh)
+    except Exception:
+        return None
+    if not isinstance(entry, dict) or entry.get('version') != VERSION:
+        return None
+    return entry
+
+def writeentry(cfile, entry):
+    """Write a cache entry atomically; failures leave caching off."""
+    try:
+        os.makedirs(os.path.dirname(cfile), exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(cfile))
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump(entry, fh, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, cfile)
+    except OSError:
+        pass
+
+def load(path, tag, build):
+    """Return build(content) of source file 'path', via the cache.
+      tag - names the kind of derived data (e.g. 'propeldb')
+      build - function of the source file content (bytes)
+    """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cfile = None
+    entry = None
+    if cachedir():
+        cfile = cachefile(path, tag)
+        entry = readentry(cfile)
+        if entry is not None and entry['stamp'] == stamp and \
+                stat.st_mtime_ns < entry['written'] - SAFETY * 1.0e9:
+            return entry['value']
+
+    with open(path, 'rb') as fh:
+        content = fh.read()
+    digest = hashlib.sha1(content).hexdigest()
+    if entry is not None and entry['digest'] == digest:
+        value = entry['value']          # touched, or recent, not changed
+    else:
+        value = build(content)
+    if cfile is not None:
+        writeentry(cfile, { 'version': VERSION, 'stamp': stamp,
+            'digest': digest, 'written': time.time_ns(), 'value': value })
+    return value
+
+# vim: set sw=4 tw=80 :
@@ -7,11 +7,12 @@ Launch vehicle -- basic analysis.
 
 import argparse
 import sys
-import yaml
 
 from samspy.vehicle import multistage, propel
+from samspy.vehicle.propeldb import PropellantDB
 from samspy import lb2kg, m2ft, gEarth, N2lb
-from samspy.writers.Text import Text
+from samspy import loader, timing
+from samspy.writers.BufferedText import BufferedText
 
 def parseargs(argv):
     "Parse command line arguments."
@@ -21,43 +22,73 @@ def parseargs(argv):
     parser.add_argument("propellants", help="propellants data file")
     parser.add_argument("-v", "--verbose", help="increase output verbosity",
             action="store_true")
-    args = parser.parse_args()
+    parser.add_argument("--timings", nargs='?', const='table',
+            choices=('table', 'json'),
+            help="report time per stage of the run on stderr")
+    parser.add_argument("--profile", action="store_true",
+            help="report a cProfile function profile on stderr")
+    args = parser.parse_args(argv[1:])
     if args.verbose:
         print("verbosity turned on")
     return args
 
-def main(argv):
+def main(argv=None):
     """Determine basic vehicle propellant and mass parameters of vehicle."""
 
+    if argv is None:
+        argv = sys.argv
     parsed = parseargs(argv)
-
-    writer = Text(sys.stdout)
+    if parsed.timings:
+        timing.enable()
+    if parsed.profile:
+        timing.profile(analyze, parsed)
+    else:
+        analyze(parsed)
+    if parsed.timings:
+        timing.report(parsed.timings)
+    return 0
+
+def analyze(parsed):
+    """Analyze and report the vehicle given by parsed arguments.
+    Timed in sections: load, analyze, propellant, flows, write.
+    Report rows formatted before a failure are still written out."""
+
+    with BufferedText(sys.stdout) as writer:
+        report(parsed, writer)
+
+def report(parsed, writer):
+    """Analyze the vehicle given by parsed arguments, reporting through
+    'writer'."""
+
+    section = timing.section
     putrow = writer.putfmtrow
     putitem = writer.putitem
     #putrow("msglabel", "%8s", [ "hello", "world" ])
 
-    fh = open(parsed.vehicle, 'r')
-    design = yaml.load(fh)
-    fh = open(parsed.propellants, 'r')
-    propeldb = yaml.load(fh)
+    with section('load'):
+        design = loader.loaddesign(parsed.vehicle)
+        propeldb = PropellantDB.load(parsed.propellants)
 
-    staging = multistage.performance(design)
+    with section('analyze'):
+        staging = multistage.performance(design)
     sequence = design['stageorder']
     maxG = design['maxG']
 
-    putitem('Performance summary')
-    for activestage in sequence:
-        stage = staging[activestage]
-        mIgnite = stage['Mignite']
-        mBurnout = stage['Mburnout']
-        dV = stage['deltaV']
-        putitem('  During stage: ' + activestage)
-        putrow('Mignite (kg, lbm)', '%11.4f', [mIgnite, mIgnite/lb2kg])
-        putrow('Mburnout (kg, lbm)', '%11.4f', [mBurnout, mBurnout/lb2kg])
-        putrow('deltaV (m/s, ft/s)', '%11.4f', [dV, dV*m2ft])
-    deltaV = staging['totalDeltaV']
-    putitem('Total deltaV')
-    putrow ('Total deltaV (m/s, ft/s)', '%11.4f', [deltaV, deltaV*m2ft])
+    with section('write'):
+        putitem('Performance summary')
+        for activestage in sequence:
+            stage = staging[activestage]
+            mIgnite = stage['Mignite']
+            mBurnout = stage['Mburnout']
+            dV = stage['deltaV']
+            putitem('  During stage: ' + activestage)
+            putrow('Mignite (kg, lbm)', '%11.4f', [mIgnite, mIgnite/lb2kg])
+            putrow('Mburnout (kg, lbm)', '%11.4f',
+                [mBurnout, mBurnout/lb2kg])
+            putrow('deltaV (m/s, ft/s)', '%11.4f', [dV, dV*m2ft])
+        deltaV = staging['totalDeltaV']
+        putitem('Total deltaV')
+        putrow ('Total deltaV (m/s, ft/s)', '%11.4f', [deltaV, deltaV*m2ft])
 
     stages = design['stages']
     putitem('Stage details')
@@ -67,55 +98,62 @@ def main(argv):
             continue
         mixture = stages[activestage]['mixture']
         Mpropel = stageinfo['Mignite']-stageinfo['Mburnout']
-        propresults = propel.deduce(propeldb, mixture, Mpropel)
-
-        putitem ('  Stage: ' + activestage)
-        for label, fmt, prop in (
-                ('matl names', '%7s', 'matlNames'),
-                ('liqdens (kg/l)', '%7.3f', 'liqdens'),
-                ('masses (kg)', '%7.3f', 'masses'),
-                ('volume (l)', '%7.3f', 'volumes') ):
-            results = list(propresults[prop])
-            if prop == 'matlNames':
-                results.append('[sum]')
-            elif prop in ('masses', 'volumes'):
-                results.append(sum(propresults[prop]))
-            putrow (label, fmt, results)
-        avgdens = sum(propresults['masses'])/sum(propresults['volumes'])
-        putrow ('avg dens (kg/l)', '%11.4f', [avgdens])
-
-        # compute thrust based on stageinfo['Mburnout']
-        thrust = stageinfo['Mburnout'] * gEarth * maxG
-        wIgnite = stageinfo['Mignite'] * gEarth
-        wBurnout = stageinfo['Mburnout'] * gEarth
-        deltaV = stageinfo['deltaV']
-        mflow = thrust / (stageinfo['Isp'] * gEarth)
-        mInit = stageinfo['Mignite']
-        mFini = stageinfo['Mburnout']
-        smDry = stages[activestage]['Mdry']
-        burntime = Mpropel / mflow
-        GIgnite = thrust / wIgnite
-        GBurnout = thrust / wBurnout
-
-        for label, fmt, values in (
-            ('massflow (kg/s)', '%11.4f', [mflow]),
-            ('burn time (s)', '%11.4f', [burntime]),
-            ('G (ignite, burnout)', '%7.3f', [GIgnite, GBurnout]),
-            ('thrust (N, lbf)', '%11.4f', [thrust, thrust*N2lb]),
-            ('wt ignite (N, lbm)', '%11.4f', [wIgnite, wIgnite*N2lb]),
-            ('wt burnout (N, lbm)', '%11.4f', [wBurnout, wBurnout*N2lb]),
-            ('mass init (kg, lbm)', '%11.4f', [mInit, mInit/lb2kg]),
-            ('mass fini (kg, lbm)', '%11.4f', [mFini, mFini/lb2kg]),
-            ('stage dry (kg, lbm)', '%11.4f', [smDry, smDry/lb2kg]),
-            ('deltaV (m/s, ft/s)', '%11.4f', [deltaV, deltaV*m2ft]), ):
-            putrow (label, fmt, values)
-
-    putitem ('Total masses:')
-    drytot = multistage.masses(design['stageorder'], stages, mtype='Mdry')
-    wettot = multistage.masses(design['stageorder'], stages, mtype='Mwet')
-    putrow ('dry mass', '%11.4f', [drytot, drytot/lb2kg])
-    putrow ('wet mass', '%11.4f', [wettot, wettot/lb2kg])
-
-sys.exit(main(sys.argv))
+        with section('propellant'):
+            propresults = propel.deduce(propeldb, mixture, Mpropel)
+
+        with section('write'):
+            putitem ('  Stage: ' + activestage)
+            for label, fmt, prop in (
+                    ('matl names', '%7s', 'matlNames'),
+                    ('liqdens (kg/l)', '%7.3f', 'liqdens'),
+                    ('masses (kg)', '%7.3f', 'masses'),
+                    ('volume (l)', '%7.3f', 'volumes') ):
+                results = list(propresults[prop])
+                if prop == 'matlNames':
+                    results.append('[sum]')
+                elif prop in ('masses', 'volumes'):
+                    results.append(sum(propresults[prop]))
+                putrow (label, fmt, results)
+            avgdens = sum(propresults['masses'])/sum(propresults['volumes'])
+            putrow ('avg dens (kg/l)', '%11.4f', [avgdens])
+
+        with section('flows'):
+            # compute thrust based on stageinfo['Mburnout']
+            thrust = stageinfo['Mburnout'] * gEarth * maxG
+            wIgnite = stageinfo['Mignite'] * gEarth
+            wBurnout = stageinfo['Mburnout'] * gEarth
+            deltaV = stageinfo['deltaV']
+            mflow = thrust / (stageinfo['Isp'] * gEarth)
+            mInit = stageinfo['Mignite']
+            mFini = stageinfo['Mburnout']
+            smDry = stages[activestage]['Mdry']
+            burntime = Mpropel / mflow
+            GIgnite = thrust / wIgnite
+            GBurnout = thrust / wBurnout
+
+        with section('write'):
+            for label, fmt, values in (
+                ('massflow (kg/s)', '%11.4f', [mflow]),
+                ('burn time (s)', '%11.4f', [burntime]),
+                ('G (ignite, burnout)', '%7.3f', [GIgnite, GBurnout]),
+                ('thrust (N, lbf)', '%11.4f', [thrust, thrust*N2lb]),
+                ('wt ignite (N, lbm)', '%11.4f', [wIgnite, wIgnite*N2lb]),
+                ('wt burnout (N, lbm)', '%11.4f', [wBurnout, wBurnout*N2lb]),
+                ('mass init (kg, lbm)', '%11.4f', [mInit, mInit/lb2kg]),
+                ('mass fini (kg, lbm)', '%11.4f', [mFini, mFini/lb2kg]),
+                ('stage dry (kg, lbm)', '%11.4f', [smDry, smDry/lb2kg]),
+                ('deltaV (m/s, ft/s)', '%11.4f', [deltaV, deltaV*m2ft]), ):
+                putrow (label, fmt, values)
+
+    with section('write'):
+        putitem ('Total masses:')
+        drytot = multistage.masses(design['stageorder'], stages, mtype='Mdry')
+        wettot = multistage.masses(design['stageorder'], stages, mtype='Mwet')
+        putrow ('dry mass', '%11.4f', [drytot, drytot/lb2kg])
+        putrow ('wet mass', '%11.4f', [wettot, wettot/lb2kg])
+        writer.flush()
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
 
 # vim: set sw=4 tw=80 :
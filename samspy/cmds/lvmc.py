@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""
+Launch vehicle -- Monte Carlo uncertainty analysis.
+"""
+
+import argparse
+import sys
+
+from samspy import loader
+
+def parseargs(argv):
+    "Parse command line arguments."
+    from samspy.writers import Columnar
+
+    parser = argparse.ArgumentParser(prog='lvmc')
+    parser.add_argument("vehicle", help="vehicle spec file")
+    parser.add_argument("propellants", help="propellants data file")
+    parser.add_argument("uncertain", help="uncertainty distributions file")
+    parser.add_argument("-n", "--samples", type=int, default=None,
+            help="number of samples (overrides file)")
+    parser.add_argument("-s", "--seed", type=int, default=None,
+            help="random generator seed (overrides file)")
+    parser.add_argument("-p", "--percentiles", default="1,5,50,95,99",
+            help="comma separated percentiles to report")
+    parser.add_argument("-o", "--output",
+            help="also write every sample to this file")
+    parser.add_argument("-f", "--format", choices=Columnar.FORMATS,
+            help="sample file format (default: by file extension)")
+    args = parser.parse_args(argv[1:])
+    return args
+
+def main(argv=None):
+    """Report distributions of deltaV, burn time and tank volume."""
+
+    if argv is None:
+        argv = sys.argv
+    parsed = parseargs(argv)
+    from samspy.vehicle import montecarlo
+    from samspy.vehicle.propeldb import PropellantDB
+    from samspy.writers.BufferedText import BufferedText
+    from samspy.writers import Columnar
+
+    design = loader.loaddesign(parsed.vehicle)
+    ppltdata = PropellantDB.load(parsed.propellants)
+    uncertain = loader.loadyaml(parsed.uncertain)
+    pcts = [ float(p) for p in parsed.percentiles.split(',') ]
+
+    if parsed.output:
+        # stream blocks out, then summarize from the file
+        with Columnar.columnwriter(parsed.output, parsed.format) as writer:
+            for block in montecarlo.blocks(design, ppltdata, uncertain,
+                    samples=parsed.samples, seed=parsed.seed):
+                writer.write(block)
+        results = Columnar.load(parsed.output, parsed.format)
+    else:
+        results = montecarlo.montecarlo(design, ppltdata, uncertain,
+            samples=parsed.samples, seed=parsed.seed)
+    summary = montecarlo.percentiles(results, pcts)
+
+    writer = BufferedText(sys.stdout)
+    putrow = writer.putfmtrow
+    samples = len(results['totalDeltaV'])
+    writer.putitem('Monte Carlo summary: %d samples' % samples)
+    putrow('quantity', '%11s', ['mean', 'std dev'] +
+        [ 'p%g' % p for p in pcts ], labelfmt="%-32s")
+    for name, (mean, stddev, values) in summary.items():
+        putrow(name, '%11.4f', [mean, stddev] + values, labelfmt="%-32s")
+    writer.flush()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""
+Launch vehicle -- evaluation server.
+
+Loads the propellant data once, then answers JSON-lines requests on
+stdin (answers on stdout) or on a local Unix socket.  Requests may be
+pipelined: every request read in one go is answered in one write, in
+order.  Each request is one JSON object on one line:
+
+    {"id": 1, "design": {...}}                  evaluate a design
+    {"id": 2, "design": {...}, "session": "a"}  ... and keep it as "a"
+    {"id": 3, "vehicle": "protolv.yaml", "session": "a"}
+                                                ... read from a YAML file
+    {"id": 4, "session": "a", "update": {"stages": {"LV-2": {"Mwet": 4500}},
+        "maxG": 3.5}}                           change session "a"
+
+Updates restage only the stages they affect (multistage.Staging);
+a new 'stageorder' restages the whole vehicle.  An update is checked
+as a whole before any of it is applied: a failed update leaves the
+session as it was.
+Sessions belong to one connection (or to stdin).  Each answer is
+
+    {"id": 1, "ok": true, "result": {...}, "latency_us": 41.2}
+
+or, when the request fails, {"id": 1, "ok": false, "error": "..."}.
+The result holds 'totalDeltaV' and, under 'stages', the Mignite,
+Mburnout, Isp and deltaV of each stage, plus volume, thrust, mflow and
+burntime of propulsive stages (when the design gives maxG or gRange).
+"""
+
+import argparse
+import copy
+import json
+import os
+import socketserver
+import stat
+import sys
+import time
+
+from samspy import loader
+from samspy.vehicle import multistage, propel
+from samspy.vehicle.propeldb import PropellantDB
+
+BUFSIZE = 1 << 16
+STAGINGFIELDS = ('Mwet', 'Mdry', 'Isp')
+
+class Evaluator:
+    """Request handler for one client, with its sessions.
+    """
+
+    def __init__(self, propeldb):
+        """Evaluator constructor.
+        propeldb : compiled propellant data, shared by all clients
+        """
+        self.propeldb = propeldb
+        self.sessions = {}      # name -> (design, Staging)
+        self.latencies = []     # seconds per request
+
+    def results(self, design, staging):
+        """Results of a design and its Staging."""
+        stages = design['stages']
+        try:
+            gRange = propel.grange(design)
+        except KeyError:
+            gRange = None
+        stageresults = {}
+        for name in staging.stageorder:
+            info = staging.stageinfo(name)
+            Mpropel = info['Mignite'] - info['Mburnout']
+            if gRange and info['Isp'] > 0 and Mpropel > 0 and \
+                    'mixture' in stages[name]:
+                pplt = propel.deduce(self.propeldb, stages[name]['mixture'],
+                    Mpropel)
+                stageflows, report = propel.flows(pplt,
+                    dict(info, gRange=gRange))
+                info['volume'] = sum(pplt['volumes'])
+                info['thrust'] = stageflows['thrust']
+                info['mflow'] = stageflows['mflows'][-1]
+                info['burntime'] = stageflows['burntime_min']
+            stageresults[name] = info
+        return { 'totalDeltaV': staging.totalDeltaV, 'stages': stageresults }
+
+    def evaluate(self, request):
+        """Evaluate one decoded request; returns the result."""
+        session = request.get('session')
+        if 'vehicle' in request:
+            request = dict(request,
+                design=loader.loaddesign(request['vehicle']))
+        elif 'design' in request:
+            loader.validate(request['design'])
+        if 'design' in request:
+            design = copy.deepcopy(request['design'])
+            staging = multistage.Staging(design['stageorder'],
+                design['stages'])
+            if session is not None:
+                self.sessions[session] = (design, staging)
+        elif 'update' in request:
+            if session not in self.sessions:
+                raise KeyError("no session %r" % session)
+            design, staging = self.update(*self.sessions[session],
+                request['update'])
+            self.sessions[session] = (design, staging)
+        else:
+            raise ValueError("request needs 'design', 'vehicle' or 'update'")
+        return self.results(design, staging)
+
+    @staticmethod
+    def update(design, staging, changes):
+        """Apply a partial design to a session's design and Staging.
+        Stages named in changes['stages'] must be in the design, or be
+        given whole along with a new 'stageorder'; the updated design
+        must pass loader.validate().
+        Returns the new design and Staging; the old ones are unchanged
+        if the update fails.
+        """
+        stagechanges = changes.get('stages', {})
+        if not isinstance(stagechanges, dict):
+            raise ValueError("'stages' is not a mapping")
+        newdesign = dict(changes, stages=dict(design['stages']))
+        for field, value in design.items():
+            newdesign.setdefault(field, value)
+        newstages = newdesign['stages']
+        for name, fields in stagechanges.items():
+            if name not in newstages and 'stageorder' not in changes:
+                raise KeyError("no stage %r" % name)
+            if not isinstance(fields, dict):
+                raise ValueError("stage %r changes are not a mapping" % name)
+            newstages[name] = dict(newstages.get(name, {}), **fields)
+        loader.validate(newdesign, 'update')
+
+        if newdesign['stageorder'] != design['stageorder']:
+            return newdesign, multistage.Staging(newdesign['stageorder'],
+                newstages)
+        staging = staging.copy()
+        for name, fields in stagechanges.items():
+            stagingchanges = dict((field, value)
+                for field, value in fields.items() if field in STAGINGFIELDS)
+            if stagingchanges:
+                staging.update(name, **stagingchanges)
+        return newdesign, staging
+
+    def handle(self, line):
+        """Answer one request line; returns the answer line."""
+        start = time.perf_counter()
+        reqid = None
+        try:
+            request = json.loads(line)
+            reqid = request.get('id')
+            answer = { 'id': reqid, 'ok': True,
+                'result': self.evaluate(request) }
+        except Exception as exc:
+            answer = { 'id': reqid, 'ok': False,
+                'error': "%s: %s" % (type(exc).__name__, exc) }
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        answer['latency_us'] = round(latency * 1.0e6, 1)
+        return json.dumps(answer) + '\n'
+
+    def summary(self):
+        """Request count and latency percentiles, as a text line."""
+        count = len(self.latencies)
+        if not count:
+            return "0 requests\n"
+        ordered = sorted(self.latencies)
+        pick = lambda pct: ordered[min(count - 1, int(count * pct / 100))]
+        return ("%d requests, latency mean %.1f us, p50 %.1f us, "
+            "p99 %.1f us\n" % (count, 1.0e6 * sum(ordered) / count,
+            1.0e6 * pick(50), 1.0e6 * pick(99)))
+
+def serve(recv, send, evaluator):
+    """Answer request lines from recv(size) through send(bytes) until
+    recv() returns nothing.  The answers to all complete lines of each
+    received chunk go out together."""
+    pending = b''
+    while True:
+        data = recv(BUFSIZE)
+        if not data:
+            break
+        lines = (pending + data).split(b'\n')
+        pending = lines.pop()
+        answers = [ evaluator.handle(line) for line in lines if line.strip() ]
+        if answers:
+            send(''.join(answers).encode())
+    if pending.strip():
+        send(evaluator.handle(pending).encode())
+
+class SocketHandler(socketserver.BaseRequestHandler):
+    """Serve one Unix socket connection."""
+
+    def handle(self):
+        evaluator = Evaluator(self.server.propeldb)
+        serve(self.request.recv, self.request.sendall, evaluator)
+        if self.server.verbose:
+            sys.stderr.write(evaluator.summary())
+
+class SocketServer(socketserver.ThreadingMixIn,
+        socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def parseargs(argv):
+    "Parse command line arguments."
+
+    parser = argparse.ArgumentParser(prog='lvserve')
+    parser.add_argument("propellants", help="propellants data file")
+    parser.add_argument("-s", "--socket",
+            help="listen on this Unix socket (default: stdin and stdout)")
+    parser.add_argument("-v", "--verbose", action="store_true",
+            help="report request latencies on stderr")
+    args = parser.parse_args(argv[1:])
+    return args
+
+def main(argv=None):
+    """Serve vehicle evaluations until end of input (or interrupted)."""
+
+    if argv is None:
+        argv = sys.argv
+    parsed = parseargs(argv)
+    propeldb = PropellantDB.load(parsed.propellants)
+
+    if parsed.socket is None:
+        evaluator = Evaluator(propeldb)
+        infd = sys.stdin.fileno()
+        outfd = sys.stdout.fileno()
+        def send(data):
+            while data:
+                data = data[os.write(outfd, data):]
+        serve(lambda size: os.read(infd, size), send, evaluator)
+        if parsed.verbose:
+            sys.stderr.write(evaluator.summary())
+        return 0
+
+    # a stale socket from an earlier run is replaced; other files are not
+    if os.path.exists(parsed.socket) and \
+            stat.S_ISSOCK(os.stat(parsed.socket).st_mode):
+        os.unlink(parsed.socket)
+    server = SocketServer(parsed.socket, SocketHandler)
+    server.propeldb = propeldb
+    server.verbose = parsed.verbose
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(parsed.socket)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# vim: set sw=4 tw=80 :
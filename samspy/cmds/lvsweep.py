@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""
+Launch vehicle -- parameter sweep (trade study).
+"""
+
+import argparse
+import itertools
+import sys
+
+from samspy import loader
+
+def parseargs(argv):
+    "Parse command line arguments."
+    from samspy.writers import Columnar
+
+    parser = argparse.ArgumentParser(prog='lvsweep')
+    parser.add_argument("vehicle", help="base vehicle spec file")
+    parser.add_argument("propellants", help="propellants data file")
+    parser.add_argument("sweep", help="sweep ranges file")
+    parser.add_argument("-o", "--output", help="output file (default stdout)")
+    parser.add_argument("-f", "--format", choices=Columnar.FORMATS,
+            help="output format (default: by output file extension)")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+            help="worker processes (default: one per CPU)")
+    parser.add_argument("-c", "--chunksize", type=int, default=256,
+            help="sweep points per worker task")
+    parser.add_argument("-b", "--blocksize", type=int, default=4096,
+            help="rows per output block")
+    parser.add_argument("-v", "--verbose", help="increase output verbosity",
+            action="store_true")
+    args = parser.parse_args(argv[1:])
+    return args
+
+def main(argv=None):
+    """Sweep vehicle parameters, writing one row per design point."""
+
+    if argv is None:
+        argv = sys.argv
+    parsed = parseargs(argv)
+    from samspy.vehicle import sweep
+    from samspy.vehicle.propeldb import PropellantDB
+    from samspy.writers import Columnar
+
+    design = loader.loaddesign(parsed.vehicle)
+    propeldb = PropellantDB.load(parsed.propellants)
+    sweepspec = loader.loadyaml(parsed.sweep)
+    if parsed.verbose:
+        count = sweep.npoints(sweep.axes(sweepspec))
+        sys.stderr.write("sweeping %d design points\n" % count)
+
+    rows = sweep.sweep(design, propeldb, sweepspec,
+        processes=parsed.processes, chunksize=parsed.chunksize)
+    with Columnar.columnwriter(parsed.output, parsed.format) as writer:
+        while True:
+            block = list(itertools.islice(rows, parsed.blocksize))
+            if not block:
+                break
+            writer.writerows(block)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
+
+# vim: set sw=4 tw=80 :
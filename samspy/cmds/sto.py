@@ -13,10 +13,12 @@ Suffixes on variables and notations:
   _per = periapsis, perigee
 """
 
+import argparse
 import math
 import sys
 
 from samspy import deg2rad, s2hms
+from samspy import timing
 import samspy.traj.orbit as orbit
 
 # Earth constants
@@ -40,17 +42,11 @@ def leo_ito_sto_geo (leo_sl, sto_sl, leo_incline):
     deltav = {}
     orbits = {}
 
+    # derived orbit parameters are computed lazily, when first used
     leo = orbit.Elliptical(mu=muEarth).set_circular(leo_r)
-    leo.fill_params()
-
     sto = orbit.Elliptical(mu=muEarth, peri=leo_r, apo=sto_apo_r)
-    sto.fill_params()
-
     ito = orbit.Elliptical(mu=muEarth, peri=geo_r, apo=sto_apo_r)
-    ito.fill_params()
-
     geo = orbit.Elliptical(mu=muEarth).set_circular(geo_r)
-    geo.fill_params()
 
     velo['leo'] = leo.velo(leo_r)
     velo['sto_per'] = sto.velo(leo_r)
@@ -70,6 +66,56 @@ def leo_ito_sto_geo (leo_sl, sto_sl, leo_incline):
 
     return velo, deltav, orbits
 
+def leo_ito_sto_geo_grid (leo_sl, sto_sl, leo_incline):
+    """Delta Vs of the LEO, STO, ITO, GEO sequence over arrays.
+    Arguments are arrays or scalars broadcast against each other, e.g.
+    STO altitudes as a column and inclinations (degrees) as a row give
+    the whole grid in one call.
+    Returns:
+      dict of deltaV arrays 'leo_sto', 'sto_ito', 'ito_geo', 'total'
+    """
+    import numpy as np
+    import samspy.traj.maneuver as maneuver
+    return maneuver.sto_budget(muEarth, earth_r + leo_sl, earth_r + sto_sl,
+        geo_r, np.multiply(leo_incline, deg2rad))
+
+def leo_ito_sto_geo_split (leo_sl, sto_sl, leo_incline):
+    """Like leo_ito_sto_geo_grid(), but with the plane change split
+    between the LEO->STO and STO->ITO burns for least total deltaV.
+    Returns:
+      dict of arrays, see maneuver.planesplit()
+    """
+    import numpy as np
+    import samspy.traj.maneuver as maneuver
+    return maneuver.planesplit(muEarth, earth_r + leo_sl, earth_r + sto_sl,
+        geo_r, np.multiply(leo_incline, deg2rad))
+
+def checkrange(sto_lo, sto_hi):
+    "Raise ValueError unless GEO altitude <= sto_lo < sto_hi."
+    if not sto_lo < sto_hi:
+        raise ValueError("STO range %g:%g is empty or inverted"
+            % (sto_lo, sto_hi))
+    if sto_lo < geo_sl:
+        raise ValueError("STO range %g:%g starts below GEO altitude %g km"
+            % (sto_lo, sto_hi, geo_sl))
+
+def best_sto(leo_sl, leo_incline, sto_lo, sto_hi):
+    """Find the STO altitude (between sto_lo and sto_hi) that minimizes
+    total deltaV, for each of an array of inclinations (degrees).
+    The range must lie at or above GEO altitude (below it, the sequence
+    is not super-synchronous); ValueError otherwise.
+    Returns:
+      STO altitudes, total deltaVs
+    """
+    import numpy as np
+    import samspy.traj.maneuver as maneuver
+    checkrange(sto_lo, sto_hi)
+    def total(sto_sl):
+        return leo_ito_sto_geo_grid(leo_sl, sto_sl, leo_incline)['total']
+    # total deltaV peaks inside the range for some inclinations
+    lo = np.zeros_like(leo_incline, dtype=float) + sto_lo
+    return maneuver.scanmin(total, lo, sto_hi)
+
 def print_shape(orbitname, orbit):
     "Print formatted shape parameters of eccentric orbit."
     msgfmt ="%s smj %5d km ecc %5.3f " + \
@@ -123,22 +169,107 @@ def report(velo, dv, orbits):
     print_deltav("STO->ITO", ito.apoapsis, dv['sto_ito'])
     print_deltav("ITO->GEO", geo.semimaj, dv['ito_geo'])
 
-def main(argv):
+def parseargs(argv):
+    "Parse command line arguments."
+
+    parser = argparse.ArgumentParser(prog='sto',
+        description="Super-synchronous transfer from LEO to GEO.",
+        epilog="Example arguments: 295.0 90000.0 22.5")
+    parser.add_argument("leo_sl", type=float,
+            help="LEO altitude above sea level (km)")
+    parser.add_argument("sto_sl",
+            help="STO apogee altitude above sea level (km); "
+            "with --best, the search range LO:HI")
+    parser.add_argument("inclination", type=float, nargs='+',
+            help="LEO inclination (degrees); several allowed with --best")
+    parser.add_argument("--best", action="store_true",
+            help="find the STO apogee of least total deltaV")
+    parser.add_argument("--split", action="store_true",
+            help="also split plane change between perigee and apogee")
+    parser.add_argument("--timings", nargs='?', const='table',
+            choices=('table', 'json'),
+            help="report time per stage of the run on stderr")
+    parser.add_argument("--profile", action="store_true",
+            help="report a cProfile function profile on stderr")
+    args = parser.parse_args(argv[1:])
+    if not args.best and len(args.inclination) > 1:
+        parser.error("only one inclination without --best")
+    if args.best:
+        try:
+            sto_lo, sto_hi = [ float(v) for v in args.sto_sl.split(':') ]
+            checkrange(sto_lo, sto_hi)
+        except ValueError as exc:
+            parser.error("--best needs a range LO:HI of STO altitudes: %s"
+                % exc)
+    return args
+
+def report_split(leo_sl, sto_sl, inclination):
+    "Report the best split of plane change between perigee and apogee."
+    with timing.section('analyze'):
+        split = leo_ito_sto_geo_split(leo_sl, sto_sl, inclination)
+    split = dict((key, value.item()) for key, value in split.items())
+    with timing.section('write'):
+        msgfmt = "%s plane change %6.3f deg"
+        print(msgfmt % ("LEO->STO", split['perigee'] / deg2rad))
+        print(msgfmt % ("STO->ITO", split['apogee'] / deg2rad))
+        print_deltav("LEO->STO", earth_r + leo_sl, split['leo_sto'])
+        print_deltav("STO->ITO", earth_r + sto_sl, split['sto_ito'])
+        print("split total dv = %8.5f km/sec, saves %8.5f km/sec" %
+            (split['total'], split['saved']))
+
+def report_best(leo_sl, inclinations, sto_range):
+    "Report the best STO apogee altitude for each inclination."
+    import numpy as np
+    sto_lo, sto_hi = [ float(v) for v in sto_range.split(':') ]
+    with timing.section('analyze'):
+        sto_sl, total = best_sto(leo_sl, np.array(inclinations), sto_lo,
+            sto_hi)
+    with timing.section('write'):
+        msgfmt = "incl %5.2f deg best STO at %8.1f km total dv = %8.5f km/sec"
+        for incline, apo, dv in zip(inclinations, sto_sl, total):
+            print(msgfmt % (incline, apo, dv))
+
+def main(argv=None):
     """Compute super-synchronous maneuver.
     Arguments:
        argv[1] -- LEO atitude above sea level
        argv[2] -- STO atitude above sea level
        argv[3] -- inclination in degrees
     Example argments: 295.0 90000.0 22.5
+    With --best, argv[2] is a range LO:HI of STO altitudes, and
+    several inclinations may follow.
     """
 
-    leo_sl = float(argv[1])
-    sto_sl = float(argv[2])
-    inclination = float(argv[3])
-
-    velo, dv, orbits = leo_ito_sto_geo(leo_sl, sto_sl, inclination)
-    report(velo, dv, orbits)
-
-main(sys.argv)
+    if argv is None:
+        argv = sys.argv
+    parsed = parseargs(argv)
+    if parsed.timings:
+        timing.enable()
+    if parsed.profile:
+        timing.profile(maneuvers, parsed)
+    else:
+        maneuvers(parsed)
+    if parsed.timings:
+        timing.report(parsed.timings)
+    return 0
+
+def maneuvers(parsed):
+    """Compute and report maneuvers for parsed arguments.
+    Timed in sections: analyze, write."""
+    if parsed.best:
+        report_best(parsed.leo_sl, parsed.inclination, parsed.sto_sl)
+        return
+
+    sto_sl = float(parsed.sto_sl)
+    with timing.section('analyze'):
+        velo, dv, orbits = leo_ito_sto_geo(parsed.leo_sl, sto_sl,
+            parsed.inclination[0])
+    with timing.section('write'):
+        report(velo, dv, orbits)
+    if parsed.split:
+        report_split(parsed.leo_sl, sto_sl, parsed.inclination[0])
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
 
 # vim: set sw=4 tw=80 :
@@ -0,0 +1,79 @@
+#-*- coding: utf-8 -*-
+
+"""Loading of YAML data and vehicle designs.
+YAML is parsed with the libyaml C loader when PyYAML was built with it,
+else with the pure Python safe loader.  Files loaded here are kept, parsed
+(and for designs, validated), in the SamsPy on-disk cache; see
+samspy.cache.  Repeated loads of an unchanged file skip parsing.
+"""
+
+import numbers
+
+from samspy import cache
+
+# stage fields required by the staging analysis
+STAGEFIELDS = ('Mwet', 'Mdry', 'Isp')
+
+def safeloader():
+    """The fastest available safe YAML loader class."""
+    import yaml
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def parse(content):
+    """Parse YAML text (str or bytes) into plain data."""
+    import yaml
+    return yaml.load(content, Loader=safeloader())
+
+def validate(design, source='design'):
+    """Check that a design has what the staging analysis reads:
+    'stageorder', a list of stage names, and 'stages', holding for each
+    named stage numbers Mwet >= Mdry > 0 and Isp >= 0, and a 'mixture'
+    name when Isp > 0.  'source' names the design in error messages.
+    Returns the design; raises ValueError if it does not check.
+    """
+    def fail(msg):
+        raise ValueError("%s: %s" % (source, msg))
+
+    if not isinstance(design, dict):
+        fail("not a mapping")
+    stageorder = design.get('stageorder')
+    stages = design.get('stages')
+    if not isinstance(stageorder, list) or not stageorder:
+        fail("'stageorder' is not a list of stage names")
+    if not isinstance(stages, dict):
+        fail("'stages' is not a mapping")
+    for name in stageorder:
+        stage = stages.get(name)
+        if not isinstance(stage, dict):
+            fail("stage %r is not in 'stages'" % name)
+        for field in STAGEFIELDS:
+            value = stage.get(field)
+            if not isinstance(value, numbers.Real) or isinstance(value, bool):
+                fail("stage %r: %s is not a number" % (name, field))
+        if not stage['Mwet'] >= stage['Mdry'] > 0:
+            fail("stage %r: masses not Mwet >= Mdry > 0" % name)
+        if stage['Isp'] < 0:
+            fail("stage %r: Isp is negative" % name)
+        if stage['Isp'] > 0 and not isinstance(stage.get('mixture'), str):
+            fail("stage %r: no propellant 'mixture'" % name)
+    return design
+
+def loadyaml(path, usecache=True):
+    """Load the YAML data file 'path'."""
+    if not usecache:
+        with open(path, 'rb') as fh:
+            return parse(fh.read())
+    return cache.load(path, 'yaml', parse)
+
+def loaddesign(path, usecache=True):
+    """Load and validate the vehicle design file 'path'.
+    Only valid designs are cached, so validation runs once per change
+    of the file."""
+    def build(content):
+        return validate(parse(content), path)
+    if not usecache:
+        with open(path, 'rb') as fh:
+            return build(fh.read())
+    return cache.load(path, 'design', build)
+
+# vim: set sw=4 tw=80 :
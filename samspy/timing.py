@@ -0,0 +1,173 @@
+#-*- coding: utf-8 -*-
+
+"""Opt-in timing of SamsPy run stages.
+Code marks stages with sections:
+
+    from samspy import timing
+    with timing.section('load'):
+        ...
+
+or decorates functions with @timing.timed('propellant').  Sections may
+nest; each name collects its call count, cumulative time (including
+nested sections) and self time (excluding them).  Nothing is recorded
+until enable() is called: a disabled section() is one flag test and a
+shared no-op context manager.
+
+table() and json() summarize the records; profile() runs a function
+under cProfile, for detail below the level of stages.
+"""
+
+import functools
+import sys
+import time
+
+class Stats:
+    """Records of one section name."""
+
+    __slots__ = ('calls', 'cumulative', 'self', 'active')
+
+    def __init__(self):
+        self.calls = 0
+        self.cumulative = 0.0
+        self.self = 0.0
+        self.active = 0         # open sections of this name (recursion)
+
+class NullSection:
+    """Section used while timing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, excval, tb):
+        return False
+
+NULLSECTION = NullSection()
+
+class Section:
+    """Timed section; see Timings.section()."""
+
+    __slots__ = ('timings', 'stats', 'start', 'child')
+
+    def __init__(self, timings, stats):
+        self.timings = timings
+        self.stats = stats
+
+    def __enter__(self):
+        self.child = 0.0
+        self.stats.active += 1
+        self.timings.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exctype, excval, tb):
+        elapsed = time.perf_counter() - self.start
+        stats = self.stats
+        timings = self.timings
+        timings.stack.pop()
+        stats.active -= 1
+        stats.calls += 1
+        stats.self += elapsed - self.child
+        if not stats.active:
+            stats.cumulative += elapsed
+        if timings.stack:
+            timings.stack[-1].child += elapsed
+        return False
+
+class Timings:
+    """Section timing records.
+    Not shared between threads: time sections of one thread only.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}         # name -> Stats, in order of first use
+        self.stack = []         # open Sections
+
+    def enable(self, enabled=True):
+        """Turn recording on (or off)."""
+        self.enabled = enabled
+
+    def reset(self):
+        """Drop all records."""
+        self.stats = {}
+        self.stack = []
+
+    def section(self, name):
+        """Context manager timing a stage called 'name'."""
+        if not self.enabled:
+            return NULLSECTION
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = Stats()
+        return Section(self, stats)
+
+    def timed(self, name):
+        """Decorator timing every call of a function as section 'name'."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.section(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def rows(self):
+        """Records as (name, calls, cumulative s, self s), in order of
+        first use."""
+        return [ (name, s.calls, s.cumulative, s.self)
+            for name, s in self.stats.items() ]
+
+    def table(self):
+        """Records as a text table."""
+        lines = [ '%-24s %10s %12s %12s' % ('section', 'calls',
+            'cumul (ms)', 'self (ms)') ]
+        for name, calls, cumulative, selftime in self.rows():
+            lines.append('%-24s %10d %12.3f %12.3f' % (name, calls,
+                cumulative * 1.0e3, selftime * 1.0e3))
+        return '\n'.join(lines) + '\n'
+
+    def json(self):
+        """Records as a JSON document: name -> calls, cumulative, self
+        (seconds)."""
+        import json as jsonlib
+        return jsonlib.dumps(dict((name, { 'calls': calls,
+            'cumulative': cumulative, 'self': selftime })
+            for name, calls, cumulative, selftime in self.rows()), indent=1)
+
+    def report(self, fmt='table', stream=None):
+        """Write records to 'stream' (default stderr) as 'table' or
+        'json'."""
+        if stream is None:
+            stream = sys.stderr
+        stream.write(self.json() + '\n' if fmt == 'json' else self.table())
+
+# the process-wide records, used through the functions below
+default = Timings()
+enable = default.enable
+reset = default.reset
+section = default.section
+timed = default.timed
+rows = default.rows
+table = default.table
+json = default.json
+report = default.report
+
+def profile(func, *args, sort='cumulative', limit=30, stream=None,
+        **kwargs):
+    """Run func(*args, **kwargs) under cProfile, writing the top 'limit'
+    functions by 'sort' to 'stream' (default stderr).  Returns what func
+    returns."""
+    import cProfile
+    import pstats
+    if stream is None:
+        stream = sys.stderr
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(sort).print_stats(limit)
+
+# vim: set sw=4 tw=80 :
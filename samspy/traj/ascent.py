@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Powered ascent of a multistage launch vehicle.
+Point-mass flight in the plane of the trajectory, about a spherical,
+non-rotating Earth: thrust, inverse-square gravity and drag in the
+standard atmosphere.
+Stages burn in 'stageorder' at the constant thrust and mass flow given
+by propel.flows(); burnout drops the spent stage.
+
+Steering is a vertical rise, a pitch kick of fixed angle over a fixed
+interval, then a gravity turn (thrust along velocity).
+
+State vector, SI units, origin at Earth center, launch site on +y:
+  [ x, y, vx, vy, mass ]
+"""
+
+import math
+import numpy as np
+
+from samspy.vehicle import multistage, propel
+from samspy.traj import atmosphere, integrate
+
+# Earth constants, SI units
+muEarth = 3.986004418e14        # m^3 s^-2
+earth_r = 6378.1e3              # m, equatorial
+
+class Ascent:
+    """Ascent simulation of one vehicle design.
+    """
+
+    # steering phases
+    VERTICAL, KICK, GRAVITYTURN = range(3)
+
+    def __init__(self, design, propeldb, cd=0.3, area=1.0,
+            kick=(10.0, 10.0, 3.0), density=atmosphere.density_at):
+        """Ascent constructor.
+        design : vehicle design (stageorder, stages, maxG or gRange)
+        propeldb : propellant data source
+        cd, area : drag coefficient and reference area (m^2)
+        kick : pitch kick (start time s, duration s, angle degrees)
+        density : function of altitude (m) giving air density (kg/m^3)
+        """
+        self.cd_area = cd * area
+        self.kick = kick
+        self.density = density
+
+        # burns: (stage name, Mignite, Mburnout, thrust, mass flow)
+        self.burns = []
+        perf = multistage.performance(design)
+        stages = design['stages']
+        gRange = propel.grange(design)
+        for stagename in design['stageorder']:
+            stageperf = perf[stagename]
+            Mpropel = stageperf['Mignite'] - stageperf['Mburnout']
+            if stageperf['Isp'] == 0 or Mpropel <= 0:
+                continue
+            pplt = propel.deduce(propeldb, stages[stagename]['mixture'],
+                Mpropel)
+            stageflows, report = propel.flows(pplt,
+                dict(stageperf, gRange=gRange))
+            self.burns.append((stagename, stageperf['Mignite'],
+                stageperf['Mburnout'], stageflows['thrust'],
+                stageflows['mflows'][-1]))
+
+        # current flight phase, used by rhs()
+        self.thrust = 0.0
+        self.mflow = 0.0
+        self.steer = self.VERTICAL
+        self.kicksin = math.sin(kick[2] * math.pi / 180.0)
+        self.kickcos = math.cos(kick[2] * math.pi / 180.0)
+
+    def rhs(self, t, state, out):
+        """Equations of motion; fills 'out' with d(state)/dt."""
+        x, y, vx, vy, m = state
+        r = math.sqrt(x*x + y*y)
+        speed = math.sqrt(vx*vx + vy*vy)
+
+        gfactor = -muEarth / (r*r*r)
+        ax = gfactor * x
+        ay = gfactor * y
+
+        if speed > 0.0:
+            drag = 0.5 * self.density(r - earth_r) * speed * \
+                self.cd_area / m
+            ax -= drag * vx
+            ay -= drag * vy
+
+        if self.thrust > 0.0:
+            accel = self.thrust / m
+            if self.steer == self.GRAVITYTURN and speed > 0.0:
+                ux = vx / speed
+                uy = vy / speed
+            elif self.steer == self.KICK:
+                # radial unit vector turned downrange (+x) by kick angle
+                ux = (self.kickcos * x + self.kicksin * y) / r
+                uy = (self.kickcos * y - self.kicksin * x) / r
+            else:
+                ux = x / r
+                uy = y / r
+            ax += accel * ux
+            ay += accel * uy
+
+        out[0] = vx
+        out[1] = vy
+        out[2] = ax
+        out[3] = ay
+        out[4] = -self.mflow if self.thrust > 0.0 else 0.0
+
+    @staticmethod
+    def altitude(t, state):
+        "Altitude above the surface; the impact event function."
+        return math.sqrt(state[0]*state[0] + state[1]*state[1]) - earth_r
+
+    def schedule(self, coast):
+        """Flight events in time order: (time, action, argument).
+        Actions are 'steer', 'burnout' (argument: next burn index) and
+        'end'."""
+        events = [ (self.kick[0], 'steer', self.KICK),
+            (self.kick[0] + self.kick[1], 'steer', self.GRAVITYTURN) ]
+        tburn = 0.0
+        for nx, (name, Mignite, Mburnout, thrust, mflow) in \
+                enumerate(self.burns):
+            tburn += (Mignite - Mburnout) / mflow
+            events.append((tburn, 'burnout', nx + 1))
+        events.append((tburn + coast, 'end', None))
+        events.sort(key=lambda ev: ev[0])
+        return events
+
+    def ignite(self, nx, state):
+        """Stage to burn 'nx': set thrust and mass flow, and drop the
+        spent stage mass from 'state'."""
+        name, Mignite, Mburnout, thrust, mflow = self.burns[nx]
+        state[4] = Mignite
+        self.thrust = thrust
+        self.mflow = mflow
+
+    def fly(self, coast=0.0, rtol=1.0e-8, atol=1.0e-6):
+        """Fly the ascent, from liftoff to 'coast' seconds after final
+        burnout, or to impact.
+        Returns:
+          AscentResult
+        """
+        state = np.array([0.0, earth_r, 0.0, 0.0, 0.0])
+        self.steer = self.VERTICAL
+        self.ignite(0, state)
+        store = integrate.Trajectory(len(state))
+        events = [ (0.0, 'liftoff') ]
+        t = 0.0
+        for tevent, action, arg in self.schedule(coast):
+            if tevent > t:
+                t, state, hit = integrate.dopri5(self.rhs, t, state, tevent,
+                    store, rtol=rtol, atol=atol, event=self.altitude)
+                if hit:
+                    events.append((t, 'impact'))
+                    break
+            if action == 'steer':
+                self.steer = arg
+            elif action == 'burnout':
+                events.append((t, 'burnout ' + self.burns[arg - 1][0]))
+                if arg < len(self.burns):
+                    self.ignite(arg, state)
+                else:
+                    self.thrust = 0.0
+                    self.mflow = 0.0
+            else:
+                events.append((t, 'end'))
+        return AscentResult(store, events)
+
+class AscentResult:
+    """Time history of an ascent, with dense output.
+    """
+
+    def __init__(self, store, events):
+        """AscentResult constructor.
+        store : integrate.Trajectory of the flight
+        events : list of (time, name)
+        """
+        self.store = store
+        self.events = events
+
+    @property
+    def t(self):
+        "Times of integration steps."
+        return self.store.t
+
+    @property
+    def state(self):
+        "States at integration steps, one row per step."
+        return self.store.y
+
+    def sample(self, times):
+        """States at arbitrary times (dense output)."""
+        return self.store.sample(times)
+
+    @staticmethod
+    def altitude(states):
+        "Altitudes (m) of rows of states."
+        return np.hypot(states[..., 0], states[..., 1]) - earth_r
+
+    @staticmethod
+    def speed(states):
+        "Inertial speeds (m/s) of rows of states."
+        return np.hypot(states[..., 2], states[..., 3])
+
+    @staticmethod
+    def flightpath(states):
+        "Flight path angles (radians above local horizontal)."
+        radial = (states[..., 0]*states[..., 2] +
+            states[..., 1]*states[..., 3]) / np.hypot(states[..., 0],
+            states[..., 1])
+        return np.arcsin(radial / np.hypot(states[..., 2], states[..., 3]))
+
+    def final(self):
+        "State at the end of the flight."
+        return self.store.y[-1]
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""U.S. Standard Atmosphere 1976, lower layers, by table lookup.
+Temperature, pressure and density against geometric altitude (m).
+
+The layered model is evaluated once, at import, on a 4 m grid of
+geopotential altitude from -1 km to 120 km, whose nodes include every
+layer boundary.  Queries convert geometric to geopotential altitude and
+interpolate linearly: temperature directly, pressure and density in
+their logarithms.  Against the analytic model (analytic()), relative
+errors are at rounding level (1e-15) for temperature, which is linear
+in geopotential altitude within each layer, and below 1e-8 for pressure
+and density.
+
+Above 84.852 km geopotential (86 km geometric) the 1976 model changes
+form; there the table continues the isothermal top layer, which is an
+extrapolation.  Queries outside the table are clamped to its ends.
+"""
+
+import math
+import numpy as np
+
+# model constants
+g0 = 9.80665                    # m/s^2
+Rstar = 8.31432                 # J/(mol K), as in the 1976 standard
+M0 = 0.0289644                  # kg/mol, mean molar mass of air
+r0 = 6356766.0                  # m, Earth radius for geopotential
+GMR = g0 * M0 / Rstar           # K/m, hydrostatic constant
+
+# layers: base geopotential altitude (m), lapse rate (K/m)
+LAYERS = (
+    (0.0, -0.0065),
+    (11000.0, 0.0),
+    (20000.0, 0.0010),
+    (32000.0, 0.0028),
+    (47000.0, 0.0),
+    (51000.0, -0.0028),
+    (71000.0, -0.0020),
+    (84852.0, 0.0),
+)
+T0 = 288.15                     # K, sea level temperature
+P0 = 101325.0                   # Pa, sea level pressure
+
+# table grid of geopotential altitude
+HMIN = -1000.0
+HMAX = 120000.0
+HSTEP = 4.0
+
+def geopotential(z):
+    """Geopotential altitude (m) of geometric altitude z (m)."""
+    return r0 * z / (r0 + z)
+
+def layerbases():
+    """Temperature and pressure at the base of each layer."""
+    bases = []
+    Tb = T0
+    Pb = P0
+    for nx, (Hb, lapse) in enumerate(LAYERS):
+        bases.append((Tb, Pb))
+        if nx + 1 < len(LAYERS):
+            dH = LAYERS[nx + 1][0] - Hb
+            Tb, Pb = layerstate(Tb, Pb, lapse, dH)
+    return bases
+
+def layerstate(Tb, Pb, lapse, dH):
+    """Temperature and pressure dH above a layer base."""
+    if lapse == 0.0:
+        return Tb, Pb * np.exp(-GMR * dH / Tb)
+    T = Tb + lapse * dH
+    return T, Pb * (Tb / T) ** (GMR / lapse)
+
+BASES = layerbases()
+
+def analytic(z):
+    """Analytic model at geometric altitudes z (m; scalar or array).
+    Returns:
+      temperature (K), pressure (Pa), density (kg/m^3)
+    """
+    H = geopotential(np.asarray(z, dtype=float))
+    nx = np.searchsorted([ Hb for Hb, lapse in LAYERS[1:] ], H,
+        side='right')
+    Hb = np.array([ Hb for Hb, lapse in LAYERS ])[nx]
+    lapse = np.array([ lapse for Hb, lapse in LAYERS ])[nx]
+    Tb = np.array([ Tb for Tb, Pb in BASES ])[nx]
+    Pb = np.array([ Pb for Tb, Pb in BASES ])[nx]
+    dH = H - Hb
+    T = Tb + lapse * dH
+    isothermal = lapse == 0.0
+    safelapse = np.where(isothermal, 1.0, lapse)
+    P = np.where(isothermal, Pb * np.exp(-GMR * dH / Tb),
+        Pb * (Tb / T) ** (GMR / safelapse))
+    return T, P, P * M0 / (Rstar * T)
+
+# lookup tables, built at import
+TABLE_H = np.arange(HMIN, HMAX + HSTEP/2, HSTEP)
+TABLE_T, TABLE_P, TABLE_RHO = analytic(TABLE_H * r0 / (r0 - TABLE_H))
+TABLE_LNP = np.log(TABLE_P)
+TABLE_LNRHO = np.log(TABLE_RHO)
+# plain lists for the scalar path
+_lnrho = TABLE_LNRHO.tolist()
+_last = len(_lnrho) - 2
+
+def lookup(z, table):
+    "Interpolate 'table' at geometric altitudes z."
+    return np.interp(geopotential(np.asarray(z, dtype=float)), TABLE_H,
+        table)
+
+def temperature(z):
+    """Temperature (K) at geometric altitudes z (m)."""
+    return lookup(z, TABLE_T)
+
+def pressure(z):
+    """Pressure (Pa) at geometric altitudes z (m)."""
+    return np.exp(lookup(z, TABLE_LNP))
+
+def density(z):
+    """Density (kg/m^3) at geometric altitudes z (m)."""
+    return np.exp(lookup(z, TABLE_LNRHO))
+
+def properties(z):
+    """Temperature (K), pressure (Pa) and density (kg/m^3) at
+    geometric altitudes z (m)."""
+    H = geopotential(np.asarray(z, dtype=float))
+    return (np.interp(H, TABLE_H, TABLE_T),
+        np.exp(np.interp(H, TABLE_H, TABLE_LNP)),
+        np.exp(np.interp(H, TABLE_H, TABLE_LNRHO)))
+
+def density_at(z):
+    """Density (kg/m^3) at one geometric altitude z (m).
+    Scalar fast path for integrators; same table as density()."""
+    H = r0 * z / (r0 + z)
+    pos = (H - HMIN) / HSTEP
+    if pos <= 0.0:
+        return math.exp(_lnrho[0])
+    nx = int(pos)
+    if nx > _last:
+        return math.exp(_lnrho[-1])
+    frac = pos - nx
+    return math.exp(_lnrho[nx] + frac * (_lnrho[nx+1] - _lnrho[nx]))
+
+# vim: set sw=4 tw=80 :
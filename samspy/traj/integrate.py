@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Adaptive Runge-Kutta integration of ordinary differential equations.
+* Dormand-Prince 5(4) stepping with error control.
+* Terminal event detection, located on the dense output.
+* Step history kept in preallocated, growable arrays, with cubic
+  Hermite dense output between steps.
+
+The right hand side is written as rhs(t, y, out), filling 'out' with
+dy/dt in place, so the stepping loop works on preallocated arrays only.
+"""
+
+import math
+import numpy as np
+
+# Dormand-Prince 5(4) tableau
+DP_C = ( 0.0, 1.0/5, 3.0/10, 4.0/5, 8.0/9, 1.0, 1.0 )
+DP_A = (
+    (),
+    (1.0/5,),
+    (3.0/40, 9.0/40),
+    (44.0/45, -56.0/15, 32.0/9),
+    (19372.0/6561, -25360.0/2187, 64448.0/6561, -212.0/729),
+    (9017.0/3168, -355.0/33, 46732.0/5247, 49.0/176, -5103.0/18656),
+    (35.0/384, 0.0, 500.0/1113, 125.0/192, -2187.0/6784, 11.0/84),
+)
+# error estimate: 5th minus 4th order weights
+DP_E = ( 71.0/57600, 0.0, -71.0/16695, 71.0/1920, -17253.0/339200,
+    22.0/525, -1.0/40 )
+
+class Trajectory:
+    """History of integration steps (t, y, dy/dt) in preallocated arrays,
+    doubled in size when full.  A discontinuity (e.g. staging) is kept
+    as two entries with the same time.
+    """
+
+    def __init__(self, ndim, capacity=256):
+        """Trajectory constructor.
+        ndim : length of the state vector
+        """
+        self.count = 0
+        self._t = np.empty(capacity)
+        self._y = np.empty((capacity, ndim))
+        self._f = np.empty((capacity, ndim))
+
+    def append(self, t, y, f):
+        """Record one point of the solution."""
+        n = self.count
+        if n == len(self._t):
+            self._t = np.concatenate((self._t, np.empty(n)))
+            self._y = np.concatenate((self._y, np.empty_like(self._y)))
+            self._f = np.concatenate((self._f, np.empty_like(self._f)))
+        self._t[n] = t
+        self._y[n] = y
+        self._f[n] = f
+        self.count = n + 1
+
+    @property
+    def t(self):
+        "Times of recorded points."
+        return self._t[:self.count]
+
+    @property
+    def y(self):
+        "States of recorded points, one row per point."
+        return self._y[:self.count]
+
+    @property
+    def f(self):
+        "Derivatives of recorded points, one row per point."
+        return self._f[:self.count]
+
+    def sample(self, times):
+        """Dense output: states at arbitrary 'times' (an array) within the
+        recorded span, by cubic Hermite interpolation between points.
+        At a discontinuity, the state after it is returned.
+        """
+        tt = self.t
+        times = np.asarray(times, dtype=float)
+        idx = np.searchsorted(tt, times, side='right') - 1
+        idx = np.clip(idx, 0, self.count - 2)
+        return hermite(tt[idx], self._y[idx], self._f[idx],
+            tt[idx+1], self._y[idx+1], self._f[idx+1], times)
+
+def hermite(t0, y0, f0, t1, y1, f1, t):
+    """Cubic Hermite interpolation at 't' between (t0, y0, f0) and
+    (t1, y1, f1); times may be arrays with one row of y per time."""
+    h = np.asarray(t1 - t0, dtype=float)
+    s = np.asarray((t - t0) / h)[..., None]
+    h = h[..., None]
+    s2 = s * s
+    s3 = s2 * s
+    return (2*s3 - 3*s2 + 1) * y0 + (s3 - 2*s2 + s) * h * f0 + \
+        (-2*s3 + 3*s2) * y1 + (s3 - s2) * h * f1
+
+def dopri5(rhs, t0, y0, t1, store=None, rtol=1.0e-8, atol=1.0e-8, h=None,
+        event=None, maxsteps=100000):
+    """Integrate y' = rhs(t, y, out) from t0 to t1 by Dormand-Prince 5(4).
+      y0 - initial state (array)
+      store - Trajectory recording each accepted step, or None
+      rtol, atol - relative and absolute error tolerances
+      h - initial step size; guessed when None
+      event - optional function event(t, y); integration stops where it
+        falls from positive to zero or below (located to ~1e-12 relative)
+    Returns:
+      t, y, hit -- end time and state, and whether the event stopped it
+    """
+    ndim = len(y0)
+    k = np.empty((7, ndim))
+    y = np.array(y0, dtype=float)
+    ytmp = np.empty(ndim)
+    ynew = np.empty(ndim)
+    tmp = np.empty(ndim)
+    scale = np.empty(ndim)
+    arows = [ np.array(row) for row in DP_A ]
+    erow = np.array(DP_E)
+
+    t = t0
+    span = t1 - t0
+    rhs(t, y, k[0])
+    if store is not None:
+        store.append(t, y, k[0])
+    gval = event(t, y) if event is not None else None
+    if h is None:
+        h = span / 100.0
+    h = min(h, span)
+
+    for n in range(maxsteps):
+        if t >= t1:
+            break
+        last = t + h >= t1
+        if last:
+            h = t1 - t
+        for i in range(1, 7):
+            np.dot(arows[i], k[:i], out=tmp)
+            tmp *= h
+            np.add(y, tmp, out=ytmp)
+            rhs(t + DP_C[i]*h, ytmp, k[i])
+        # stage 7 was evaluated at the 5th order solution (FSAL)
+        ynew[:] = ytmp
+        np.dot(erow, k, out=tmp)
+        tmp *= h
+        np.maximum(np.fabs(y), np.fabs(ynew), out=scale)
+        scale *= rtol
+        scale += atol
+        tmp /= scale
+        err = math.sqrt(np.dot(tmp, tmp) / ndim)
+
+        if err > 1.0:
+            h *= max(0.2, 0.9 * err ** -0.2)
+            continue
+
+        tnew = t1 if last else t + h
+        if event is not None:
+            gnew = event(tnew, ynew)
+            if gval > 0.0 and gnew <= 0.0:
+                tev, yev = locate(event, t, y, k[0], tnew, ynew, k[6])
+                rhs(tev, yev, tmp)
+                if store is not None:
+                    store.append(tev, yev, tmp)
+                return tev, yev, True
+            gval = gnew
+        t = tnew
+        y[:] = ynew
+        k[0] = k[6]
+        if store is not None:
+            store.append(t, y, k[0])
+        h *= min(5.0, 0.9 * max(err, 1.0e-10) ** -0.2)
+    else:
+        raise RuntimeError("dopri5: too many steps")
+    return t, y, False
+
+def locate(event, t0, y0, f0, t1, y1, f1, rtol=1.0e-12):
+    """Locate the event crossing within one step by bisection on the
+    Hermite interpolant.  Returns the time and state of the crossing."""
+    lo = t0
+    hi = t1
+    yhi = y1
+    while hi - lo > rtol * max(abs(hi), 1.0):
+        mid = 0.5 * (lo + hi)
+        ymid = hermite(t0, y0, f0, t1, y1, f1, mid)
+        if event(mid, ymid) > 0.0:
+            lo = mid
+        else:
+            hi = mid
+            yhi = ymid
+    return hi, np.array(yhi)
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Kepler propagation of elliptical orbits over arrays.
+* Solve Kepler's equation (mean to eccentric anomaly) for whole arrays,
+  by Halley iteration with a fixed iteration budget.
+* Position and velocity in the perifocal frame at arbitrary times.
+
+The perifocal frame has x toward periapsis and y along the direction of
+motion at periapsis; times are measured from periapsis passage.
+"""
+
+import math
+import numpy as np
+
+from samspy.traj.orbit import Elliptical, OrbitArray
+
+def solve_kepler(M, ecc, tol=1.0e-14, maxiter=8):
+    """Solve Kepler's equation E - ecc*sin(E) = M for E.
+    M and ecc are arrays (or scalars) broadcast against each other.
+    Starts from Danby's guess; after two Halley steps on every entry,
+    steps go only to the entries not yet converged to 'tol', for at most
+    'maxiter' steps in all.  Elliptical eccentricities converge in 3 to 5.
+    Returns:
+      eccentric anomalies, shaped like the broadcast inputs
+    """
+    M, ecc = np.broadcast_arrays(np.asarray(M, dtype=float),
+        np.asarray(ecc, dtype=float))
+    # reduce to [-pi, pi), keeping whole turns to add back
+    turns = np.floor((M + math.pi) / (2.0 * math.pi))
+    Mr = (M - turns * 2.0 * math.pi).ravel()
+    e = ecc.ravel()
+    E = Mr + 0.85 * e * np.sign(np.sin(Mr))
+
+    # the first steps converge nearly everything: run them unmasked
+    active = None
+    for n in range(maxiter):
+        if active is None:
+            Ea, ea, Ma = E, e, Mr
+        else:
+            Ea, ea, Ma = E[active], e[active], Mr[active]
+        esin = ea * np.sin(Ea)
+        ecos = ea * np.cos(Ea)
+        f0 = Ea - esin - Ma
+        f1 = 1.0 - ecos
+        delta = f0 / (f1 - 0.5 * f0 * esin / f1)
+        if active is None:
+            E -= delta
+            if n >= 1:
+                active = np.flatnonzero(np.fabs(delta) > tol)
+        else:
+            E[active] = Ea - delta
+            active = active[np.fabs(delta) > tol]
+        if active is not None and not active.size:
+            break
+    return E.reshape(M.shape) + turns * 2.0 * math.pi
+
+def elements(orbits):
+    """Semimajor axes, eccentricities and mu of an Elliptical, a
+    sequence of Elliptical, or an OrbitArray, as arrays."""
+    if isinstance(orbits, Elliptical):
+        return (np.float64(orbits.semimaj), np.float64(orbits.eccentricity),
+            np.float64(orbits.mu))
+    if not isinstance(orbits, OrbitArray):
+        orbits = OrbitArray.from_ellipticals(orbits)
+    if orbits.semimaj is None or orbits.eccentricity is None:
+        orbits.fill_params()
+    return (np.asarray(orbits.semimaj), np.asarray(orbits.eccentricity),
+        np.asarray(orbits.mu, dtype=float))
+
+def propagate(orbits, times, tperi=0.0, shared=True):
+    """Position and velocity on orbits at given times.
+      orbits - Elliptical, sequence of Elliptical, or OrbitArray
+      times - times since 'tperi', the time of periapsis passage
+        (may be per orbit, like the orbits' parameters)
+      shared - True: all N orbits share 'times', of shape T, and results
+        have shape (N,) + T; False: the first axis of 'times' runs over
+        the orbits, and results have the shape of 'times'
+    A single Elliptical gives results shaped like 'times'.
+    Returns:
+      positions, velocities -- arrays with a last axis of perifocal
+      (x, y) components, in the orbits' length and time units
+    """
+    a, ecc, mu = elements(orbits)
+    times = np.asarray(times, dtype=float)
+    tperi = np.asarray(tperi, dtype=float)
+    if a.ndim:
+        ndim = times.ndim if shared else times.ndim - 1
+        shape = a.shape + (1,) * ndim
+        a = a.reshape(shape)
+        ecc = ecc.reshape(shape)
+        if mu.ndim:
+            mu = mu.reshape(shape)
+        if tperi.ndim:
+            tperi = tperi.reshape(shape)
+
+    meanmotion = np.sqrt(mu / (a * a * a))
+    E = solve_kepler(meanmotion * (times - tperi), ecc)
+    cosE = np.cos(E)
+    sinE = np.sin(E)
+    root = np.sqrt(1.0 - ecc * ecc)
+    r = a * (1.0 - ecc * cosE)
+    vfactor = np.sqrt(mu * a) / r
+
+    pos = np.stack((a * (cosE - ecc), a * root * sinE), axis=-1)
+    vel = np.stack((-vfactor * sinE, vfactor * root * cosE), axis=-1)
+    return pos, vel
+
+# vim: set sw=4 tw=80 :
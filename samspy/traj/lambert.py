@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Lambert's problem and porkchop plots.
+* Solve for the transfer orbit between two position vectors in a given
+  time of flight, for whole arrays of problems at once (universal
+  variables, as in Curtis, "Orbital Mechanics for Engineering Students",
+  algorithm 5.2, with vectorized bisection in place of Newton steps).
+* Tabulate departure and arrival deltaV over a grid of departure times
+  and times of flight between two coplanar orbits: the data behind a
+  porkchop plot.  Large grids are split over a process pool.
+
+Single-revolution transfers only.  Transfers through (nearly) 0 or 180
+degrees are singular (the transfer plane is undefined): where
+1 - |cos(transfer angle)| < SINGULAR, the velocities are NaN.
+"""
+
+import math
+import multiprocessing
+import os
+import numpy as np
+
+from samspy.traj import kepler
+from samspy.traj.orbit import Elliptical
+
+# 1 - |cos(transfer angle)| below which a transfer is taken as singular
+SINGULAR = 1.0e-10
+
+def stumpff(z):
+    """Stumpff functions C(z), S(z) for an array z."""
+    z = np.asarray(z, dtype=float)
+    pos = z > 1.0e-3
+    neg = z < -1.0e-3
+    small = ~(pos | neg)
+    safe = np.where(small, 1.0, np.fabs(z))
+    root = np.sqrt(safe)
+    C = np.where(pos, (1.0 - np.cos(root)) / safe,
+        np.where(neg, (np.cosh(root) - 1.0) / safe,
+            0.5 - z/24.0 + z*z/720.0))
+    S = np.where(pos, (root - np.sin(root)) / (safe * root),
+        np.where(neg, (np.sinh(root) - root) / (safe * root),
+            1.0/6.0 - z/120.0 + z*z/5040.0))
+    return C, S
+
+def lambert(r1, r2, tof, mu, prograde=True, iters=64):
+    """Solve Lambert's problem for arrays of position pairs.
+      r1, r2 - positions, arrays with last axis of 2 (planar) or 3
+        components, broadcast against each other
+      tof - times of flight, broadcast against r1[..., 0]
+      mu - gravitational parameter
+      prograde - transfer direction (counterclockwise about +z)
+      iters - bisection steps on the universal variable z
+    Returns:
+      v1, v2 -- velocities at r1 (departure) and r2 (arrival)
+    """
+    r1 = np.asarray(r1, dtype=float)
+    r2 = np.asarray(r2, dtype=float)
+    planar = r1.shape[-1] == 2
+    if planar:
+        zeros = np.zeros(r1.shape[:-1] + (1,))
+        r1 = np.concatenate((r1, zeros), axis=-1)
+        r2 = np.concatenate((r2, np.zeros(r2.shape[:-1] + (1,))), axis=-1)
+    r1, r2 = np.broadcast_arrays(r1, r2)
+    tof = np.asarray(tof, dtype=float)
+
+    r1n = np.sqrt((r1 * r1).sum(axis=-1))
+    r2n = np.sqrt((r2 * r2).sum(axis=-1))
+    crossz = r1[..., 0]*r2[..., 1] - r1[..., 1]*r2[..., 0]
+    cosdt = np.clip((r1 * r2).sum(axis=-1) / (r1n * r2n), -1.0, 1.0)
+    dtheta = np.arccos(cosdt)
+    if prograde:
+        dtheta = np.where(crossz >= 0.0, dtheta, 2.0*math.pi - dtheta)
+    else:
+        dtheta = np.where(crossz < 0.0, dtheta, 2.0*math.pi - dtheta)
+    singular = 1.0 - np.fabs(cosdt) < SINGULAR
+    A = np.sin(dtheta) * np.sqrt(r1n * r2n /
+        np.where(singular, 1.0, 1.0 - cosdt))
+    A = np.where(singular, 1.0, A)      # placeholder, masked below
+    r1n, r2n, A, tof = np.broadcast_arrays(r1n, r2n, A, tof)
+    sqrtmu_t = math.sqrt(mu) * tof
+
+    def yfunc(z):
+        C, S = stumpff(z)
+        return r1n + r2n + A * (z*S - 1.0) / np.sqrt(C), C, S
+
+    # time of flight rises with z, up to the pole at 4 pi^2
+    lo = np.full(A.shape, -4.0e3)
+    hi = np.full(A.shape, 4.0 * math.pi * math.pi)
+    for n in range(iters):
+        z = 0.5 * (lo + hi)
+        y, C, S = yfunc(z)
+        ypos = np.where(y > 0.0, y, 0.0)
+        early = (y <= 0.0) | \
+            ((ypos / C)**1.5 * S + A * np.sqrt(ypos) < sqrtmu_t)
+        lo = np.where(early, z, lo)
+        hi = np.where(early, hi, z)
+
+    y, C, S = yfunc(0.5 * (lo + hi))
+    f = (1.0 - y / r1n)[..., None]
+    g = (A * np.sqrt(y / mu))[..., None]
+    gdot = (1.0 - y / r2n)[..., None]
+    v1 = (r2 - f * r1) / g
+    v2 = (gdot * r2 - r1) / g
+    if singular.any():
+        singular = np.broadcast_to(singular, A.shape)[..., None]
+        v1 = np.where(singular, np.nan, v1)
+        v2 = np.where(singular, np.nan, v2)
+    if planar:
+        v1 = v1[..., :2]
+        v2 = v2[..., :2]
+    return v1, v2
+
+def bodystates(params, times):
+    """Positions and velocities of a body at 'times'.
+    params : (apoapsis, periapsis, mu, mean anomaly at time 0,
+        argument of periapsis in radians)
+    """
+    apo, peri, mu, M0, argp = params
+    orbit = Elliptical(apo=apo, peri=peri, mu=mu)
+    tperi = -M0 / math.sqrt(mu / orbit.semimaj**3)
+    pos, vel = kepler.propagate(orbit, times, tperi=tperi)
+    rot = np.array([[math.cos(argp), -math.sin(argp)],
+        [math.sin(argp), math.cos(argp)]])
+    return pos @ rot.T, vel @ rot.T
+
+def porkchop_rows(args):
+    """Porkchop deltaVs for a block of departure times."""
+    depart, arrive, departures, tofs = args
+    mu = depart[2]
+    r1, vbody1 = bodystates(depart, departures)
+    r2, vbody2 = bodystates(arrive, departures[:, None] + tofs[None, :])
+    v1, v2 = lambert(r1[:, None, :], r2, tofs[None, :], mu)
+    dv1 = np.sqrt(((v1 - vbody1[:, None, :])**2).sum(axis=-1))
+    dv2 = np.sqrt(((vbody2 - v2)**2).sum(axis=-1))
+    return dv1, dv2
+
+def porkchop(orbit1, orbit2, departures, tofs, M1=0.0, M2=0.0,
+        argp1=0.0, argp2=0.0, processes=None, rows=64):
+    """DeltaV of transfers between coplanar orbits over a grid of
+    departure times and times of flight.
+      orbit1, orbit2 - departure and arrival Elliptical orbits (with
+        apoapsis, periapsis and mu)
+      departures - array of departure times
+      tofs - array of times of flight
+      M1, M2 - mean anomalies of the two bodies at time 0
+      argp1, argp2 - arguments of periapsis (radians)
+      processes - pool size; None for one per CPU, 1 to run in-process
+      rows - departure times per pool task
+    Returns:
+      dict of (departures x tofs) arrays: 'dv1' departure burn,
+      'dv2' arrival burn, and 'total'
+    """
+    departures = np.asarray(departures, dtype=float)
+    tofs = np.asarray(tofs, dtype=float)
+    params = []
+    for orbit, M0, argp in ((orbit1, M1, argp1), (orbit2, M2, argp2)):
+        params.append((orbit.apoapsis, orbit.periapsis, orbit.mu, M0, argp))
+    tasks = [ (params[0], params[1], departures[n:n+rows], tofs)
+        for n in range(0, len(departures), rows) ]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(tasks) == 1:
+        blocks = [ porkchop_rows(task) for task in tasks ]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            blocks = pool.map(porkchop_rows, tasks)
+
+    dv1 = np.concatenate([ b[0] for b in blocks ])
+    dv2 = np.concatenate([ b[1] for b in blocks ])
+    return { 'dv1': dv1, 'dv2': dv2, 'total': dv1 + dv2 }
+
+# vim: set sw=4 tw=80 :
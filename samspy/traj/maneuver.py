@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Orbit transfer maneuvers over arrays of parameters.
+* Delta V budget of a super-synchronous transfer: circular low orbit,
+  to super-synchronous transfer orbit (STO), to intermediate transfer
+  orbit (ITO) with plane change at apogee, to circular high orbit.
+* Best split of that plane change between the perigee (low orbit to
+  STO) and apogee (STO to ITO) burns, by safeguarded Newton steps.
+* Bounded, vectorized 1-D minimization by golden section search, and
+  by a coarse scan refined by golden section for functions that may
+  have more than one minimum.
+
+Arguments are NumPy arrays (or scalars) broadcast against each other,
+so whole grids of apogees and inclinations are evaluated in one call.
+"""
+
+import math
+import numpy as np
+
+from samspy.traj.orbit import OrbitArray
+
+# golden section ratio, 1/phi
+INVPHI = (math.sqrt(5.0) - 1.0) / 2.0
+
+def sto_budget(mu, low_r, sto_apo_r, high_r, incline_rad):
+    """Delta V budget of low orbit -> STO -> ITO -> high orbit.
+      mu - gravitational parameter
+      low_r, high_r - radii of initial and final circular orbits
+      sto_apo_r - apogee radius of STO and ITO
+      incline_rad - plane change (radians), made at apogee
+    Returns:
+      dict of deltaV arrays 'leo_sto', 'sto_ito', 'ito_geo', 'total'
+    """
+    low_r, sto_apo_r, high_r, incline_rad = np.broadcast_arrays(
+        *[ np.asarray(v, dtype=float)
+            for v in (low_r, sto_apo_r, high_r, incline_rad) ])
+
+    low = OrbitArray(mu=mu).set_circular(low_r)
+    sto = OrbitArray(mu=mu, peri=low_r, apo=sto_apo_r)
+    ito = OrbitArray(mu=mu, peri=high_r, apo=sto_apo_r)
+    high = OrbitArray(mu=mu).set_circular(high_r)
+    for orbits in (low, sto, ito, high):
+        orbits.derive_semimaj()
+
+    deltav = {}
+    deltav['leo_sto'] = np.fabs(sto.velo(low_r) - low.velo(low_r))
+    deltav['sto_ito'] = ito.planechange(sto, incline_rad)
+    deltav['ito_geo'] = np.fabs(high.velo(high_r) - ito.velo(high_r))
+    deltav['total'] = deltav['leo_sto'] + deltav['sto_ito'] + \
+        deltav['ito_geo']
+    return deltav
+
+def burn(v0, v1, angle):
+    """DeltaV of a burn from speed v0 to v1 turning through 'angle'
+    (radians), by the law of cosines."""
+    return np.sqrt(v0*v0 + v1*v1 - 2.0*v0*v1*np.cos(angle))
+
+def burnterms(v0, v1, angle):
+    """burn(v0, v1, angle) and its first and second derivatives with
+    respect to the angle.
+    Returns:
+      deltaV, slope, curvature
+    """
+    k = v0 * v1
+    cos = np.cos(angle)
+    dv = np.sqrt(v0*v0 + v1*v1 - 2.0*k*cos)
+    slope = k * np.sin(angle) / dv
+    return dv, slope, (k * cos - slope * slope) / dv
+
+def planesplit(mu, low_r, sto_apo_r, high_r, incline_rad, iters=64,
+        tol=1.0e-12):
+    """Split the plane change of sto_budget() between the perigee burn
+    (low orbit to STO) and the apogee burn (STO to ITO) so that total
+    deltaV is least.  Arguments are as for sto_budget().
+    The total is smooth and convex in the perigee angle, so its zero
+    slope is found by Newton steps, kept inside a shrinking bracket
+    (bisecting when a step would leave it).  Each orbit drops out once
+    its step is under 'tol' radians; at most 'iters' steps are made.
+    Returns:
+      dict of arrays: 'perigee' and 'apogee' plane change angles
+      (radians), deltaVs 'leo_sto', 'sto_ito', 'ito_geo', 'total', and
+      'saved', the deltaV saved against all plane change at apogee.
+    """
+    low_r, sto_apo_r, high_r, incline_rad = np.broadcast_arrays(
+        *[ np.asarray(v, dtype=float)
+            for v in (low_r, sto_apo_r, high_r, incline_rad) ])
+
+    low = OrbitArray(mu=mu).set_circular(low_r)
+    sto = OrbitArray(mu=mu, peri=low_r, apo=sto_apo_r)
+    ito = OrbitArray(mu=mu, peri=high_r, apo=sto_apo_r)
+    high = OrbitArray(mu=mu).set_circular(high_r)
+    for orbits in (low, sto, ito, high):
+        orbits.derive_semimaj()
+
+    low_v = low.velo(low_r)
+    sto_per_v = sto.velo(low_r)
+    sto_apo_v = sto.velo(sto_apo_r)
+    ito_apo_v = ito.velo(sto_apo_r)
+    ito_geo = np.fabs(high.velo(high_r) - ito.velo(high_r))
+
+    def total(perigee):
+        return burn(low_v, sto_per_v, perigee) + \
+            burn(sto_apo_v, ito_apo_v, incline_rad - perigee)
+
+    # Newton on the slope, over the orbits not yet converged; start
+    # from the split that zeroes the small angle slopes
+    shape = incline_rad.shape
+    v0, v1, w0, w1, incl = [ np.ravel(v) for v in
+        (low_v, sto_per_v, sto_apo_v, ito_apo_v, incline_rad) ]
+    lo = np.zeros_like(incl)
+    hi = incl.copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k1 = v0 * v1 / np.fabs(v1 - v0)
+        k2 = w0 * w1 / burn(w0, w1, incl)
+        perigee = incl * k2 / (k1 + k2)
+        todo = np.flatnonzero(incl > 0.0)
+        for n in range(iters):
+            if not todo.size:
+                break
+            x = perigee[todo]
+            a0, a1, b0, b1, angle = (v0[todo], v1[todo], w0[todo], w1[todo],
+                incl[todo])
+            dv1, slope1, curve1 = burnterms(a0, a1, x)
+            dv2, slope2, curve2 = burnterms(b0, b1, angle - x)
+            slope = slope1 - slope2
+            xlo = np.where(slope > 0.0, lo[todo], x)
+            xhi = np.where(slope > 0.0, x, hi[todo])
+            lo[todo] = xlo
+            hi[todo] = xhi
+            xnew = x - slope / (curve1 + curve2)
+            outside = ~((xnew >= xlo) & (xnew <= xhi))
+            xnew = np.where(outside, 0.5 * (xlo + xhi), xnew)
+            perigee[todo] = xnew
+            todo = todo[np.fabs(xnew - x) > tol]
+    perigee = perigee.reshape(shape)
+
+    burns = total(perigee)
+    split = {}
+    split['perigee'] = perigee
+    split['apogee'] = incline_rad - perigee
+    split['leo_sto'] = burn(low_v, sto_per_v, perigee)
+    split['sto_ito'] = burn(sto_apo_v, ito_apo_v, split['apogee'])
+    split['ito_geo'] = ito_geo
+    split['total'] = burns + ito_geo
+    split['saved'] = total(0.0) - burns
+    return split
+
+def golden(func, lo, hi, iters=64):
+    """Minimize 'func' over [lo, hi] by golden section search.
+    'func' maps an array of abscissas to an array of values, so many
+    independent 1-D problems (arrays lo, hi) are solved at once, with a
+    fixed budget of 'iters' evaluations; the bracket shrinks by 0.618
+    per iteration.  A unimodal function is assumed; see scanmin()
+    for others.
+    Returns:
+      xmin, func(xmin)
+    """
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype=float),
+        np.asarray(hi, dtype=float))
+    lo = lo.copy()
+    hi = hi.copy()
+    x1 = hi - INVPHI * (hi - lo)
+    x2 = lo + INVPHI * (hi - lo)
+    f1 = func(x1)
+    f2 = func(x2)
+    for n in range(iters):
+        left = f1 < f2          # minimum lies in [lo, x2]
+        hi = np.where(left, x2, hi)
+        lo = np.where(left, lo, x1)
+        xnew = np.where(left, hi - INVPHI * (hi - lo),
+            lo + INVPHI * (hi - lo))
+        fnew = func(xnew)
+        x2, f2, x1, f1 = (np.where(left, x1, xnew), np.where(left, f1, fnew),
+            np.where(left, xnew, x2), np.where(left, fnew, f2))
+    best = f1 < f2
+    return np.where(best, x1, x2), np.where(best, f1, f2)
+
+def scanmin(func, lo, hi, points=33, iters=64):
+    """Minimize 'func' over [lo, hi], which may have several local
+    minima (or a minimum at either end).  'func' is evaluated at
+    'points' evenly spaced abscissas, both ends included; the best of
+    them is refined by golden() between its neighbours, and the lower
+    of the scan and the refined result kept.  Arguments are as for
+    golden(); minima narrower than the scan spacing may be missed.
+    Returns:
+      xmin, func(xmin)
+    """
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype=float),
+        np.asarray(hi, dtype=float))
+    step = (hi - lo) / (points - 1)
+    xbest = lo.copy()
+    fbest = func(xbest)
+    kbest = np.zeros(lo.shape, dtype=int)
+    for k in range(1, points):
+        x = hi if k == points - 1 else lo + k * step
+        f = func(x)
+        better = f < fbest
+        xbest = np.where(better, x, xbest)
+        fbest = np.where(better, f, fbest)
+        kbest = np.where(better, k, kbest)
+    xref, fref = golden(func, np.maximum(lo, lo + (kbest - 1) * step),
+        np.minimum(hi, lo + (kbest + 1) * step), iters)
+    better = fref < fbest
+    return np.where(better, xref, xbest), np.where(better, fref, fbest)
+
+# vim: set sw=4 tw=80 :
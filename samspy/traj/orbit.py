@@ -8,58 +8,147 @@ import math
 
 class Elliptical:
     """Elliptical orbit.
+    Derived parameters (semimajor axis, period, eccentricity) are computed
+    on first access and kept until apoapsis, periapsis or mu change.
+    A change of apsides drops all three, whether derived or assigned;
+    a change of mu drops the period.
     """
 
+    __slots__ = ('_apoapsis', '_periapsis', '_eccentricity', '_mu',
+        '_ecc', '_semimaj', '_period')
+
     def __init__(self, apo=None, peri=None, ecc=None, mu=None):
         """Elliptical constructor.
         Measures apoasis and periapsis are radii from center
         (not sea level).
         """
-        self.apoapsis = apo
-        self.periapsis = peri
-        self.eccentricity = ecc
-        self.mu = mu
+        self._apoapsis = apo
+        self._periapsis = peri
+        self._eccentricity = ecc        # as given, else None
+        self._mu = mu
 
-        # computed parameters
-        self.period = None      # orbital period
-        self.semimaj = None     # semimajor axis
+        # computed parameters, None until derived
+        self._ecc = None        # derived eccentricity
+        self._period = None     # orbital period
+        self._semimaj = None    # semimajor axis
+
+    def invalidate(self):
+        """Drop derived and assigned shape parameters; they are derived
+        again on next access."""
+        self._eccentricity = None
+        self._ecc = None
+        self._semimaj = None
+        self._period = None
+
+    def known(self, attr):
+        """Value of parameter 'attr' as assigned or already derived,
+        without deriving it; None if not yet known."""
+        if attr == 'eccentricity':
+            if self._eccentricity is not None:
+                return self._eccentricity
+            return self._ecc
+        return getattr(self, '_' + attr)
+
+    @property
+    def apoapsis(self):
+        return self._apoapsis
+
+    @apoapsis.setter
+    def apoapsis(self, value):
+        self._apoapsis = value
+        self.invalidate()
+
+    @property
+    def periapsis(self):
+        return self._periapsis
+
+    @periapsis.setter
+    def periapsis(self, value):
+        self._periapsis = value
+        self.invalidate()
+
+    @property
+    def mu(self):
+        return self._mu
+
+    @mu.setter
+    def mu(self, value):
+        self._mu = value
+        self._period = None
+
+    @property
+    def eccentricity(self):
+        if self._eccentricity is not None:
+            return self._eccentricity
+        if self._ecc is None and self.hasapsides():
+            self.derive_eccentricity()
+        return self._ecc
+
+    @eccentricity.setter
+    def eccentricity(self, value):
+        self._eccentricity = value
+
+    @property
+    def semimaj(self):
+        if self._semimaj is None and self.hasapsides():
+            self.derive_semimaj()
+        return self._semimaj
+
+    @semimaj.setter
+    def semimaj(self, value):
+        self._semimaj = value
+        self._period = None
+
+    @property
+    def period(self):
+        if self._period is None:
+            smj = self.semimaj
+            if smj is not None and smj > 0 and \
+                    self._mu is not None and self._mu > 0:
+                self.derive_period()
+        return self._period
+
+    @period.setter
+    def period(self, value):
+        self._period = value
+
+    def hasapsides(self):
+        """True if apoapsis and periapsis are both known."""
+        apo = self._apoapsis
+        peri = self._periapsis
+        return apo is not None and peri is not None and apo > 0 and peri > 0
 
     def set_circular(self, radius):
         """Set parameters to circular orbit with given radius.
         Return the orbit, allowing it to chain onto __init__().
         """
         self.apoapsis = radius
-        self.periapsis = radius
-        self.eccentricity = 0.0
+        self.periapsis = radius         # eccentricity derives as 0.0
         return self
 
     def fill_params(self):
         """Fill in missing parameters to extent possible.
+        Parameters are derived lazily anyway; this derives them now.
         """
-        if self.semimaj is None:
-            if self.apoapsis > 0 and self.periapsis > 0:
-                self.derive_semimaj()
-        if self.period is None:
-            if self.semimaj > 0 and self.mu > 0:
-                self.derive_period()
-        if self.eccentricity is None:
-            if self.apoapsis > 0 and self.periapsis > 0:
-                self.derive_eccentricity()
+        self.semimaj
+        self.period
+        self.eccentricity
 
     def derive_semimaj(self):
         """Fill in semimajor axis from apoapsis and periapsis."""
-        self.semimaj = (self.apoapsis + self.periapsis) / 2.0
+        self._semimaj = (self._apoapsis + self._periapsis) / 2.0
+        self._period = None
 
     def derive_period(self):
         """Fill in orbital period from semimajor axis and mu"""
         smj = self.semimaj
-        self.period = 2.0 * math.pi * math.sqrt(smj*smj*smj/self.mu)
+        self._period = 2.0 * math.pi * math.sqrt(smj*smj*smj/self._mu)
 
     def derive_eccentricity(self):
         """Fill in eccentricity axis from apoapsis and periapsis."""
-        rp = self.periapsis
-        ra = self.apoapsis
-        self.eccentricity = (ra - rp) / (ra + rp)
+        rp = self._periapsis
+        ra = self._apoapsis
+        self._ecc = (ra - rp) / (ra + rp)
 
     def velo(self, dist):
         "Velocity (speed) at given distance along orbit trajectory."
@@ -84,5 +173,137 @@ class Elliptical:
             2.0 * self_v * new_v * math.cos(angle)
         return math.sqrt(c2)
 
+class OrbitArray:
+    """Array of elliptical orbits, held as structure of arrays.
+    Each parameter of Elliptical is a contiguous NumPy array with one
+    entry per orbit; 'mu' may be a scalar shared by all orbits.
+    NumPy is imported on first use, not with this module.
+    """
+
+    def __init__(self, apo=None, peri=None, ecc=None, mu=None):
+        """OrbitArray constructor.
+        Measures apoasis and periapsis are radii from center
+        (not sea level); all arguments may be arrays or scalars.
+        """
+        self.apoapsis = self.asarray(apo)
+        self.periapsis = self.asarray(peri)
+        self.eccentricity = self.asarray(ecc)
+        self.mu = mu
+
+        # computed parameters
+        self.period = None      # orbital period
+        self.semimaj = None     # semimajor axis
+
+    @staticmethod
+    def asarray(values):
+        "Float array of values, passing None through."
+        import numpy as np
+        if values is None:
+            return None
+        return np.array(values, dtype=float, ndmin=1)
+
+    @classmethod
+    def from_ellipticals(cls, orbits):
+        """Gather a sequence of Elliptical orbits into an OrbitArray.
+        Derived parameters are copied only when all orbits have them.
+        """
+        import numpy as np
+        def gather(attr):
+            values = [ o.known(attr) for o in orbits ]
+            if any(v is None for v in values):
+                return None
+            return np.array(values, dtype=float)
+
+        result = cls(gather('apoapsis'), gather('periapsis'),
+            gather('eccentricity'), gather('mu'))
+        result.period = gather('period')
+        result.semimaj = gather('semimaj')
+        return result
+
+    def to_ellipticals(self):
+        """Return a list of Elliptical orbits."""
+        import numpy as np
+        count = len(self)
+        def scatter(values):
+            if values is None:
+                return [ None ] * count
+            return [ float(v) for v in np.broadcast_to(values, (count,)) ]
+
+        orbits = []
+        for apo, peri, ecc, mu, period, semimaj in zip(
+                scatter(self.apoapsis), scatter(self.periapsis),
+                scatter(self.eccentricity), scatter(self.mu),
+                scatter(self.period), scatter(self.semimaj)):
+            orbit = Elliptical(apo=apo, peri=peri, ecc=ecc, mu=mu)
+            if semimaj is not None:
+                orbit.semimaj = semimaj
+            if period is not None:
+                orbit.period = period
+            orbits.append(orbit)
+        return orbits
+
+    def __len__(self):
+        for values in (self.apoapsis, self.periapsis, self.semimaj):
+            if values is not None:
+                return len(values)
+        return 0
+
+    def set_circular(self, radius):
+        """Set parameters to circular orbits with given radii.
+        Return the orbits, allowing it to chain onto __init__().
+        """
+        import numpy as np
+        self.apoapsis = self.asarray(radius)
+        self.periapsis = self.apoapsis.copy()
+        self.eccentricity = np.zeros_like(self.apoapsis)
+        return self
+
+    def fill_params(self):
+        """Fill in missing parameters.
+        """
+        if self.semimaj is None:
+            self.derive_semimaj()
+        if self.period is None:
+            self.derive_period()
+        if self.eccentricity is None:
+            self.derive_eccentricity()
+
+    def derive_semimaj(self):
+        """Fill in semimajor axes from apoapsis and periapsis."""
+        self.semimaj = (self.apoapsis + self.periapsis) / 2.0
+
+    def derive_period(self):
+        """Fill in orbital periods from semimajor axis and mu"""
+        import numpy as np
+        smj = self.semimaj
+        self.period = 2.0 * math.pi * np.sqrt(smj*smj*smj/self.mu)
+
+    def derive_eccentricity(self):
+        """Fill in eccentricities from apoapsis and periapsis."""
+        rp = self.periapsis
+        ra = self.apoapsis
+        self.eccentricity = (ra - rp) / (ra + rp)
+
+    def velo(self, dist):
+        "Velocities (speeds) at given distances along orbit trajectories."
+        import numpy as np
+        return np.sqrt(self.mu * (2.0/dist - 1.0/self.semimaj))
+
+    def planechange(self, neworbits, angle):
+        """Compute deltaVs based on plane change into new orbits at apogee.
+        Plane changes are given by angles in radians.
+        """
+        import numpy as np
+        self_apo = self.apoapsis
+        new_apo = neworbits.apoapsis
+        if np.any(np.fabs(self_apo - new_apo)/new_apo > 0.0001):
+            raise ValueError("apogees do not agree")
+
+        self_v = self.velo(self_apo)
+        new_v = neworbits.velo(new_apo)
+        c2 = self_v * self_v + new_v * new_v - \
+            2.0 * self_v * new_v * np.cos(angle)
+        return np.sqrt(c2)
+
 
 # vim: set sw=4 tw=80 :
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Memoized vehicle performance.
+Optimizer loops and interactive sessions evaluate the same designs over
+and over.  A Memo keeps the results of multistage.performance() in a
+bounded LRU cache, keyed on the design's content: the name, Mwet, Mdry
+and Isp of each stage in order.  A hit is one key build and one lookup
+for the whole vehicle, instead of restaging it.
+
+Single stages and propel.deduce() are not memoized: in this tree they
+cost less than building a key for them (a compiled PropellantDB answers
+deduce() from arrays already).  A Memo may be shared between threads.
+"""
+
+import threading
+from collections import OrderedDict
+
+from samspy.vehicle import multistage
+
+class LRUCache:
+    """Mapping of bounded size, evicting the least recently used entry.
+    Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=4096):
+        """LRUCache constructor.
+        maxsize : most entries kept; 0 keeps none
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, compute):
+        """Cached value for 'key', or compute() stored under 'key'.
+        compute() runs outside the lock; threads missing on one key at
+        once may both compute it.
+        """
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            self.trim()
+        return value
+
+    def trim(self):
+        """Evict entries over maxsize; call holding the lock."""
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize):
+        """Change the size bound, evicting as needed."""
+        with self.lock:
+            self.maxsize = maxsize
+            self.trim()
+
+    def clear(self):
+        """Drop all entries and statistics."""
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        """Return dict of hits, misses, evictions, size, maxsize."""
+        with self.lock:
+            return { 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self.entries),
+                'maxsize': self.maxsize }
+
+def designkey(design):
+    """Canonical key of the performance() inputs: name, Mwet, Mdry and
+    Isp of each stage in order.  Numbers that compare equal (293 and
+    293.0) give equal keys."""
+    stages = design['stages']
+    key = []
+    for name in design['stageorder']:
+        stage = stages[name]
+        key += (name, stage['Mwet'], stage['Mdry'], stage['Isp'])
+    return tuple(key)
+
+class Memo:
+    """Memoized performance().
+    Each call returns a fresh copy of the cached result, which callers
+    may change freely.
+    """
+
+    def __init__(self, maxsize=4096):
+        """Memo constructor.
+        maxsize : most designs kept
+        """
+        self.cache = LRUCache(maxsize)
+
+    def performance(self, design):
+        """Memoized multistage.performance()."""
+        result = self.cache.get(designkey(design),
+            lambda: multistage.performance(design))
+        return dict((name, dict(value) if isinstance(value, dict) else value)
+            for name, value in result.items())
+
+    def resize(self, maxsize):
+        """Change the size bound."""
+        self.cache.resize(maxsize)
+
+    def clear(self):
+        """Drop all cached results and statistics."""
+        self.cache.clear()
+
+    def stats(self):
+        """Return the cache statistics; see LRUCache.stats()."""
+        return self.cache.stats()
+
+# vim: set sw=4 tw=80 :
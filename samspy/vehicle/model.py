@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Incremental evaluation of a vehicle design.
+A DesignModel holds a design as a graph of values: the inputs (stage
+Mwet, Mdry, Isp and mixture, the design's maxG and gRange, and the
+propellant data), and the values derived from them, per stage
+
+    Mignite -> Mburnout -> deltaV -> totalDeltaV
+    mixture data -> propellant (propel.deduce) -> flows (propel.flows)
+        -> report rows
+
+Changing an input marks the values downstream of it as possibly stale;
+those are recomputed when next asked for, and only if one of the values
+they depend on actually changed.  Values not downstream of a change
+cost one flag test to read.  A recomputed value equal to the old one
+stops the change from going further downstream: changing a mixture's
+OFR reaches only the stages burning that mixture, and a payload Mdry
+change reaches no stage below it.
+"""
+
+import copy
+import numbers
+
+from samspy import gEarth
+from samspy.vehicle import multistage, propel
+
+class Node:
+    """A value in a Graph."""
+
+    __slots__ = ('compute', 'deps', 'dependents', 'value', 'changed',
+        'verified', 'stale')
+
+    def __init__(self, compute, deps, value=None):
+        self.compute = compute  # function of the dependency values; or None
+        self.deps = deps        # Nodes the value is computed from
+        self.dependents = []    # Nodes computed from this one
+        self.value = value
+        self.changed = 0        # revision of the last change of value
+        self.verified = -1      # revision when value was last recomputed
+        self.stale = compute is not None   # an input may have changed
+
+class Graph:
+    """Values computed from inputs and other values, recomputed on demand.
+    Keys are any hashable names.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.revision = 0
+        self.computations = 0   # count of compute() calls
+
+    def input(self, key, value):
+        """Add an input value."""
+        self.nodes[key] = Node(None, (), value)
+
+    def derived(self, key, compute, deps):
+        """Add a value computed by compute(*values of keys 'deps')."""
+        node = Node(compute, tuple(self.nodes[dep] for dep in deps))
+        for dep in node.deps:
+            dep.dependents.append(node)
+        self.nodes[key] = node
+
+    def set(self, key, value):
+        """Change an input value; equal values change nothing."""
+        node = self.nodes[key]
+        if node.compute is not None:
+            raise KeyError("%r is not an input" % (key,))
+        if node.value != value:
+            self.revision += 1
+            node.value = value
+            node.changed = self.revision
+            self.invalidate(node)
+
+    def invalidate(self, node):
+        """Mark everything downstream of a node stale."""
+        pending = list(node.dependents)
+        while pending:
+            node = pending.pop()
+            if not node.stale:
+                node.stale = True
+                pending.extend(node.dependents)
+
+    def get(self, key):
+        """Current value of 'key'."""
+        node = self.nodes[key]
+        self.refresh(node)
+        return node.value
+
+    def refresh(self, node):
+        """Bring a stale node's value up to date."""
+        if not node.stale:
+            return
+        changed = node.verified < 0
+        for dep in node.deps:
+            self.refresh(dep)
+            if dep.changed > node.verified:
+                changed = True
+        if changed:
+            self.computations += 1
+            value = node.compute(*[ dep.value for dep in node.deps ])
+            if node.verified < 0 or value != node.value:
+                node.value = value
+                node.changed = self.revision
+        node.verified = self.revision
+        node.stale = False
+
+STAGEINPUTS = ('Mwet', 'Mdry', 'Isp', 'mixture')
+
+def mixdata(mixture, ppltdata):
+    """Propellant data of one mixture, in raw form; None if there is
+    no such mixture."""
+    if mixture is None or mixture not in ppltdata['mixtures']:
+        return None
+    mixinfo = ppltdata['mixtures'][mixture]
+    matlprops = ppltdata['matlprops']
+    return { 'mixtures': { mixture: mixinfo },
+        'matlprops': dict((name, matlprops[name])
+            for name in mixinfo.get('components', ()) if name in matlprops) }
+
+def burnout(Mignite, Mwet, Mdry):
+    return Mignite - (Mwet - Mdry)
+
+def deltaV(Isp, Mignite, Mburnout):
+    return multistage.rocketeq(Isp*gEarth, Mignite, Mburnout)
+
+def propellant(mixture, mixinfo, Isp, Mignite, Mburnout):
+    """propel.deduce() of a propulsive stage; None for others.
+    Raises KeyError for a propulsive stage with an unknown mixture."""
+    if not Isp:
+        return None
+    if mixinfo is None:
+        raise KeyError("no propellant mixture %r" % (mixture,))
+    return propel.deduce(mixinfo, mixture, Mignite - Mburnout)
+
+def flows(pplt, Mignite, Mburnout, Isp, dV, gRange):
+    """propel.flows() of a propulsive stage; None for others."""
+    if pplt is None or gRange is None:
+        return None
+    return propel.flows(pplt, { 'Mignite': Mignite, 'Mburnout': Mburnout,
+        'Isp': Isp, 'deltaV': dV, 'gRange': gRange })
+
+def reportrows(pplt, stageflows):
+    """Report rows (label, format, values) of propellant and flows."""
+    if pplt is None:
+        return []
+    rows = []
+    for label, fmt, prop in propel.reptfmt_deduce:
+        rows.append((label, fmt, list(pplt[prop])))
+    if stageflows is not None:
+        rows.extend(stageflows[1])
+    return rows
+
+def grangeof(maxG, gRange):
+    """propel.grange() of the design fields; None without either."""
+    try:
+        return propel.grange(dict((key, value) for key, value in
+            (('maxG', maxG), ('gRange', gRange)) if value is not None))
+    except KeyError:
+        return None
+
+class DesignModel:
+    """Vehicle design with incrementally updated results.
+    """
+
+    def __init__(self, design, ppltdata):
+        """DesignModel constructor.
+        design : vehicle design, as from loader.loaddesign()
+        ppltdata : raw propellant data or a PropellantDB
+        """
+        self.stageorder = list(design['stageorder'])
+        stages = design['stages']
+        graph = self.graph = Graph()
+        graph.input('maxG', design.get('maxG'))
+        graph.input('gRange', design.get('gRange'))
+        graph.input('propellants', copy.deepcopy(getattr(ppltdata, 'data',
+            ppltdata)))
+        graph.derived('grange', grangeof, ('maxG', 'gRange'))
+        above = None
+        for name in reversed(self.stageorder):
+            for field in STAGEINPUTS:
+                graph.input((field, name), stages[name].get(field))
+            if above is None:
+                graph.derived(('Mignite', name), float, (('Mwet', name),))
+            else:
+                graph.derived(('Mignite', name), float.__add__,
+                    (('Mignite', above), ('Mwet', name)))
+            graph.derived(('Mburnout', name), burnout,
+                (('Mignite', name), ('Mwet', name), ('Mdry', name)))
+            graph.derived(('deltaV', name), deltaV,
+                (('Isp', name), ('Mignite', name), ('Mburnout', name)))
+            graph.derived(('mixdata', name), mixdata,
+                (('mixture', name), 'propellants'))
+            graph.derived(('propellant', name), propellant,
+                (('mixture', name), ('mixdata', name), ('Isp', name),
+                ('Mignite', name), ('Mburnout', name)))
+            graph.derived(('flows', name), flows,
+                (('propellant', name), ('Mignite', name),
+                ('Mburnout', name), ('Isp', name), ('deltaV', name),
+                'grange'))
+            graph.derived(('rows', name), reportrows,
+                (('propellant', name), ('flows', name)))
+            above = name
+        graph.derived('totalDeltaV', lambda *dvs: sum(dvs),
+            [ ('deltaV', name) for name in self.stageorder ])
+
+    def set(self, stagename, **fields):
+        """Change Mwet, Mdry, Isp or mixture of one stage.
+        All fields are checked before any is changed: raises KeyError
+        for an unknown stage or field, ValueError for a value that is
+        not a number (or for the mixture, a name)."""
+        if stagename not in self.stageorder:
+            raise KeyError("no stage %r" % (stagename,))
+        for field, value in fields.items():
+            if field not in STAGEINPUTS:
+                raise KeyError("no stage field %r" % field)
+            if field == 'mixture':
+                if not isinstance(value, str):
+                    raise ValueError("stage %r: mixture is not a name"
+                        % stagename)
+            elif not isinstance(value, numbers.Real) or \
+                    isinstance(value, bool):
+                raise ValueError("stage %r: %s is not a number"
+                    % (stagename, field))
+        for field, value in fields.items():
+            if field != 'mixture':
+                value = float(value)
+            self.graph.set((field, stagename), value)
+
+    def setdesign(self, **fields):
+        """Change the design's maxG or gRange."""
+        for field, value in fields.items():
+            if field not in ('maxG', 'gRange'):
+                raise KeyError("no design field %r" % field)
+            self.graph.set(field, value)
+
+    def setmixture(self, mixture, **fields):
+        """Change fields (e.g. OFR) of a propellant mixture."""
+        ppltdata = self.graph.nodes['propellants'].value
+        mixtures = dict(ppltdata['mixtures'])
+        mixtures[mixture] = dict(mixtures[mixture], **fields)
+        self.graph.set('propellants', dict(ppltdata, mixtures=mixtures))
+
+    def get(self, quantity, stagename=None):
+        """Current value of a quantity: 'totalDeltaV' or 'grange', or of
+        a stage: 'Mignite', 'Mburnout', 'deltaV', 'propellant' (deduce()
+        results), 'flows' (flows() results) or 'rows' (report rows).
+        Values are shared with the model: do not change them."""
+        if stagename is None:
+            return self.graph.get(quantity)
+        return self.graph.get((quantity, stagename))
+
+    @property
+    def totalDeltaV(self):
+        return self.graph.get('totalDeltaV')
+
+    def stageinfo(self, stagename):
+        """Return the stagedeltaV()-style results of one stage."""
+        get = self.graph.get
+        return { 'Mignite': get(('Mignite', stagename)),
+            'Mburnout': get(('Mburnout', stagename)),
+            'Isp': get(('Isp', stagename)),
+            'deltaV': get(('deltaV', stagename)) }
+
+    def performance(self):
+        """Return results in the form given by multistage.performance()."""
+        perfinfo = dict((name, self.stageinfo(name))
+            for name in self.stageorder)
+        perfinfo['totalDeltaV'] = self.totalDeltaV
+        return perfinfo
+
+# vim: set sw=4 tw=80 :
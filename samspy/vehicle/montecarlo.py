@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Monte Carlo uncertainty analysis of launch vehicle designs.
+Stage masses, Isp, oxidizer/fuel ratios and propellant densities are
+drawn from declared distributions, and whole sample arrays are run
+through multistage.performance_batch() and propel.flows_batch().
+
+An uncertainty specification looks like:
+
+    samples: 1000000
+    seed: 42
+    stages:
+        Proto LV-1:
+            Mdry: { dist: normal, mean: 2886.0, sd: 30.0 }
+            Isp: { dist: uniform, low: 285.0, high: 300.0 }
+    mixtures:
+        lox-rp1:
+            OFR: { dist: uniform, low: 2.55, high: 2.95 }
+    matlprops:
+        RP1:
+            liqdens: { dist: triangular, low: 0.81, mode: 0.91, high: 1.02 }
+    design:
+        maxG: { dist: normal, mean: 3.0, sd: 0.05 }
+
+Fields not mentioned keep the value in the design or propellant data.
+Each declared field draws from its own random stream, derived from the
+seed and the field's name, so results do not depend on the block size
+or on which other fields are declared.
+"""
+
+import zlib
+
+import numpy as np
+
+from samspy.vehicle import multistage, propel
+
+# samples drawn and evaluated at a time; bounds temporary array memory
+BLOCKSIZE = 1 << 20
+
+def draw(rng, spec, count):
+    """Draw 'count' samples from one distribution specification.
+    Supported: normal (mean, sd), uniform (low, high),
+    triangular (low, mode, high).  A bare number is a constant.
+    """
+    if not isinstance(spec, dict):
+        return np.full(count, float(spec))
+    dist = spec['dist']
+    if dist == 'normal':
+        return rng.normal(spec['mean'], spec['sd'], count)
+    elif dist == 'uniform':
+        return rng.uniform(spec['low'], spec['high'], count)
+    elif dist == 'triangular':
+        return rng.triangular(spec['low'], spec['mode'], spec['high'], count)
+    raise ValueError("unknown distribution %r" % dist)
+
+def streams(seed):
+    """Independent random streams, one per label, derived from 'seed'
+    (fresh entropy if None).
+    Returns a function of a label (str) to its Generator; repeated calls
+    with one label continue one stream.
+    """
+    seedseq = np.random.SeedSequence(seed)
+    generators = {}
+    def stream(label):
+        rng = generators.get(label)
+        if rng is None:
+            key = zlib.crc32(label.encode('utf-8'))
+            rng = generators[label] = np.random.default_rng(
+                np.random.SeedSequence(seedseq.entropy, spawn_key=(key,)))
+        return rng
+    return stream
+
+def propulsive(design):
+    """Stage names of design that burn propellant."""
+    stages = design['stages']
+    return [ s for s in design['stageorder']
+        if stages[s]['Isp'] > 0 and stages[s]['Mwet'] > stages[s]['Mdry'] ]
+
+def evaluate(design, ppltdata, uncertain, stream, count):
+    """Draw and evaluate one block of 'count' samples.
+    stream - function of a field label to its Generator; see streams()
+    Returns dict of result arrays: 'totalDeltaV' and, per propulsive
+    stage, '<stage>.deltaV', '<stage>.burntime', '<stage>.volume'.
+    """
+    stageorder = design['stageorder']
+    stages = design['stages']
+    stagedists = uncertain.get('stages', {})
+    mixdists = uncertain.get('mixtures', {})
+    matldists = uncertain.get('matlprops', {})
+    designdists = uncertain.get('design', {})
+
+    def sample(dists, name, nominal, owner):
+        "Samples of a declared field, else its nominal value."
+        if name in dists:
+            return draw(stream('%s.%s' % (owner, name)), dists[name], count)
+        return nominal
+
+    columns = {}
+    for mtype in ('Mwet', 'Mdry', 'Isp'):
+        column = np.empty((count, len(stageorder)))
+        for nx, stagename in enumerate(stageorder):
+            column[:, nx] = sample(stagedists.get(stagename, {}), mtype,
+                stages[stagename][mtype], 'stages.' + stagename)
+        columns[mtype] = column
+    perf = multistage.performance_batch(stageorder,
+        columns['Mwet'], columns['Mdry'], columns['Isp'])
+
+    minG, maxG = propel.grange(design)
+    gRange = (sample(designdists, 'minG', minG, 'design'),
+        sample(designdists, 'maxG', maxG, 'design'))
+
+    # draw each mixture and material once, shared by stages using it
+    mixtures = {}
+    matldens = {}
+    for stagename in propulsive(design):
+        mixture = stages[stagename]['mixture']
+        if mixture in mixtures:
+            continue
+        mixinfo = ppltdata['mixtures'][mixture]
+        mixtures[mixture] = sample(mixdists.get(mixture, {}), 'OFR',
+            mixinfo['OFR'], 'mixtures.' + mixture)
+        for matl in mixinfo['components']:
+            if matl not in matldens:
+                matldens[matl] = sample(matldists.get(matl, {}), 'liqdens',
+                    ppltdata['matlprops'][matl]['liqdens'],
+                    'matlprops.' + matl)
+
+    results = { 'totalDeltaV': perf['totalDeltaV'] }
+    for stagename in propulsive(design):
+        stageperf = dict(perf[stagename], gRange=gRange)
+        stageflows = propel.flows_batch(stageperf)
+        mixture = stages[stagename]['mixture']
+        oxid, fuel = ppltdata['mixtures'][mixture]['components']
+        ofratio = mixtures[mixture]
+        fr_oxid = ofratio / (ofratio + 1.0)
+        Mpropel = stageperf['Mignite'] - stageperf['Mburnout']
+        volume = Mpropel * (fr_oxid/matldens[oxid] +
+            (1.0 - fr_oxid)/matldens[fuel])
+        results[stagename + '.deltaV'] = stageperf['deltaV']
+        results[stagename + '.burntime'] = stageflows['burntime_min']
+        results[stagename + '.volume'] = volume
+    return results
+
+def blocks(design, ppltdata, uncertain, samples=None, seed=None,
+        blocksize=BLOCKSIZE):
+    """Run a Monte Carlo analysis of 'design' block by block.
+    Arguments are as for montecarlo().
+    Yields a dict of result arrays for each block of up to 'blocksize'
+    samples, so results can be streamed out (see writers.Columnar).
+    """
+    if samples is None:
+        samples = uncertain.get('samples', 10000)
+    if seed is None:
+        seed = uncertain.get('seed')
+    stream = streams(seed)
+
+    for start in range(0, samples, blocksize):
+        count = min(blocksize, samples - start)
+        yield evaluate(design, ppltdata, uncertain, stream, count)
+
+def montecarlo(design, ppltdata, uncertain, samples=None, seed=None,
+        blocksize=BLOCKSIZE):
+    """Run a Monte Carlo analysis of 'design'.
+      ppltdata - propellant data source
+      uncertain - uncertainty specification (see module docstring)
+      samples, seed - override 'samples' and 'seed' of the specification
+    Samples are drawn and evaluated in blocks of 'blocksize'; equal
+    seeds reproduce equal results, whatever the block sizes.
+    Returns:
+      dict of result arrays, one entry per sample
+    """
+    if samples is None:
+        samples = uncertain.get('samples', 10000)
+
+    results = {}
+    start = 0
+    for block in blocks(design, ppltdata, uncertain, samples, seed,
+            blocksize):
+        count = len(block['totalDeltaV'])
+        for name, values in block.items():
+            if name not in results:
+                results[name] = np.empty(samples)
+            results[name][start:start+count] = values
+        start += count
+    return results
+
+def percentiles(results, pcts=(1, 5, 50, 95, 99)):
+    """Summarize Monte Carlo results.
+    Returns dict of name to (mean, standard deviation, [percentiles]).
+    """
+    summary = {}
+    for name, values in results.items():
+        summary[name] = (float(values.mean()), float(values.std()),
+            [ float(p) for p in np.percentile(values, pcts) ])
+    return summary
+
+# vim: set sw=4 tw=80 :
@@ -3,10 +3,14 @@
 
 # multistage.py -- multi-stage analysis
 
+import copy
 import sys
 import math
 from samspy import gEarth
 
+# NumPy and StageResults are imported by the batch functions only, so that
+# scalar analysis (and command startup) does without them.
+
 def rocketeq(ve, m0, m1):
     '''Compute delta V based on ve (effective exhaust velocity),
     and initial and final mass (m0 and m1 respectively).
@@ -34,33 +38,259 @@ def stagedeltaV(stagelist, stages, infolvl=0):
             'Isp': Isp, 'deltaV': deltaV }
     return results
 
+class Staging:
+    """Staging engine.
+    Ignition masses of all stages come from a single reverse cumulative
+    sum over 'stageorder', rather than re-summing the upper stages for
+    each stage.  Stage parameters can be changed in place; only the
+    affected stages are recomputed.
+    """
+
+    def __init__(self, stageorder, stages):
+        """Staging constructor.
+        stageorder : stage names, bottom (first to ignite) to top
+        stages : dict of stage info with 'Mwet', 'Mdry', 'Isp'
+        """
+        self.stageorder = list(stageorder)
+        self.index = dict((s, nx) for nx, s in enumerate(self.stageorder))
+        self.Mwet = [ stages[s]['Mwet'] for s in self.stageorder ]
+        self.Mdry = [ stages[s]['Mdry'] for s in self.stageorder ]
+        self.Isp = [ stages[s]['Isp'] for s in self.stageorder ]
+
+        nstages = len(self.stageorder)
+        self.Mignite = [ 0.0 ] * nstages
+        self.Mburnout = [ 0.0 ] * nstages
+        self.deltaV = [ 0.0 ] * nstages
+        self.totalDeltaV = 0.0
+        self.restage(nstages - 1)
+
+    def restage(self, top):
+        """Recompute ignition masses and deltaV of stages 0 through 'top'.
+        Stages above 'top' are taken as already computed.
+        """
+        if top + 1 < len(self.stageorder):
+            Mabove = self.Mignite[top + 1]
+        else:
+            Mabove = 0.0
+        for nx in range(top, -1, -1):
+            Mabove = self.Mwet[nx] + Mabove
+            self.Mignite[nx] = Mabove
+            self.burnout(nx)
+        self.totalDeltaV = sum(self.deltaV)
+
+    def burnout(self, nx):
+        """Recompute burnout mass and deltaV of stage at index 'nx'."""
+        Mburnout = self.Mignite[nx] - (self.Mwet[nx] - self.Mdry[nx])
+        self.Mburnout[nx] = Mburnout
+        self.deltaV[nx] = rocketeq(self.Isp[nx]*gEarth,
+            self.Mignite[nx], Mburnout)
+
+    def update(self, stagename, Mwet=None, Mdry=None, Isp=None):
+        """Change one stage's parameters in place.
+        A change of Mwet alters the ignition mass of that stage and of
+        every stage below it, so that prefix of 'stageorder' is restaged.
+        Mdry and Isp only affect the stage itself.
+        Returns the new total deltaV.
+        """
+        nx = self.index[stagename]
+        if Mdry is not None:
+            self.Mdry[nx] = Mdry
+        if Isp is not None:
+            self.Isp[nx] = Isp
+        if Mwet is not None:
+            self.Mwet[nx] = Mwet
+            self.restage(nx)
+        elif Mdry is not None or Isp is not None:
+            self.burnout(nx)
+            self.totalDeltaV = sum(self.deltaV)
+        return self.totalDeltaV
+
+    def copy(self):
+        """Return a Staging independent of this one."""
+        other = copy.copy(self)
+        for attr in ('stageorder', 'Mwet', 'Mdry', 'Isp', 'Mignite',
+                'Mburnout', 'deltaV'):
+            setattr(other, attr, list(getattr(self, attr)))
+        return other
+
+    def stageinfo(self, stagename):
+        """Return the stagedeltaV()-style results of one stage."""
+        nx = self.index[stagename]
+        return { 'Mignite' : self.Mignite[nx],
+            'Mburnout' : self.Mburnout[nx],
+            'Isp': self.Isp[nx], 'deltaV': self.deltaV[nx] }
+
+    def results(self):
+        """Return results in the form given by performance()."""
+        perfinfo = {}
+        for stagename in self.stageorder:
+            perfinfo[stagename] = self.stageinfo(stagename)
+        perfinfo['totalDeltaV'] = self.totalDeltaV
+        return perfinfo
+
+    def records(self):
+        """Return results as a single-design StageResults."""
+        from samspy.vehicle.results import StageResults
+        results = StageResults.empty(self.stageorder)
+        results.put(None, self)
+        return results
+
 def performance(design):
     '''Analyze performacne in terms of delta V.
     '''
+    staging = Staging(design['stageorder'], design['stages'])
+    return staging.results()
+
+def batchcolumns(designs):
+    '''Gather the Mwet, Mdry and Isp of a list of designs into column
+    arrays of shape (N designs, N stages), suitable for performance_batch().
+    All designs must share the stage order of the first one; every
+    stage must give Mwet, Mdry and Isp (KeyError otherwise).
+    Returns:
+      stageorder, Mwet, Mdry, Isp
+    '''
+    import numpy as np
+    stageorder = designs[0]['stageorder']
+    columns = []
+    for mtype in ('Mwet', 'Mdry', 'Isp'):
+        rows = []
+        for design in designs:
+            if design['stageorder'] != stageorder:
+                raise ValueError("designs do not share a stage order")
+            stages = design['stages']
+            rows.append([ stages[s][mtype] for s in stageorder ])
+        columns.append(np.array(rows, dtype=float))
+    return (stageorder,) + tuple(columns)
+
+def performance_batch(stageorder, Mwet, Mdry, Isp):
+    '''Analyze performance of N designs sharing one stage order.
+    Mwet, Mdry, Isp are array-likes of shape (N designs, N stages),
+    one column per entry of 'stageorder'.
+    Returns a StageResults of N designs, which reads like performance()
+    with arrays of length N: per stage 'Mignite', 'Mburnout', 'Isp',
+    'deltaV', and 'totalDeltaV'.
+    '''
+    import numpy as np
+    from samspy.vehicle.results import StageResults
+    Mwet = np.atleast_2d(np.asarray(Mwet, dtype=float))
+    Mdry = np.atleast_2d(np.asarray(Mdry, dtype=float))
+    Isp = np.atleast_2d(np.asarray(Isp, dtype=float))
+    nstages = len(stageorder)
+    if not (Mwet.shape == Mdry.shape == Isp.shape) or \
+            Mwet.shape[1] != nstages:
+        raise ValueError("columns do not match stage order")
+
+    # ignition mass of each stage is the sum of it and all stages above
+    perf = StageResults.empty(stageorder, len(Mwet))
+    records = perf.records
+    records['Mignite'] = np.cumsum(Mwet[:, ::-1], axis=1)[:, ::-1]
+    records['Mburnout'] = records['Mignite'] - (Mwet - Mdry)
+    records['Isp'] = Isp
+    records['deltaV'] = Isp * gEarth * np.log(records['Mignite'] /
+        records['Mburnout'])
+    return perf
+
+def optimalratios(deltaV, Isps, epsilons, tol=1.0e-12, maxiter=100):
+    '''Find stage mass ratios giving 'deltaV' at minimum gross mass.
+    Isps : specific impulse of each propulsive stage, bottom to top
+    epsilons : structural fraction Mdry/Mwet of each stage
+    Uses the classic Lagrange-multiplier staging solution: with
+    multiplier eta, stage mass ratio n = (eta*ve - 1)/(eta*ve*epsilon),
+    and eta is the root of sum(rocketeq(ve, n, 1)) == deltaV, found by
+    Newton iteration safeguarded by bisection.
+    Returns:
+      list of mass ratios Mignite/Mburnout, one per stage
+    '''
+    ves = [ Isp*gEarth for Isp in Isps ]
+    if len(ves) != len(epsilons) or not ves:
+        raise ValueError("need one Isp and structural fraction per stage")
+    if min(ves) <= 0.0:
+        raise ValueError("propulsive stages need a positive Isp")
+    for eps in epsilons:
+        if not 0.0 < eps < 1.0:
+            raise ValueError("structural fraction %r not in (0, 1)" % eps)
+    dVmax = sum( rocketeq(ve, 1.0, eps) for ve, eps in zip(ves, epsilons) )
+    if deltaV >= dVmax:
+        raise ValueError("deltaV %.1f not below limit %.1f of these stages"
+            % (deltaV, dVmax))
+
+    def excess(eta):
+        "Excess deltaV at multiplier eta, and its derivative."
+        dV = 0.0
+        slope = 0.0
+        for ve, eps in zip(ves, epsilons):
+            dV += rocketeq(ve, eta*ve - 1.0, eta*ve*eps)
+            slope += ve / (eta * (eta*ve - 1.0))
+        return dV - deltaV, slope
+
+    # excess() rises monotonically from -inf at eta = 1/min(ve)
+    lo = 1.0 / min(ves)
+    hi = 2.0 * lo
+    while excess(hi)[0] < 0.0:
+        lo, hi = hi, 2.0 * hi
+    eta = hi
+    for n in range(maxiter):
+        fval, slope = excess(eta)
+        if fval < 0.0:
+            lo = eta
+        else:
+            hi = eta
+        step = eta - fval / slope
+        if not lo < step < hi:
+            step = 0.5 * (lo + hi)
+        if abs(step - eta) <= tol * eta:
+            eta = step
+            break
+        eta = step
+
+    ratios = [ (eta*ve - 1.0) / (eta*ve*eps)
+        for ve, eps in zip(ves, epsilons) ]
+    for nx, ratio in enumerate(ratios):
+        if ratio <= 1.0:
+            raise ValueError("stage %d adds no deltaV at optimum; drop it"
+                % nx)
+    return ratios
+
+def optimaldesign(design, deltaV, epsilons=None):
+    '''Resize the propulsive stages of 'design' to reach 'deltaV' with
+    minimum gross mass, keeping each stage's Isp and structural fraction.
+    Propulsive stages are those with Isp > 0 and Mwet > Mdry; they must
+    precede the non-propulsive (payload) stages in 'stageorder'.
+    epsilons : optional dict of stage name to structural fraction
+        Mdry/Mwet, overriding the fraction of the given design.
+    Returns a copy of 'design' with new Mwet and Mdry per stage; it can be
+    written out with yaml.safe_dump() and analyzed by lvbasic.
+    '''
     stageorder = design['stageorder']
     stages = design['stages']
-    mass = masses(stageorder, stages)
-    deltaVlist = []
-    perfinfo = {}
-    stageinfo = {}
-
-    stagelast = len(stageorder)
-    for nx in range(len(stageorder)):
-        stagenum = nx + 1
-        stagelist = stageorder[nx:stagelast]
-        stageinfo = stagedeltaV(stagelist, stages, infolvl=2)
-        deltaV = stageinfo['deltaV']
-        deltaVlist.append(deltaV)
-        perfinfo[stageorder[nx]] = stageinfo
-
-    perfinfo['totalDeltaV'] = sum(deltaVlist)
-    return perfinfo
+    if epsilons is None:
+        epsilons = {}
+    boosters = [ s for s in stageorder
+        if stages[s]['Isp'] > 0 and stages[s]['Mwet'] > stages[s]['Mdry'] ]
+    if stageorder[:len(boosters)] != boosters:
+        raise ValueError("payload stages must follow propulsive stages")
+    Mpayload = masses(stageorder[len(boosters):], stages)
+    if Mpayload <= 0.0:
+        raise ValueError("design needs a payload with positive mass")
+
+    Isps = [ stages[s]['Isp'] for s in boosters ]
+    fractions = [ epsilons.get(s, stages[s]['Mdry']/stages[s]['Mwet'])
+        for s in boosters ]
+    ratios = optimalratios(deltaV, Isps, fractions)
+
+    result = copy.deepcopy(design)
+    Mabove = Mpayload
+    for name, ratio, eps in reversed(list(zip(boosters, ratios, fractions))):
+        Mstage = Mabove * (ratio - 1.0) / (1.0 - ratio*eps)
+        result['stages'][name]['Mwet'] = Mstage
+        result['stages'][name]['Mdry'] = Mstage * eps
+        Mabove += Mstage
+    return result
 
 if __name__ == '__main__':
-    import yaml
+    from samspy import loader
 
-    fh = open(sys.argv[1], 'r')
-    design = yaml.load(fh)
+    design = loader.loaddesign(sys.argv[1])
     results = performance(design)
     sequence = design['stageorder']
 
@@ -6,16 +6,21 @@
 * Compute propellant flow characteristics.
 """
 
+import sys
+
 from samspy import lb2kg, m2ft, gEarth, N2lb
+from samspy.vehicle.propeldb import PropellantDB
 
 def deduce(ppltdata, mixture, mass):
     """Deduce basic material properties of propellant combination.
-      ppltdata - propellant data source
+      ppltdata - propellant data source, raw or a compiled PropellantDB
       mixture - shortname of oxidizer-fuel combination
       mass - amount of propellant in kilograms
     Returns:
       pplt - propellant info
     """
+    if isinstance(ppltdata, PropellantDB):
+        return ppltdata.deduce(mixture, mass)
     try:
         mixtures = ppltdata['mixtures']
         matlprops = ppltdata['matlprops']
@@ -60,6 +65,17 @@ reptfmt_deduce =  (
     ('masses (kg)', '%7.3f', 'masses'),
     ('volume (l)', '%7.3f', 'volumes') )
 
+def grange(design):
+    """Return the [minG, maxG] acceleration range of a design.
+    The design's 'maxG' governs when given; 'gRange' supplies minG,
+    which defaults to 0 (thrust then set by maxG at burnout).
+    """
+    minG, maxG = design.get('gRange', (0.0, None))
+    maxG = design.get('maxG', maxG)
+    if maxG is None:
+        raise KeyError("design has neither maxG nor gRange")
+    return [minG, maxG]
+
 def flows(propellants, stageperf):
     """Determine flow properties given propellant properties and desired
     performance.
@@ -134,11 +150,33 @@ def flows(propellants, stageperf):
 
     return stageflows, report
 
+def flows_batch(stageperf):
+    """Array form of the thrust, mass flow and burn time part of flows().
+      stageperf - 'Mignite', 'Mburnout', 'Isp' and 'gRange' values;
+        each may be a scalar or a NumPy array of samples
+    Returns:
+      dict of 'thrust', 'mflow', 'burntime_min', 'burntime_max'
+    """
+    import numpy as np
+    minG = stageperf['gRange'][0]
+    maxG = stageperf['gRange'][1]
+    Mignite = stageperf['Mignite']
+    Mburnout = stageperf['Mburnout']
+    vexhaust = stageperf['Isp'] * gEarth
+
+    thrust_fini = Mburnout * gEarth * maxG
+    thrust_init = Mignite * gEarth * minG
+    thrust = np.where(thrust_init < thrust_fini, thrust_fini, thrust_init)
+    Mpropel = Mignite - Mburnout
+    mflow = thrust / vexhaust
+    return { 'thrust': thrust, 'mflow': mflow,
+        'burntime_min': Mpropel / mflow,
+        'burntime_max': Mpropel * vexhaust / thrust_fini }
+
 if __name__ == '__main__':
-    import yaml
+    from samspy import loader
 
-    fh = open(sys.argv[1], 'r')
-    data = yaml.load(fh)
+    data = loader.loadyaml(sys.argv[1])
     print ("propellant analysis using", sys.argv[1])
     results = deduce(data, 'lox-lh2', 100)
     print (results)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Compiled propellant database.
+The raw propellant data (e.g. propellants.yaml) is compiled once into
+per-mixture arrays indexed by integer mixture id: oxidizer fraction,
+component liquid densities and Isp.  Compiled databases are kept in the
+SamsPy on-disk cache, so repeated runs skip YAML parsing.
+"""
+
+import math
+import sys
+from array import array
+
+from samspy import cache, loader
+
+ISPKEYS = ( 'isp', 'isp-sl', 'isp-vac' )
+
+class PropellantDB:
+    """Propellant database compiled for O(1) mixture queries.
+    Indexing (db['mixtures'], db['matlprops']) reaches the raw data,
+    so a PropellantDB can stand in for the raw dict.  Pickles (and so
+    cache entries) hold only the compiled columns; a database loaded
+    from a file reads the raw data again from it when first indexed.
+    """
+
+    def __init__(self, ppltdata):
+        """Compile raw propellant data with 'mixtures' and 'matlprops'.
+        Mixtures lacking components, OFR or liquid densities are not
+        compiled; queries on them raise KeyError.
+        """
+        self._data = ppltdata           # raw data; None when not kept
+        self.source = None              # file to read raw data from
+        self.mixnames = []              # mixture id -> name
+        self.mixids = {}                # mixture name -> id
+        self.components = []            # (oxidizer, fuel) names
+        self.fr_oxid = array('d')       # oxidizer mass fraction
+        self.liqdens = (array('d'), array('d'))  # oxidizer, fuel kg/l
+        self.isp = dict((k, array('d')) for k in ISPKEYS)  # NaN if none
+        self.uncompiled = {}            # mixture name -> reason
+
+        matlprops = ppltdata['matlprops']
+        for name, mixinfo in ppltdata['mixtures'].items():
+            reason = self.compile(name, mixinfo, matlprops)
+            if reason:
+                self.uncompiled[name] = reason
+
+    def compile(self, name, mixinfo, matlprops):
+        """Compile one mixture; return the reason if it cannot be."""
+        components = mixinfo.get('components', [])
+        if len(components) != 2:
+            return "bi-propellants expected as components"
+        if 'OFR' not in mixinfo:
+            return "no oxidizer/fuel ratio (OFR)"
+        for matl in components:
+            if 'liqdens' not in matlprops.get(matl, {}):
+                return "no liquid density for %s" % matl
+
+        self.mixids[name] = len(self.mixnames)
+        self.mixnames.append(name)
+        self.components.append(tuple(components))
+        ofratio = mixinfo['OFR']
+        self.fr_oxid.append(ofratio / (ofratio + 1))
+        for n in (0, 1):
+            self.liqdens[n].append(matlprops[components[n]]['liqdens'])
+        for ispx in ISPKEYS:
+            self.isp[ispx].append(mixinfo.get(ispx, math.nan))
+        return None
+
+    @classmethod
+    def load(cls, path, usecache=True):
+        """Load a compiled database for propellant data file 'path'."""
+        if not usecache:
+            with open(path, 'rb') as fh:
+                propeldb = cls.build(fh.read())
+        else:
+            propeldb = cache.load(path, 'propeldb', cls.build)
+        propeldb.source = path
+        return propeldb
+
+    @classmethod
+    def build(cls, content):
+        """Compile a database from propellant YAML text."""
+        return cls(loader.parse(content))
+
+    @property
+    def data(self):
+        """The raw propellant data, read from the source file when not
+        kept in memory."""
+        if self._data is None:
+            if self.source is None:
+                raise ValueError("propellant database has no raw data")
+            self._data = loader.loadyaml(self.source)
+        return self._data
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_data'] = None
+        return state
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def mixid(self, mixture):
+        """Integer id of compiled mixture."""
+        try:
+            return self.mixids[mixture]
+        except KeyError:
+            reason = self.uncompiled.get(mixture, "not found")
+            sys.stderr.write("cannot use propellant mixture %s: %s\n"
+                % (mixture, reason))
+            raise
+
+    def deduce(self, mixture, mass):
+        """Deduce basic material properties of propellant combination;
+        same results as propel.deduce().
+          mixture - shortname of oxidizer-fuel combination
+          mass - amount of propellant in kilograms
+        """
+        mid = self.mixid(mixture)
+        fr_oxid = self.fr_oxid[mid]
+        pplt = {}
+        for ispx in ISPKEYS:
+            isp = self.isp[ispx][mid]
+            if not math.isnan(isp):
+                pplt[ispx] = isp
+        pplt['matlNames'] = list(self.components[mid])
+        pplt['fractions'] = ( fr_oxid, 1.0 - fr_oxid )
+        pplt['masses'] = [ fr_oxid*mass, (1.0 - fr_oxid)*mass ]
+        pplt['liqdens'] = [ self.liqdens[0][mid], self.liqdens[1][mid] ]
+        pplt['volumes'] = [ pplt['masses'][0]/pplt['liqdens'][0],
+            pplt['masses'][1]/pplt['liqdens'][1] ]
+        return pplt
+
+# vim: set sw=4 tw=80 :
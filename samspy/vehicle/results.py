@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Compact stage results.
+Staging and flow results of one design, or of many designs sharing one
+stage order, held in a single NumPy structured array of shape
+(N designs, N stages) -- or (N stages,) for one design -- with one
+fixed float64 field per quantity (STAGE_FIELDS).  Unset fields are NaN.
+
+StageResults reads like the dict returned by multistage.performance():
+results[stagename][field] and results['totalDeltaV'].  For many designs
+those lookups give array views into the records, one entry per design.
+"""
+
+from collections.abc import Mapping
+import numpy as np
+
+from samspy.vehicle import propel
+
+STAGE_FIELDS = ('Mignite', 'Mburnout', 'Isp', 'deltaV',
+    'thrust', 'mflow', 'burntime')
+STAGE_DTYPE = np.dtype([ (name, np.float64) for name in STAGE_FIELDS ])
+
+# fields of multistage.performance(); the rest are set by addflows()
+PERF_FIELDS = STAGE_FIELDS[:4]
+
+class StageView(Mapping):
+    """Dict-like view of one stage's fields in a StageResults.
+    """
+
+    __slots__ = ('record', 'fields')
+
+    def __init__(self, record, fields):
+        self.record = record
+        self.fields = fields
+
+    def __getitem__(self, key):
+        if key not in self.fields:
+            raise KeyError(key)
+        return self.record[key]
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+class StageResults(Mapping):
+    """Stage results in a structured array, with a dict-like view.
+    """
+
+    def __init__(self, stageorder, records, hasflows=False):
+        """StageResults constructor.
+        stageorder : stage names, bottom to top; the last axis of records
+        records : structured array of STAGE_DTYPE
+        hasflows : whether the flow fields have been set
+        """
+        self.stageorder = list(stageorder)
+        self.index = dict((s, nx) for nx, s in enumerate(self.stageorder))
+        self.records = records
+        self.hasflows = hasflows
+
+    @classmethod
+    def empty(cls, stageorder, count=None):
+        """Results for one design (count None) or 'count' designs,
+        with every field NaN."""
+        shape = (len(stageorder),)
+        if count is not None:
+            shape = (count,) + shape
+        records = np.empty(shape, dtype=STAGE_DTYPE)
+        records.view(np.float64)[...] = np.nan
+        return cls(stageorder, records)
+
+    @classmethod
+    def concatenate(cls, results):
+        """Stack several results of the same stage order along designs.
+        Single-design results count as one row each."""
+        first = results[0]
+        for res in results:
+            if res.stageorder != first.stageorder:
+                raise ValueError("results do not share a stage order")
+        records = np.concatenate([ np.atleast_2d(res.records)
+            for res in results ])
+        hasflows = all(res.hasflows for res in results)
+        return cls(first.stageorder, records, hasflows)
+
+    def put(self, row, staging):
+        """Store the state of a multistage.Staging at design 'row'
+        (None for single-design results)."""
+        records = self.records if row is None else self.records[row]
+        records['Mignite'] = staging.Mignite
+        records['Mburnout'] = staging.Mburnout
+        records['Isp'] = staging.Isp
+        records['deltaV'] = staging.deltaV
+
+    def rows(self, selection):
+        """Results of a subset of designs: a view for slices, a copy for
+        index arrays."""
+        return StageResults(self.stageorder, self.records[selection],
+            self.hasflows)
+
+    def addflows(self, gRange):
+        """Set thrust, mass flow and burn time of the propulsive stages,
+        as propel.flows() would for the acceleration range 'gRange'.
+        Stages without propellant or Isp keep NaN flow fields.
+        Returns self.
+        """
+        records = self.records
+        propulsive = (records['Isp'] > 0) & \
+            (records['Mignite'] > records['Mburnout'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            flows = propel.flows_batch({ 'Mignite': records['Mignite'],
+                'Mburnout': records['Mburnout'], 'Isp': records['Isp'],
+                'gRange': gRange })
+        records['thrust'] = np.where(propulsive, flows['thrust'], np.nan)
+        records['mflow'] = np.where(propulsive, flows['mflow'], np.nan)
+        records['burntime'] = np.where(propulsive, flows['burntime_min'],
+            np.nan)
+        self.hasflows = True
+        return self
+
+    @property
+    def totalDeltaV(self):
+        "Total deltaV of each design."
+        return self.records['deltaV'].sum(axis=-1)
+
+    @property
+    def fields(self):
+        "Fields shown by the stage views."
+        return STAGE_FIELDS if self.hasflows else PERF_FIELDS
+
+    def __getitem__(self, key):
+        if key == 'totalDeltaV':
+            return self.totalDeltaV
+        nx = self.index[key]
+        if self.records.ndim == 1:
+            return StageView(self.records[nx], self.fields)
+        return StageView(self.records[:, nx], self.fields)
+
+    def __iter__(self):
+        yield from self.stageorder
+        yield 'totalDeltaV'
+
+    def __len__(self):
+        return len(self.stageorder) + 1
+
+    def __contains__(self, key):
+        return key == 'totalDeltaV' or key in self.index
+
+# vim: set sw=4 tw=80 :
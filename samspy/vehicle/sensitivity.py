@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Sensitivities (exact partial derivatives) of vehicle performance.
+sensitivities() evaluates a design like multistage.performance() and
+propel.flows(), and carries along the gradient of each result with
+respect to every input, in closed form:
+
+    deltaV   = Isp g ln(Mignite/Mburnout)
+    d deltaV = g ln(Mignite/Mburnout) dIsp
+               + Isp g (dMignite/Mignite - dMburnout/Mburnout)
+    thrust   = max(Mignite g minG, Mburnout g maxG)
+    burntime = Mpropel Isp g / thrust         (flows() 'burntime_min')
+    d burntime = burntime (dMpropel/Mpropel + dIsp/Isp - dthrust/thrust)
+
+Inputs and results are labelled like sweep axes: 'stage.field' for
+stage fields, bare names for design-level ones.  The inputs are the
+Mwet, Mdry and Isp of each stage, then minG and maxG (see
+propel.grange(); maxG is the design's maxG when it has one, else the
+upper end of gRange).  Thrust has a kink where the minG and maxG
+limits cross; there the derivative is that of the limit flows() picks.
+"""
+
+import math
+import numpy as np
+
+from samspy import gEarth
+from samspy.vehicle import propel
+
+STAGEINPUTS = ('Mwet', 'Mdry', 'Isp')
+
+def sensitivities(design):
+    """Results and their gradients for a design.
+    Returns dict of:
+      'inputs' - list of input labels; gradients are in this order
+      'values' - dict of result label to value: 'totalDeltaV' and, per
+        stage, 'stage.deltaV'; also 'stage.thrust' and 'stage.burntime'
+        for propulsive stages when the design gives maxG or gRange
+      'gradients' - dict of result label to array of partial derivatives
+    """
+    stageorder = design['stageorder']
+    stages = design['stages']
+    nstages = len(stageorder)
+    inputs = [ '%s.%s' % (name, field)
+        for field in STAGEINPUTS for name in stageorder ] + ['minG', 'maxG']
+    ninputs = len(inputs)
+    MWET, MDRY, ISP = 0, nstages, 2 * nstages
+    MING, MAXG = 3 * nstages, 3 * nstages + 1
+    try:
+        minG, maxG = propel.grange(design)
+    except KeyError:
+        minG = maxG = None
+
+    values = {}
+    gradients = {}
+    total = 0.0
+    dtotal = np.zeros(ninputs)
+    Mignite = 0.0
+    for nx in range(nstages - 1, -1, -1):
+        name = stageorder[nx]
+        stage = stages[name]
+        Mwet = stage['Mwet']
+        Mdry = stage['Mdry']
+        Isp = stage['Isp']
+        Mignite += Mwet
+        Mburnout = Mignite - (Mwet - Mdry)
+        Mpropel = Mwet - Mdry
+
+        # ignition mass is the sum of Mwet of this and all upper stages
+        dMignite = np.zeros(ninputs)
+        dMignite[MWET + nx:MWET + nstages] = 1.0
+        dMburnout = dMignite.copy()
+        dMburnout[MWET + nx] = 0.0
+        dMburnout[MDRY + nx] = 1.0
+
+        ve = Isp * gEarth
+        logratio = math.log(Mignite / Mburnout)
+        deltaV = ve * logratio
+        ddeltaV = ve * (dMignite / Mignite - dMburnout / Mburnout)
+        ddeltaV[ISP + nx] += gEarth * logratio
+        values[name + '.deltaV'] = deltaV
+        gradients[name + '.deltaV'] = ddeltaV
+        total += deltaV
+        dtotal += ddeltaV
+
+        if maxG is None or Isp <= 0 or Mpropel <= 0:
+            continue
+        thrust_init = Mignite * gEarth * minG
+        thrust_fini = Mburnout * gEarth * maxG
+        if thrust_init < thrust_fini:
+            thrust = thrust_fini
+            dthrust = gEarth * maxG * dMburnout
+            dthrust[MAXG] += gEarth * Mburnout
+        else:
+            thrust = thrust_init
+            dthrust = gEarth * minG * dMignite
+            dthrust[MING] += gEarth * Mignite
+        burntime = Mpropel * ve / thrust
+        dburntime = -burntime / thrust * dthrust
+        dburntime[MWET + nx] += ve / thrust
+        dburntime[MDRY + nx] -= ve / thrust
+        dburntime[ISP + nx] += Mpropel * gEarth / thrust
+        values[name + '.thrust'] = thrust
+        gradients[name + '.thrust'] = dthrust
+        values[name + '.burntime'] = burntime
+        gradients[name + '.burntime'] = dburntime
+
+    values['totalDeltaV'] = total
+    gradients['totalDeltaV'] = dtotal
+    return { 'inputs': inputs, 'values': values, 'gradients': gradients }
+
+def partials(sens, result):
+    """Partial derivatives of one result of sensitivities(), as a dict
+    of input label to derivative."""
+    return dict(zip(sens['inputs'], sens['gradients'][result].tolist()))
+
+# vim: set sw=4 tw=80 :
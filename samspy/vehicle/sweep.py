@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Parameter sweeps (trade studies) over launch vehicle designs.
+* Expand ranges of design fields lazily into a Cartesian product.
+* Evaluate each point with multistage and propel, over a process pool,
+  yielding results in sweep order.
+
+A sweep specification gives ranges for stage fields under 'stages',
+and for design-level fields (e.g. maxG) under 'design':
+
+    stages:
+        Proto LV-1:
+            Mwet: { start: 16000.0, stop: 20000.0, num: 5 }
+            mixture: [ lox-rp1, lox-lch4 ]
+    design:
+        maxG: { start: 2.5, stop: 4.0, step: 0.5 }
+
+A range is a list of values, or a dict with 'start', 'stop' and either
+'num' (evenly spaced, both ends included) or 'step'.
+"""
+
+import itertools
+import multiprocessing
+import os
+from collections import deque
+
+from samspy.vehicle import multistage, propel
+
+def values(spec):
+    """Expand one range specification into a list of values."""
+    if not isinstance(spec, dict):
+        return list(spec)
+    start = spec['start']
+    stop = spec['stop']
+    if 'num' in spec:
+        num = int(spec['num'])
+        if num == 1:
+            return [start]
+        step = (stop - start) / (num - 1)
+    else:
+        step = spec['step']
+        num = int(round((stop - start) / step)) + 1
+    return [ start + n*step for n in range(num) ]
+
+def axes(sweepspec):
+    """List the sweep axes as (label, path, values).
+    The path is (stage name, field) for stage fields, (field,) for
+    design-level fields.
+    """
+    result = []
+    for stagename, fields in sweepspec.get('stages', {}).items():
+        for field, spec in fields.items():
+            result.append(('%s.%s' % (stagename, field),
+                (stagename, field), values(spec)))
+    for field, spec in sweepspec.get('design', {}).items():
+        result.append((field, (field,), values(spec)))
+    return result
+
+def points(sweepaxes):
+    """Lazily generate the Cartesian product of the axis values."""
+    return itertools.product(*[ vals for label, path, vals in sweepaxes ])
+
+def npoints(sweepaxes):
+    """Number of points in the sweep."""
+    count = 1
+    for label, path, vals in sweepaxes:
+        count *= len(vals)
+    return count
+
+def apply(base, sweepaxes, point):
+    """Return a copy of design 'base' with one sweep point applied.
+    Only the design and stage dicts are copied; the base is untouched.
+    """
+    design = dict(base)
+    stages = dict((s, dict(info)) for s, info in base['stages'].items())
+    design['stages'] = stages
+    for (label, path, vals), value in zip(sweepaxes, point):
+        if len(path) == 2:
+            stages[path[0]][path[1]] = value
+        else:
+            design[path[0]] = value
+    return design
+
+def evaluate(design, propeldb):
+    """Evaluate one design: staging performance, then propellant
+    volumes and flows of each propulsive stage.
+    Returns an ordered dict of result columns.
+    """
+    perf = multistage.performance(design)
+    stages = design['stages']
+    gRange = propel.grange(design)
+
+    row = { 'totalDeltaV': perf['totalDeltaV'] }
+    for stagename in design['stageorder']:
+        stageperf = perf[stagename]
+        row[stagename + '.Mignite'] = stageperf['Mignite']
+        row[stagename + '.deltaV'] = stageperf['deltaV']
+        Mpropel = stageperf['Mignite'] - stageperf['Mburnout']
+        if stageperf['Isp'] == 0 or Mpropel <= 0:
+            continue
+        pplt = propel.deduce(propeldb, stages[stagename]['mixture'],
+            Mpropel)
+        stageperf = dict(stageperf, gRange=gRange)
+        stageflows, report = propel.flows(pplt, stageperf)
+        row[stagename + '.volume'] = sum(pplt['volumes'])
+        row[stagename + '.thrust'] = stageflows['thrust']
+        row[stagename + '.burntime'] = stageflows['burntime_min']
+    return row
+
+# Pool workers hold the base design and propellant data, so only sweep
+# points travel to them.
+_worker = {}
+
+def _initworker(base, sweepaxes, propeldb):
+    "Set up process pool worker state."
+    _worker['base'] = base
+    _worker['axes'] = sweepaxes
+    _worker['propeldb'] = propeldb
+
+def _evalpoint(point):
+    "Evaluate one sweep point in a pool worker."
+    sweepaxes = _worker['axes']
+    design = apply(_worker['base'], sweepaxes, point)
+    row = dict((label, value)
+        for (label, path, vals), value in zip(sweepaxes, point))
+    row.update(evaluate(design, _worker['propeldb']))
+    return row
+
+def sweep(base, propeldb, sweepspec, processes=None, chunksize=256):
+    """Evaluate a parameter sweep around design 'base'.
+      propeldb - propellant data source
+      sweepspec - sweep specification (see module docstring)
+      processes - pool size; None for one per CPU, 1 to run in-process
+      chunksize - sweep points handed to a worker at a time
+    Yields a row (dict of swept values and results) per point, in sweep
+    order.  Points are generated lazily and at most two blocks of
+    chunksize*processes points are in flight, so memory stays bounded.
+    """
+    sweepaxes = axes(sweepspec)
+    todo = points(sweepaxes)
+    initargs = (base, sweepaxes, propeldb)
+
+    if processes == 1:
+        _initworker(*initargs)
+        for point in todo:
+            yield _evalpoint(point)
+        return
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    blocksize = chunksize * processes
+    with multiprocessing.Pool(processes, _initworker, initargs) as pool:
+        pending = deque()
+        while True:
+            block = list(itertools.islice(todo, blocksize))
+            if block:
+                pending.append(pool.map_async(_evalpoint, block, chunksize))
+            if not pending:
+                break
+            if len(pending) > 1 or not block:
+                for row in pending.popleft().get():
+                    yield row
+
+# vim: set sw=4 tw=80 :
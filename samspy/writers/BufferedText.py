@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Buffered text formatters for SamsPy reports.
+Output is the same as Text, character for character, but each row is
+formatted by a single '%' operation on a template compiled once per
+(labelfmt, fmt, number of items), and rows collect in a buffer that is
+written out in chunks of about 'bufsize' characters.
+"""
+
+from samspy.writers.Text import Text
+
+class BufferedText(Text):
+    """Buffered text formatters class.
+    Call flush() (or use the writer as a context manager) when done;
+    output still in the buffer is not written otherwise.
+    As with Text, data items must not be tuples.
+    """
+
+    def __init__(self, outstrm, bufsize=1<<16):
+        """Buffered text output formatters.
+        outstrm is opened stream to use for output.
+        """
+        Text.__init__(self, outstrm)
+        self.bufsize = bufsize
+        self.buffer = []
+        self.buffered = 0
+        self.templates = {}
+
+    def template(self, labelfmt, fmt, arity):
+        """Row template of a label and 'arity' items."""
+        key = (labelfmt, fmt, arity)
+        template = self.templates.get(key)
+        if template is None:
+            template = "    " + labelfmt + (' ' + fmt) * arity + '\n'
+            self.templates[key] = template
+        return template
+
+    def put(self, text):
+        """Add text to the buffer, writing the buffer out when full."""
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.bufsize:
+            self.flush()
+
+    def putitem(self, item):
+        """Write a single item to output stream.
+        """
+        self.put(item + '\n')
+
+    def putfmtrow(self, label, fmt, datalist, labelfmt="%-24s"):
+        """Write a report row with label, format, datalist.
+        All labels have a common width.
+        """
+        row = (label,) + tuple(datalist)
+        template = self.templates.get((labelfmt, fmt, len(row) - 1))
+        if template is None:
+            template = self.template(labelfmt, fmt, len(row) - 1)
+        line = template % row
+        self.buffer.append(line)
+        self.buffered += len(line)
+        if self.buffered >= self.bufsize:
+            self.flush()
+
+    def flush(self):
+        """Write out the buffer."""
+        if self.buffer:
+            self.outstrm.write(''.join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, excval, tb):
+        self.flush()
+        return False
+
+# vim: set sw=4 tw=80 :
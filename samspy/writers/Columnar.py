@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+
+"""Columnar writers for bulk results (sweeps, Monte Carlo).
+Results go out in blocks, each a dict of column name to array (write())
+or a list of row dicts (writerows()); only the current block is held in
+memory.  The first block fixes the columns and their types: numbers are
+stored as float64, strings as fixed width unicode of 'strwidth'
+characters.  Values missing from a block are NaN (or empty strings).
+
+Backends, by format name and file extension:
+* csv (.csv, or any other extension) -- text, one row per result;
+  may go to stdout
+* npy (.npy) -- one NumPy structured array, one field per column;
+  the header is rewritten with the final length on close
+* npz (.npz) -- one NumPy array per column, uncompressed
+* raw (.raw) -- a directory of one raw binary file per column, with the
+  names, types and length in 'columns.json'
+
+load() reads any of them back as a dict of column arrays; npy and raw
+files are memory-mapped rather than read.
+"""
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+import numpy as np
+
+FORMATS = ('csv', 'npy', 'npz', 'raw')
+RAWINDEX = 'columns.json'
+COPYSIZE = 1 << 20
+
+def formatof(path, fmt=None):
+    """Format name given explicitly, else by the extension of 'path':
+    csv for stdout and unknown extensions, raw for directories."""
+    if fmt is None:
+        if path is None or path == '-':
+            return 'csv'
+        if os.path.isdir(path):
+            return 'raw'
+        fmt = os.path.splitext(path.rstrip('/'))[1][1:].lower()
+        return fmt if fmt in FORMATS else 'csv'
+    if fmt not in FORMATS:
+        raise ValueError("unknown output format %r; choose from %s"
+            % (fmt, ', '.join(FORMATS)))
+    return fmt
+
+def npyheader(dtype, count, size=None):
+    """NumPy .npy (version 1.0) header of a 1-d array of 'count' items.
+    'size' pads the header to a fixed length, so that it can be
+    rewritten in place with a larger count; by default, it is padded
+    only to the required alignment.
+    """
+    text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        np.lib.format.dtype_to_descr(np.dtype(dtype)), count)
+    if size is None:
+        size = -(-(len(text) + 11) // 64) * 64
+    text = text.ljust(size - 11) + '\n'
+    if len(text) + 10 != size or len(text) > 0xffff:
+        raise ValueError("npy header does not fit")
+    return b'\x93NUMPY\x01\x00' + len(text).to_bytes(2, 'little') + \
+        text.encode('latin1')
+
+class ColumnWriter:
+    """Columnar writer base class.
+    Backends provide start() (columns known), putblock() and finish().
+    """
+
+    def __init__(self, path, strwidth=64):
+        """ColumnWriter constructor.
+        path : output file name
+        strwidth : width of string columns, in characters
+        """
+        self.path = path
+        self.strwidth = strwidth
+        self.columns = None
+        self.dtypes = None
+        self.count = 0
+
+    def setcolumns(self, block):
+        """Fix columns and types from the first block."""
+        self.columns = list(block)
+        self.dtypes = []
+        for name in self.columns:
+            kind = np.asarray(block[name]).dtype.kind
+            if kind in 'biuf':
+                self.dtypes.append(np.dtype('<f8'))
+            elif kind in 'USO':
+                self.dtypes.append(np.dtype('<U%d' % self.strwidth))
+            else:
+                raise ValueError("column %r: cannot store %s values"
+                    % (name, np.asarray(block[name]).dtype))
+        self.start()
+
+    def checkcolumns(self, names):
+        """Raise ValueError for names not among the columns."""
+        extra = set(names) - set(self.columns)
+        if extra:
+            raise ValueError("columns %s not in the first block"
+                % sorted(extra))
+
+    def write(self, block):
+        """Write a block: dict of column name to array (or scalar)."""
+        if self.columns is None:
+            self.setcolumns(block)
+        else:
+            self.checkcolumns(block)
+        count = max([ np.size(v) for v in block.values() ] + [0])
+        arrays = []
+        for name, dtype in zip(self.columns, self.dtypes):
+            fill = np.nan if dtype.kind == 'f' else ''
+            value = np.asarray(block.get(name, fill))
+            if dtype.kind == 'U' and value.dtype.kind == 'U' and \
+                    value.dtype.itemsize > dtype.itemsize:
+                raise ValueError("column %r: strings over %d characters"
+                    % (name, self.strwidth))
+            arrays.append(np.broadcast_to(value.astype(dtype), (count,)))
+        self.putblock(arrays, count)
+        self.count += count
+
+    def writerows(self, rows):
+        """Write a block given as a list of row dicts."""
+        if not rows:
+            return
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        if self.columns is not None:
+            self.checkcolumns(names)
+            names = self.columns
+        block = {}
+        for name in names:
+            column = [ row.get(name) for row in rows ]
+            if None in column:
+                fill = np.nan
+                for value in column:
+                    if isinstance(value, str):
+                        fill = ''
+                        break
+                column = [ fill if v is None else v for v in column ]
+            block[name] = column
+        self.write(block)
+
+    def close(self):
+        """Finish the output."""
+        if self.columns is None:
+            self.setcolumns({})
+        self.finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, excval, tb):
+        self.close()
+        return False
+
+class CSVWriter(ColumnWriter):
+    """CSV columnar writer; 'path' None or '-' writes to stdout.
+    Missing and NaN values are written as empty fields.
+    """
+
+    def start(self):
+        if self.path is None or self.path == '-':
+            self.fh = sys.stdout
+        else:
+            self.fh = open(self.path, 'w', newline='')
+        self.csvout = csv.writer(self.fh)
+        self.csvout.writerow(self.columns)
+
+    def putblock(self, arrays, count):
+        columns = [ [ '' if v != v else v for v in a.tolist() ]
+            for a in arrays ]
+        self.csvout.writerows(zip(*columns))
+
+    def writerows(self, rows):
+        """Write row dicts as they are, without conversion to columns."""
+        if not rows:
+            return
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        if self.columns is None:
+            self.columns = names
+            self.start()
+        else:
+            self.checkcolumns(names)
+        names = self.columns
+        self.csvout.writerows([ [ row.get(name, '') for name in names ]
+            for row in rows ])
+        self.count += len(rows)
+
+    def finish(self):
+        if self.fh is sys.stdout:
+            self.fh.flush()
+        else:
+            self.fh.close()
+
+class NPYWriter(ColumnWriter):
+    """NumPy .npy writer of one structured array, one field per column.
+    """
+
+    # header room for any count
+    MAXCOUNT = 10**19
+
+    def start(self):
+        self.dtype = np.dtype(list(zip(self.columns, self.dtypes)))
+        self.hsize = len(npyheader(self.dtype, self.MAXCOUNT))
+        self.fh = open(self.path, 'wb')
+        self.fh.write(npyheader(self.dtype, 0, self.hsize))
+
+    def putblock(self, arrays, count):
+        records = np.empty(count, dtype=self.dtype)
+        for name, array in zip(self.columns, arrays):
+            records[name] = array
+        self.fh.write(records.tobytes())
+
+    def finish(self):
+        self.fh.seek(0)
+        self.fh.write(npyheader(self.dtype, self.count, self.hsize))
+        self.fh.close()
+
+class RawWriter(ColumnWriter):
+    """Directory of raw binary column files with a JSON index.
+    """
+
+    def start(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.files = [ 'col%04d.bin' % nx for nx in range(len(self.columns)) ]
+        self.fhs = [ open(os.path.join(self.path, f), 'wb')
+            for f in self.files ]
+
+    def putblock(self, arrays, count):
+        for fh, array in zip(self.fhs, arrays):
+            fh.write(np.ascontiguousarray(array).tobytes())
+
+    def finish(self):
+        for fh in self.fhs:
+            fh.close()
+        index = { 'count': self.count, 'columns': [
+            { 'name': name, 'file': f, 'dtype': dtype.str }
+            for name, f, dtype in zip(self.columns, self.files, self.dtypes) ]}
+        with open(os.path.join(self.path, RAWINDEX), 'w') as fh:
+            json.dump(index, fh, indent=1)
+
+class NPZWriter(RawWriter):
+    """NumPy .npz writer, one array per column.
+    Columns stream to raw files in a scratch directory beside 'path',
+    and are copied into the archive on close.
+    """
+
+    def __init__(self, path, strwidth=64):
+        RawWriter.__init__(self, path, strwidth)
+        self.npzpath = path
+
+    def start(self):
+        self.path = tempfile.mkdtemp(prefix='.npz-',
+            dir=os.path.dirname(os.path.abspath(self.npzpath)))
+        RawWriter.start(self)
+
+    def finish(self):
+        for fh in self.fhs:
+            fh.close()
+        try:
+            with zipfile.ZipFile(self.npzpath, 'w', zipfile.ZIP_STORED,
+                    allowZip64=True) as zf:
+                for name, f, dtype in zip(self.columns, self.files,
+                        self.dtypes):
+                    with zf.open(name + '.npy', 'w', force_zip64=True) as dst, \
+                            open(os.path.join(self.path, f), 'rb') as src:
+                        dst.write(npyheader(dtype, self.count))
+                        shutil.copyfileobj(src, dst, COPYSIZE)
+        finally:
+            shutil.rmtree(self.path)
+
+WRITERS = { 'csv': CSVWriter, 'npy': NPYWriter, 'npz': NPZWriter,
+    'raw': RawWriter }
+
+def columnwriter(path, fmt=None, strwidth=64):
+    """Open a columnar writer for 'path', in format 'fmt' (by default,
+    chosen by the extension of 'path')."""
+    fmt = formatof(path, fmt)
+    if fmt != 'csv' and (path is None or path == '-'):
+        raise ValueError("%s output needs a file name" % fmt)
+    return WRITERS[fmt](path, strwidth)
+
+def load(path, fmt=None):
+    """Read columnar results back as a dict of column name to array.
+    npy and raw results are memory-mapped, read only; CSV values are
+    parsed as floats where possible (empty fields as NaN).
+    """
+    fmt = formatof(path, fmt)
+    if fmt == 'npy':
+        records = np.load(path, mmap_mode='r')
+        return dict((name, records[name]) for name in records.dtype.names)
+    if fmt == 'npz':
+        with np.load(path) as arrays:
+            return dict((name, arrays[name]) for name in arrays.files)
+    if fmt == 'raw':
+        with open(os.path.join(path, RAWINDEX)) as fh:
+            index = json.load(fh)
+        count = index['count']
+        columns = {}
+        for column in index['columns']:
+            dtype = np.dtype(column['dtype'])
+            if count:
+                columns[column['name']] = np.memmap(os.path.join(path,
+                    column['file']), dtype=dtype, mode='r', shape=(count,))
+            else:
+                columns[column['name']] = np.empty(0, dtype=dtype)
+        return columns
+
+    with open(path, newline='') as fh:
+        rows = csv.reader(fh)
+        names = next(rows)
+        values = list(zip(*rows)) or [ () for name in names ]
+    columns = {}
+    for name, column in zip(names, values):
+        try:
+            columns[name] = np.array([ float(v) if v else np.nan
+                for v in column ])
+        except ValueError:
+            columns[name] = np.array(column)
+    return columns
+
+# vim: set sw=4 tw=80 :
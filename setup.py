@@ -36,8 +36,8 @@ setup(
         'Programming Language :: Python :: 3.6',
     ],
     keywords='aerospace propulsion rocket-engines',
-    packages=find_packages(exclude=['contrib', 'docs', 'tests']),
-    install_requires=['PyYAML'],
+    packages=find_packages(exclude=['contrib', 'docs', 'tests', 'benchmarks']),
+    install_requires=['PyYAML', 'numpy'],
 
     # Example data files
     package_data={
@@ -48,6 +48,10 @@ setup(
     entry_points={
         'console_scripts': [
             'lvbasic=samspy.cmds.lvbasic:main',
+            'lvsweep=samspy.cmds.lvsweep:main',
+            'lvmc=samspy.cmds.lvmc:main',
+            'lvserve=samspy.cmds.lvserve:main',
+            'sto=samspy.cmds.sto:main',
         ],
     },
 )
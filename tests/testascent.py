@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import math
+
+import numpy as np
+
+from samspy.traj import ascent, integrate
+
+from testpropel import propellantdata
+from testsweep import design
+
+def testIntegrateOscillator():
+    "Adaptive integration and dense output of a harmonic oscillator."
+    def rhs(t, y, out):
+        out[0] = y[1]
+        out[1] = -y[0]
+    store = integrate.Trajectory(2, capacity=4)
+    t, y, hit = integrate.dopri5(rhs, 0.0, [1.0, 0.0], 10.0, store,
+        rtol=1.0e-10, atol=1.0e-12)
+    assert t == 10.0 and not hit
+    assert abs(y[0] - math.cos(10.0)) < 1.0e-8
+    times = np.linspace(0.0, 10.0, 101)
+    assert np.abs(store.sample(times)[:, 0] - np.cos(times)).max() < 1.0e-6
+    t, y, hit = integrate.dopri5(rhs, 0.0, [1.0, 0.0], 10.0,
+        event=lambda t, y: y[0])
+    assert hit and abs(t - math.pi/2) < 1.0e-6
+
+def testAscentStaging():
+    "Stages burn out on schedule at their burnout masses."
+    flight = ascent.Ascent(design(), propellantdata)
+    result = flight.fly()
+    burnouts = [ (t, name) for t, name in result.events
+        if name.startswith('burnout') ]
+    assert len(burnouts) == 3
+    tburn = 0.0
+    for (t, name), burn in zip(burnouts, flight.burns):
+        stagename, Mignite, Mburnout, thrust, mflow = burn
+        tburn += (Mignite - Mburnout) / mflow
+        assert abs(t - tburn) < 1.0e-9
+        before = result.sample([t - 1.0e-6])[0]
+        assert abs(before[4] - Mburnout) < 1.0e-3
+    final = result.final()
+    assert result.altitude(final) > 100.0e3
+    assert result.speed(final) > 3000.0
+
+def testAscentImpact():
+    "A steep kick with a long coast ends at impact."
+    flight = ascent.Ascent(design(), propellantdata, kick=(5.0, 20.0, 30.0),
+        cd=1.0, area=5.0)
+    result = flight.fly(coast=20000.0)
+    t, name = result.events[-1]
+    assert name == 'impact'
+    assert abs(result.altitude(result.final())) < 1.0
+    # dense output passes through the steps (away from staging)
+    steps = result.t
+    single = np.flatnonzero((np.diff(steps[:-1]) > 0) &
+        (np.diff(steps[1:]) > 0)) + 1
+    assert np.allclose(result.sample(steps[single]), result.state[single])
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import numpy as np
+
+import samspy.traj.atmosphere as atmosphere
+
+def testAtmosphereReference():
+    "Reference values of the 1976 standard atmosphere."
+    T, P, rho = atmosphere.properties([0.0, 11019.1, 20063.1])
+    assert np.allclose(T, [288.15, 216.65, 216.65], atol=1.0e-3)
+    assert np.allclose(P, [101325.0, 22632.06, 5474.889], rtol=1.0e-5)
+    assert abs(rho[0] - 1.225) < 1.0e-4
+
+def testAtmosphereTable():
+    "Table lookup agrees with the analytic model."
+    z = np.random.default_rng(3).uniform(-900.0, 120000.0, 100000)
+    want = atmosphere.analytic(z)
+    got = atmosphere.properties(z)
+    for w, g, tol in zip(want, got, (1.0e-12, 1.0e-8, 1.0e-8)):
+        assert np.abs(g / w - 1.0).max() < tol
+    for alt in z[:100]:
+        assert abs(atmosphere.density_at(alt) /
+            atmosphere.density(alt) - 1.0) < 1.0e-12
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import os
+import tempfile
+
+import numpy as np
+
+from samspy.writers import Columnar
+
+def testColumnarRoundTrip():
+    "Blocks and rows written in each format load back the same."
+    rng = np.random.default_rng(6)
+    blocks = [ { 'totalDeltaV': rng.uniform(8000.0, 9000.0, 1000),
+        'stage.burntime': rng.uniform(100.0, 200.0, 1000) }
+        for n in range(3) ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for fmt in Columnar.FORMATS:
+            path = os.path.join(tmpdir, 'mc.' + fmt)
+            with Columnar.columnwriter(path) as writer:
+                for block in blocks:
+                    writer.write(block)
+            got = Columnar.load(path)
+            assert list(got) == list(blocks[0])
+            for name in blocks[0]:
+                want = np.concatenate([ b[name] for b in blocks ])
+                assert np.array_equal(got[name], want)
+                if fmt in ('npy', 'raw'):
+                    assert isinstance(got[name], np.memmap)
+
+def testColumnarRows():
+    "Sweep-style rows: strings, and values missing from some rows."
+    rows = [ { 'mixture': 'lox-rp1', 'maxG': 3, 'stage.volume': 12.5 },
+        { 'mixture': 'lox-lh2', 'maxG': 3.5 } ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for fmt in Columnar.FORMATS:
+            path = os.path.join(tmpdir, 'sweep.' + fmt)
+            with Columnar.columnwriter(path) as writer:
+                writer.writerows(rows[:1])
+                writer.writerows(rows[1:])
+            got = Columnar.load(path)
+            assert list(got['mixture']) == ['lox-rp1', 'lox-lh2']
+            assert list(got['maxG']) == [3.0, 3.5]
+            assert got['stage.volume'][0] == 12.5
+            assert np.isnan(got['stage.volume'][1])
+        with open(os.path.join(tmpdir, 'sweep.csv')) as fh:
+            assert fh.read().splitlines() == ['mixture,maxG,stage.volume',
+                'lox-rp1,3,12.5', 'lox-lh2,3.5,']
+        empty = os.path.join(tmpdir, 'empty.npy')
+        Columnar.columnwriter(empty).close()
+        assert np.load(empty).shape == (0,)
+
+def testColumnarNewColumns():
+    "Every format rejects columns not in the first block, as rows too."
+    first = { 'totalDeltaV': [8500.0], 'mixture': ['lox-rp1'] }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for fmt in Columnar.FORMATS:
+            for method, later in (('write', { 'maxG': [3.0] }),
+                    ('writerows', [ { 'totalDeltaV': 8600.0,
+                        'maxG': 3.0 } ])):
+                path = os.path.join(tmpdir, '%s-%s.%s' % (method, fmt, fmt))
+                with Columnar.columnwriter(path) as writer:
+                    writer.write(first)
+                    try:
+                        getattr(writer, method)(later)
+                    except ValueError:
+                        pass
+                    else:
+                        assert False, "%s %s took a new column" % (fmt,
+                            method)
+                assert list(Columnar.load(path)['totalDeltaV']) == [8500.0]
+
+# vim: set sw=4 tw=80 :
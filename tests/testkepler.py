@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import numpy as np
+
+import samspy.traj.kepler as kepler
+import samspy.traj.orbit as orbit
+
+from testorbit import muEarth, leo_r, geo_r, sto
+
+def testSolveKepler():
+    "Kepler's equation residual at rounding level."
+    rng = np.random.default_rng(4)
+    M = rng.uniform(-20.0, 20.0, 100000)
+    ecc = rng.uniform(0.0, 0.99, 100000)
+    E = kepler.solve_kepler(M, ecc)
+    assert np.abs(E - ecc*np.sin(E) - M).max() < 1.0e-12
+    assert kepler.solve_kepler(0.0, 0.5) == 0.0
+
+def testPropagateApsides():
+    "Periapsis at t = 0 and apoapsis at half period."
+    pos, vel = kepler.propagate(sto, [0.0, sto.period / 2])
+    assert np.allclose(pos[0], [sto.periapsis, 0.0])
+    assert np.allclose(pos[1], [-sto.apoapsis, 0.0], atol=1.0e-6)
+    assert abs(vel[0, 1] - sto.velo(sto.periapsis)) < 1.0e-12
+    assert abs(vel[1, 1] + sto.velo(sto.apoapsis)) < 1.0e-12
+
+def testPropagateMany():
+    "Energy and angular momentum are conserved over a day."
+    rng = np.random.default_rng(5)
+    peri = leo_r + rng.uniform(0.0, 1000.0, 1000)
+    orbits = orbit.OrbitArray(peri=peri, apo=peri + rng.uniform(0.0,
+        geo_r, 1000), mu=muEarth)
+    orbits.fill_params()
+    times = np.linspace(0.0, 86400.0, 97)
+    pos, vel = kepler.propagate(orbits, times)
+    assert pos.shape == (1000, 97, 2)
+    r = np.hypot(pos[..., 0], pos[..., 1])
+    energy = 0.5 * (vel**2).sum(axis=-1) - muEarth / r
+    want = -muEarth / (2.0 * orbits.semimaj[:, None])
+    assert np.abs(energy / want - 1.0).max() < 1.0e-10
+    momentum = pos[..., 0]*vel[..., 1] - pos[..., 1]*vel[..., 0]
+    assert np.abs(momentum / momentum[:, :1] - 1.0).max() < 1.0e-10
+
+    # per-orbit times
+    pos1, vel1 = kepler.propagate(orbits, times[None, 5:6] +
+        np.zeros((1000, 1)), shared=False)
+    assert np.allclose(pos1[:, 0], pos[:, 5])
+
+# vim: set sw=4 tw=80 :
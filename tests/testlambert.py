@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import math
+
+import numpy as np
+
+import samspy.traj.lambert as lambert
+import samspy.traj.orbit as orbit
+
+from testorbit import muEarth, leo_r, geo_r
+
+def testLambert():
+    "Curtis example 5.2, alone and broadcast over a batch."
+    r1 = [5000.0, 10000.0, 2100.0]
+    r2 = [-14600.0, 2500.0, 7000.0]
+    v1, v2 = lambert.lambert(r1, r2, 3600.0, muEarth)
+    assert np.allclose(v1, [-5.9925, 1.9254, 3.2456], atol=1.0e-4)
+    assert np.allclose(v2, [-3.3125, -4.1966, -0.38529], atol=1.0e-4)
+    v1s, v2s = lambert.lambert(np.tile(r1, (4, 1)), r2,
+        np.full(4, 3600.0), muEarth)
+    assert v1s.shape == (4, 3)
+    assert np.allclose(v1s, v1, rtol=0, atol=1.0e-12)
+
+def testLambertArc():
+    "Quarter of a circular orbit gives circular velocity."
+    period = 2.0 * math.pi * math.sqrt(leo_r**3 / muEarth)
+    v1, v2 = lambert.lambert([leo_r, 0.0], [0.0, leo_r], period / 4,
+        muEarth)
+    vcirc = math.sqrt(muEarth / leo_r)
+    assert np.allclose(v1, [0.0, vcirc], atol=1.0e-9)
+    assert np.allclose(v2, [-vcirc, 0.0], atol=1.0e-9)
+
+def testLambertSingular():
+    "Transfers through (nearly) 180 degrees give NaN, others do not."
+    angles = math.pi + np.array([0.0, 1.0e-7, -1.0e-7, 0.1])
+    r2 = geo_r * np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+    v1, v2 = lambert.lambert([leo_r, 0.0], r2, 5.0 * 3600, muEarth)
+    assert np.isnan(v1[:3]).all() and np.isnan(v2[:3]).all()
+    assert np.isfinite(v1[3]).all() and np.isfinite(v2[3]).all()
+
+def testPorkchop():
+    "LEO to GEO grid: best transfer approaches Hohmann; pool matches."
+    leo = orbit.Elliptical(mu=muEarth).set_circular(leo_r)
+    geo = orbit.Elliptical(mu=muEarth).set_circular(geo_r)
+    departures = np.linspace(0.0, 86164.0, 61)
+    tofs = np.linspace(3.0 * 3600, 8.0 * 3600, 41)
+    grid = lambert.porkchop(leo, geo, departures, tofs, processes=1,
+        rows=16)
+    assert grid['total'].shape == (61, 41)
+    hohmann = orbit.Elliptical(apo=geo_r, peri=leo_r, mu=muEarth)
+    best = (hohmann.velo(leo_r) - leo.velo(leo_r)) + \
+        (geo.velo(geo_r) - hohmann.velo(geo_r))
+    assert best <= np.nanmin(grid['total']) < best * 1.02
+    pooled = lambert.porkchop(leo, geo, departures, tofs, processes=2,
+        rows=16)
+    assert np.array_equal(pooled['total'], grid['total'], equal_nan=True)
+
+# vim: set sw=4 tw=80 :
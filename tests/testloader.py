@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import copy
+import os
+import tempfile
+
+import yaml
+
+from samspy import loader
+
+from testmultistage import protolv
+
+def testLoaderValidate():
+    "Designs missing what staging needs are rejected."
+    assert loader.validate(protolv) is protolv
+    for change in (
+            lambda d: d.pop('stageorder'),
+            lambda d: d['stageorder'].append('LV-4'),
+            lambda d: d['stages']['payload'].pop('Isp'),
+            lambda d: d['stages']['Proto LV-1'].update(Mwet='heavy'),
+            lambda d: d['stages']['Proto LV-2'].update(Mdry=5000.0),
+            lambda d: d['stages']['Proto LV-3'].pop('mixture') ):
+        design = copy.deepcopy(protolv)
+        change(design)
+        try:
+            loader.validate(design, 'bad.yaml')
+        except ValueError as exc:
+            assert str(exc).startswith('bad.yaml: ')
+        else:
+            assert False, "invalid design accepted"
+
+def testLoaderDesignCache():
+    "Cached designs follow changes of the source file."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ['SAMSPY_CACHE'] = os.path.join(tmpdir, 'cache')
+        try:
+            source = os.path.join(tmpdir, 'vehicle.yaml')
+            with open(source, 'w') as fh:
+                yaml.safe_dump(protolv, fh)
+            assert loader.loaddesign(source) == protolv
+            assert os.listdir(os.environ['SAMSPY_CACHE'])
+            assert loader.loaddesign(source) == protolv
+            assert loader.loaddesign(source, usecache=False) == protolv
+            changed = copy.deepcopy(protolv)
+            changed['stages']['payload']['Mwet'] = 500.0
+            changed['stages']['payload']['Mdry'] = 500.0
+            with open(source, 'w') as fh:
+                yaml.safe_dump(changed, fh)
+            assert loader.loaddesign(source) == changed
+        finally:
+            del os.environ['SAMSPY_CACHE']
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import contextlib
+import copy
+import io
+import os
+import tempfile
+
+import yaml
+
+from samspy.cmds import lvbasic
+
+from testmultistage import protolv
+
+SHARE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'samspy', 'share')
+
+def testBasicPartialReport():
+    "Rows reported before a failure are written out, in order."
+    design = copy.deepcopy(protolv)
+    design['stages']['Proto LV-2']['mixture'] = 'lox-unobtainium'
+    os.environ['SAMSPY_CACHE'] = ''
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            vehicle = os.path.join(tmpdir, 'vehicle.yaml')
+            with open(vehicle, 'w') as fh:
+                yaml.safe_dump(design, fh)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out), \
+                    contextlib.redirect_stderr(io.StringIO()):
+                try:
+                    lvbasic.main(['lvbasic', vehicle,
+                        os.path.join(SHARE, 'propellants.yaml')])
+                except KeyError:
+                    pass
+                else:
+                    assert False, "expected KeyError"
+    finally:
+        del os.environ['SAMSPY_CACHE']
+    lines = out.getvalue().splitlines()
+    assert lines[0] == 'Performance summary'
+    assert '  Stage: Proto LV-1' in lines
+    assert '  Stage: Proto LV-2' not in lines
+    assert lines[-1].startswith('    deltaV (m/s, ft/s)')
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import copy
+import json
+
+import samspy.vehicle.multistage as multistage
+from samspy.cmds.lvserve import Evaluator, serve
+from samspy.vehicle.propeldb import PropellantDB
+
+from testmultistage import protolv, eps12
+from testpropel import propellantdata
+
+def lhdesign():
+    "Prototype vehicle on a mixture in the test propellant data."
+    design = copy.deepcopy(protolv)
+    for stage in design['stages'].values():
+        stage['mixture'] = 'lox-lh2'
+    return design
+
+def testServePipelined():
+    "Pipelined requests, split across reads, are answered in order."
+    design = lhdesign()
+    requests = [
+        { 'id': 1, 'design': design, 'session': 'a' },
+        { 'id': 2, 'session': 'a',
+            'update': { 'stages': { 'Proto LV-2': { 'Mwet': 4500.0 } } } },
+        { 'id': 3, 'session': 'b', 'update': {} },
+        { 'id': 4, 'design': design } ]
+    data = ''.join(json.dumps(r) + '\n' for r in requests).encode()
+    chunks = [ data[n:n+100] for n in range(0, len(data), 100) ]
+    received = iter(chunks + [b''])
+    sent = []
+    evaluator = Evaluator(PropellantDB(propellantdata))
+    serve(lambda size: next(received), sent.append, evaluator)
+    answers = [ json.loads(line)
+        for line in b''.join(sent).decode().splitlines() ]
+
+    assert [ a['id'] for a in answers ] == [1, 2, 3, 4]
+    assert [ a['ok'] for a in answers ] == [True, True, False, True]
+    assert 'no session' in answers[2]['error']
+    assert all(a['latency_us'] >= 0 for a in answers)
+    eps12(multistage.performance(design)['totalDeltaV'],
+        answers[0]['result']['totalDeltaV'])
+    assert answers[0]['result'] == answers[3]['result']
+    stage = answers[0]['result']['stages']['Proto LV-1']
+    assert stage['thrust'] > 0 and stage['volume'] > 0
+    assert 'thrust' not in answers[0]['result']['stages']['payload']
+
+    design['stages']['Proto LV-2']['Mwet'] = 4500.0
+    eps12(multistage.performance(design)['totalDeltaV'],
+        answers[1]['result']['totalDeltaV'])
+    assert len(evaluator.latencies) == 4
+
+def testServeUpdates():
+    "Stage order changes restage; failed updates change nothing."
+    design = lhdesign()
+    evaluator = Evaluator(PropellantDB(propellantdata))
+    def ask(request):
+        return json.loads(evaluator.handle(json.dumps(request)))
+    first = ask({ 'design': design, 'session': 'a' })
+    for update in (
+            { 'stages': { 'Proto LV-2': { 'Mwet': 'heavy' } } },
+            { 'stages': { 'Proto LV-2': { 'Mdry': 5000.0 } } },
+            { 'stages': { 'LV-4': { 'Mwet': 1.0 } } },
+            { 'stageorder': ['Proto LV-1', 'LV-4', 'payload'] } ):
+        assert not ask({ 'session': 'a', 'update': update })['ok']
+        again = ask({ 'session': 'a', 'update': {} })
+        assert again['result'] == first['result']
+
+    answer = ask({ 'session': 'a', 'update': {
+        'stageorder': ['Proto LV-1', 'Proto LV-3', 'payload'] } })
+    del design['stages']['Proto LV-2']
+    design['stageorder'].remove('Proto LV-2')
+    eps12(multistage.performance(design)['totalDeltaV'],
+        answer['result']['totalDeltaV'])
+    assert list(answer['result']['stages']) == design['stageorder']
+
+def testServeBadDesign():
+    "Malformed inline designs get the validation error; no session."
+    evaluator = Evaluator(PropellantDB(propellantdata))
+    def ask(request):
+        return json.loads(evaluator.handle(json.dumps(request)))
+    design = lhdesign()
+    del design['stages']['Proto LV-2']['Mdry']
+    answer = ask({ 'design': design, 'session': 'a' })
+    assert not answer['ok']
+    assert answer['error'].startswith('ValueError: design: ')
+    assert 'Mdry' in answer['error']
+    for design in ({ 'stages': {} }, [1, 2]):
+        answer = ask({ 'design': design })
+        assert answer['error'].startswith('ValueError: design: ')
+    assert 'no session' in ask({ 'session': 'a', 'update': {} })['error']
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import numpy as np
+
+import samspy.traj.maneuver as maneuver
+from samspy import deg2rad
+
+from testorbit import muEarth, earth_r, geo_r, leo_r, ito, sto, incline_rad
+
+def testStoBudget():
+    "Vectorized budget agrees with the Elliptical orbits."
+    apo = np.array([[sto.apoapsis], [geo_r], [2.0 * sto.apoapsis]])
+    incl = np.array([0.0, incline_rad, 0.5])
+    dv = maneuver.sto_budget(muEarth, leo_r, apo, geo_r, incl)
+    assert dv['total'].shape == (3, 3)
+    want = ito.planechange(sto, incline_rad)
+    assert abs(dv['sto_ito'][0, 1] - want) < 1.0e-12 * want
+    leo_v = np.sqrt(muEarth / leo_r)
+    assert abs(dv['leo_sto'][0, 0] - (sto.velo(leo_r) - leo_v)) < 1.0e-12
+
+def testGolden():
+    "Golden section search minimizes many functions at once."
+    centers = np.array([-1.0, 0.5, 3.0])
+    xmin, fmin = maneuver.golden(lambda x: (x - centers)**2 + 1.0,
+        -2.0, [1.0, 1.0, 2.0])
+    assert np.allclose(xmin, [-1.0, 0.5, 2.0], atol=1.0e-8)
+    assert np.allclose(fmin, [1.0, 1.0, 2.0])
+
+def testBestApogee():
+    "Optimum apogee is no worse than any point of a dense scan."
+    geo_sl = geo_r - earth_r
+    incl = np.array([10.0, 35.0, 36.0, 37.5, 45.0, 60.0]) * deg2rad
+    def total(apo_sl):
+        return maneuver.sto_budget(muEarth, leo_r, earth_r + apo_sl, geo_r,
+            incl)['total']
+    apo, best = maneuver.scanmin(total, geo_sl, 400000.0)
+    scan = np.linspace(geo_sl, 400000.0, 2001)[:, None]
+    assert (best <= total(scan).min(axis=0) + 1.0e-12).all()
+    # at 36 deg total deltaV peaks inside the range: the minimum is at GEO
+    assert apo[2] == geo_sl
+
+def testBestStoRange():
+    "Best STO search rejects inverted and sub-GEO ranges."
+    from samspy.cmds import sto as stocmd
+    incl = np.array([10.0])
+    apo, best = stocmd.best_sto(295.0, incl, 40000.0, 400000.0)
+    assert 40000.0 <= apo[0] <= 400000.0
+    apo, best = stocmd.best_sto(295.0, np.array([36.0]), geo_r - earth_r,
+        400000.0)
+    assert apo[0] == geo_r - earth_r and abs(best[0] - 4.4373) < 1.0e-3
+    for lo, hi in ((400000.0, 40000.0), (30000.0, 400000.0)):
+        try:
+            stocmd.best_sto(295.0, incl, lo, hi)
+        except ValueError:
+            pass
+        else:
+            assert False, "range %g:%g accepted" % (lo, hi)
+
+def testPlaneSplit():
+    "Split plane change beats all-at-apogee, and a dense scan."
+    incl = np.array([0.0, 10.0, 28.5, 51.6]) * deg2rad
+    split = maneuver.planesplit(muEarth, leo_r, geo_r, geo_r, incl)
+    budget = maneuver.sto_budget(muEarth, leo_r, geo_r, geo_r, incl)
+    assert abs(split['saved'][0]) < 1.0e-12
+    assert (split['saved'][1:] > 0.0).all()
+    assert np.allclose(budget['total'] - split['saved'], split['total'])
+    assert np.allclose(split['perigee'] + split['apogee'], incl)
+
+    # GTO from Cape Canaveral: about 2.2 deg of the change at perigee
+    assert abs(split['perigee'][2] / deg2rad - 2.2) < 0.1
+    for n in range(1, 4):
+        low_v = np.sqrt(muEarth / leo_r)
+        scan = np.linspace(0.0, incl[n], 1001)
+        gto_per_v = np.sqrt(muEarth * (2.0/leo_r - 2.0/(leo_r + geo_r)))
+        gto_apo_v = np.sqrt(muEarth * (2.0/geo_r - 2.0/(leo_r + geo_r)))
+        geo_v = np.sqrt(muEarth / geo_r)
+        dv = maneuver.burn(low_v, gto_per_v, scan) + \
+            maneuver.burn(gto_apo_v, geo_v, incl[n] - scan)
+        assert split['total'][n] <= dv.min() + 1.0e-12
+
+def testPlaneSplitGrid():
+    "Split over a grid converges in a few Newton steps, to a zero slope."
+    apo = np.linspace(geo_r, 400000.0, 200)[:, None]
+    incl = np.linspace(0.0, 90.0, 200) * deg2rad
+    split = maneuver.planesplit(muEarth, leo_r, apo, geo_r, incl)
+    few = maneuver.planesplit(muEarth, leo_r, apo, geo_r, incl, iters=8)
+    assert np.array_equal(split['perigee'], few['perigee'])
+    # golden section agrees to its (square root of epsilon) resolution
+    low_v = np.sqrt(muEarth / leo_r)
+    per_v = np.sqrt(muEarth * (2.0/leo_r - 2.0/(leo_r + apo)))
+    apo_v = np.sqrt(muEarth * (2.0/apo - 2.0/(leo_r + apo)))
+    ito_v = np.sqrt(muEarth * (2.0/apo - 2.0/(geo_r + apo)))
+    def total(perigee):
+        return maneuver.burn(low_v, per_v, perigee) + \
+            maneuver.burn(apo_v, ito_v, incl - perigee)
+    perigee, burns = maneuver.golden(total, 0.0 * incl, incl)
+    assert np.allclose(split['perigee'], perigee, rtol=0.0, atol=1.0e-7)
+    assert (total(split['perigee']) <= burns + 1.0e-12).all()
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import copy
+import threading
+
+import samspy.vehicle.multistage as multistage
+from samspy.vehicle.memo import LRUCache, Memo
+
+from testmultistage import protolv
+
+def testMemoLRU():
+    "Least recently used entries are evicted first."
+    cache = LRUCache(2)
+    assert cache.get('a', lambda: 1) == 1
+    assert cache.get('b', lambda: 2) == 2
+    assert cache.get('a', lambda: 0) == 1
+    assert cache.get('c', lambda: 3) == 3       # evicts 'b'
+    assert cache.get('b', lambda: 4) == 4       # evicts 'a'
+    assert cache.stats() == { 'hits': 1, 'misses': 4, 'evictions': 2,
+        'size': 2, 'maxsize': 2 }
+    cache.resize(1)
+    assert len(cache) == 1 and cache.get('b', lambda: 0) == 4
+
+def testMemoResults():
+    "Memoized results equal direct results, and repeat as hits."
+    memo = Memo()
+    want = multistage.performance(protolv)
+    for n in range(3):
+        assert memo.performance(protolv) == want
+    assert memo.stats()['hits'] == 2
+    # equal stage inputs share a result; results are copies
+    design = copy.deepcopy(protolv)
+    design['stages']['Proto LV-1']['Mwet'] = \
+        int(design['stages']['Proto LV-1']['Mwet'])
+    got = memo.performance(design)
+    assert got == want and memo.stats()['hits'] == 3
+    got['Proto LV-2']['deltaV'] = 0.0
+    got['totalDeltaV'] = 0.0
+    assert memo.performance(protolv) == want
+    design['stages']['Proto LV-1']['Isp'] = 300
+    assert memo.performance(design) == multistage.performance(design)
+    assert memo.stats()['size'] == 2
+
+def testMemoThreads():
+    "Threads sharing a Memo see consistent results and counts."
+    memo = Memo(maxsize=8)
+    design = copy.deepcopy(protolv)
+    want = {}
+    for n in range(16):
+        design['stages']['payload']['Mwet'] = 400.0 + n
+        want[n] = multistage.performance(design)['totalDeltaV']
+    errors = []
+    def work(offset):
+        mydesign = copy.deepcopy(protolv)
+        for k in range(200):
+            n = (k + offset) % 16
+            mydesign['stages']['payload']['Mwet'] = 400.0 + n
+            total = memo.performance(mydesign)['totalDeltaV']
+            if abs(total - want[n]) > 1.0e-9:
+                errors.append(n)
+    threads = [ threading.Thread(target=work, args=(t,)) for t in range(4) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = memo.stats()
+    assert not errors
+    calls = 4 * 200
+    assert stats['hits'] + stats['misses'] == calls
+    assert stats['size'] <= 8
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import copy
+import random
+
+import samspy.vehicle.multistage as multistage
+import samspy.vehicle.propel as propel
+from samspy.vehicle.model import DesignModel
+
+from testmultistage import protolv
+from testpropel import propellantdata
+
+def lh2design():
+    "protolv with stages burning lox-lh2, the mixture in propellantdata."
+    design = copy.deepcopy(protolv)
+    for stage in design['stages'].values():
+        stage['mixture'] = 'lox-lh2'
+    return design
+
+def testModelResults():
+    "A model gives the results of performance(), deduce() and flows()."
+    design = lh2design()
+    model = DesignModel(design, propellantdata)
+    assert model.performance() == multistage.performance(design)
+    stage = model.stageinfo('Proto LV-2')
+    pplt = propel.deduce(propellantdata, 'lox-lh2',
+        stage['Mignite'] - stage['Mburnout'])
+    assert model.get('propellant', 'Proto LV-2') == pplt
+    stageflows, report = propel.flows(pplt,
+        dict(stage, gRange=propel.grange(design)))
+    assert model.get('flows', 'Proto LV-2')[0] == stageflows
+    assert model.get('rows', 'Proto LV-2')[-len(report):] == list(report)
+    assert model.get('propellant', 'payload') is None
+    assert model.get('rows', 'payload') == []
+
+def testModelIncremental():
+    "Edits recompute only what they change."
+    design = lh2design()
+    design['stages']['Proto LV-1']['mixture'] = 'lox-lch4'
+    model = DesignModel(design, propellantdata)
+    for name in model.stageorder[1:]:
+        model.get('rows', name)
+    model.totalDeltaV
+    graph = model.graph
+    before = graph.computations
+    model.set('payload', Mdry=400.0)
+    model.totalDeltaV
+    assert graph.computations - before == 2     # Mburnout, deltaV (= 0)
+    before = graph.computations
+    model.setmixture('lox-lh2', OFR=5.5)
+    for name in model.stageorder[1:]:
+        model.get('rows', name)
+    model.totalDeltaV
+    # mixture data of 4 stages; propellant, flows, rows of 2 LH2 stages;
+    # propellant (none) of the payload
+    assert graph.computations - before == 4 + 2 * 3 + 1
+    before = graph.computations
+    model.set('Proto LV-1', mixture='lox-lh2')
+    model.totalDeltaV
+    assert graph.computations == before
+
+def testModelEdits():
+    "After random edits, a model agrees with one built from scratch."
+    rng = random.Random(24)
+    design = lh2design()
+    model = DesignModel(design, propellantdata)
+    for n in range(200):
+        name = rng.choice(design['stageorder'][:-1])
+        stage = design['stages'][name]
+        field = rng.choice(('Mwet', 'Mdry', 'Isp'))
+        value = { 'Mwet': stage['Mdry'] * rng.uniform(2.0, 9.0),
+            'Mdry': stage['Mwet'] * rng.uniform(0.05, 0.3),
+            'Isp': rng.uniform(250.0, 450.0) }[field]
+        stage[field] = value
+        model.set(name, **{ field: value })
+        if n % 20 == 0:
+            fresh = DesignModel(design, propellantdata)
+            assert model.performance() == fresh.performance()
+            for name in design['stageorder']:
+                assert model.get('rows', name) == fresh.get('rows', name)
+
+def testModelErrors():
+    "Bad edits change nothing; unknown mixtures of burning stages fail."
+    design = lh2design()
+    model = DesignModel(design, propellantdata)
+    want = model.performance()
+    for stagename, fields in (('Proto LV-2', { 'Mdry': 900.0, 'Mwet': None }),
+            ('Proto LV-2', { 'Isp': 400.0, 'Mwet': '4000' }),
+            ('Proto LV-2', { 'Isp': True }),
+            ('Proto LV-2', { 'Mdry': 900.0, 'thrust': 1.0 }),
+            ('LV-4', { 'Mwet': 1.0 })):
+        try:
+            model.set(stagename, **fields)
+        except (KeyError, ValueError):
+            pass
+        else:
+            assert False, "set(%r, **%r) should fail" % (stagename, fields)
+        assert model.performance() == want
+    model.set('Proto LV-2', mixture='lox-kerosene')
+    try:
+        model.get('propellant', 'Proto LV-2')
+    except KeyError:
+        pass
+    else:
+        assert False, "unknown mixture of a propulsive stage should fail"
+    model.set('Proto LV-2', mixture='lox-lh2')
+    assert model.get('propellant', 'Proto LV-2') is not None
+
+# vim: set sw=4 tw=80 :
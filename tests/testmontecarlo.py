@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import numpy as np
+
+import samspy.vehicle.montecarlo as montecarlo
+import samspy.vehicle.sweep as sweep
+
+from testpropel import propellantdata
+from testsweep import design
+
+uncertain = {
+    'stages': {
+        'Proto LV-1': {
+            'Mdry': {'dist': 'normal', 'mean': 2886.0, 'sd': 30.0},
+            'Isp': {'dist': 'uniform', 'low': 285.0, 'high': 300.0},
+        },
+    },
+    'mixtures': {
+        'lox-lh2': {'OFR': {'dist': 'uniform', 'low': 7.5, 'high': 8.5}},
+    },
+    'matlprops': {
+        'LH2': {'liqdens': {'dist': 'triangular',
+            'low': 0.066, 'mode': 0.068, 'high': 0.071}},
+    },
+}
+
+def testMonteCarloNominal():
+    "Without declared distributions every sample is the nominal design."
+    results = montecarlo.montecarlo(design(), propellantdata, {},
+        samples=10, seed=1)
+    nominal = sweep.evaluate(design(), propellantdata)
+    for name in ('totalDeltaV', 'Proto LV-1.deltaV', 'Proto LV-2.volume',
+            'Proto LV-3.burntime'):
+        assert abs(results[name] - nominal[name]).max() < \
+            1.0e-9 * abs(nominal[name])
+
+def testMonteCarloSeeded():
+    "Equal seeds reproduce results, across block boundaries too."
+    first = montecarlo.montecarlo(design(), propellantdata, uncertain,
+        samples=1000, seed=7, blocksize=300)
+    second = montecarlo.montecarlo(design(), propellantdata, uncertain,
+        samples=1000, seed=7, blocksize=300)
+    assert (first['totalDeltaV'] == second['totalDeltaV']).all()
+    for blocksize in (1000, 4096, 7):
+        other = montecarlo.montecarlo(design(), propellantdata, uncertain,
+            samples=1000, seed=7, blocksize=blocksize)
+        assert list(other) == list(first)
+        for name in first:
+            assert np.array_equal(other[name], first[name])
+    summary = montecarlo.percentiles(first, (5, 50, 95))
+    mean, stddev, pcts = summary['Proto LV-1.volume']
+    assert stddev > 0.0
+    assert pcts[0] < pcts[1] < pcts[2]
+
+# vim: set sw=4 tw=80 :
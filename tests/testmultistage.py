@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import copy
+import random
+
+import samspy.vehicle.multistage as multistage
+
+protolv = {
+    'name': 'Prototype LV',
+    'stageorder': ['Proto LV-1', 'Proto LV-2', 'Proto LV-3', 'payload'],
+    'maxG': 3.0,
+    'gRange': [2.0, 3.0],
+    'stages': {
+        'Proto LV-1': {'Mwet': 17934.0, 'Mdry': 2886.0, 'Isp': 293,
+            'mixture': 'lox-rp1'},
+        'Proto LV-2': {'Mwet': 4331.0, 'Mdry': 416.0, 'Isp': 290,
+            'mixture': 'lox-rp1'},
+        'Proto LV-3': {'Mwet': 985.0, 'Mdry': 203.0, 'Isp': 293,
+            'mixture': 'lox-rp1'},
+        'payload': {'Mwet': 443.0, 'Mdry': 443.0, 'Isp': 0,
+            'mixture': 'lox-rp1'},
+    },
+}
+
+def eps12(want, got):
+    "Check relative agreement to 1.0e-12."
+    assert abs(want - got) <= 1.0e-12 * max(abs(want), 1.0), \
+        "%r != %r" % (want, got)
+
+def perturbed(count, seed=1):
+    "Return 'count' random variations of the prototype design."
+    rng = random.Random(seed)
+    designs = []
+    for n in range(count):
+        design = copy.deepcopy(protolv)
+        for name in design['stageorder'][:-1]:
+            stage = design['stages'][name]
+            stage['Mwet'] *= rng.uniform(0.8, 1.2)
+            stage['Mdry'] *= rng.uniform(0.8, 1.2)
+            stage['Isp'] *= rng.uniform(0.9, 1.1)
+        designs.append(design)
+    return designs
+
+def testPerformanceProto():
+    "Total deltaV of the prototype vehicle."
+    perf = multistage.performance(protolv)
+    assert abs(perf['totalDeltaV'] - 8414.8755) < 1.0e-4
+    assert perf['Proto LV-1']['Mignite'] == 23693.0
+
+def testPerformanceBatch():
+    "Batch evaluation agrees with the scalar path."
+    designs = perturbed(50)
+    columns = multistage.batchcolumns(designs)
+    batch = multistage.performance_batch(*columns)
+    for n, design in enumerate(designs):
+        perf = multistage.performance(design)
+        for name in design['stageorder']:
+            for key in ('Mignite', 'Mburnout', 'Isp', 'deltaV'):
+                eps12(perf[name][key], batch[name][key][n])
+        eps12(perf['totalDeltaV'], batch['totalDeltaV'][n])
+
+def testPerformanceBatchMissing():
+    "Batch columns of a stage missing Isp are an error, not zero."
+    design = copy.deepcopy(protolv)
+    del design['stages']['Proto LV-2']['Isp']
+    try:
+        multistage.batchcolumns([protolv, design])
+    except KeyError:
+        pass
+    else:
+        assert False, "missing Isp accepted"
+
+def testStagingMatchesStagedeltaV():
+    "Staging engine agrees with per-suffix stagedeltaV()."
+    for design in perturbed(20, seed=2):
+        order = design['stageorder']
+        perf = multistage.performance(design)
+        for nx, name in enumerate(order):
+            info = multistage.stagedeltaV(order[nx:], design['stages'])
+            for key in ('Mignite', 'Mburnout', 'deltaV'):
+                eps12(info[key], perf[name][key])
+
+def testStagingUpdate():
+    "In-place stage updates agree with a full re-evaluation."
+    design = copy.deepcopy(protolv)
+    staging = multistage.Staging(design['stageorder'], design['stages'])
+    for name, field, value in (
+            ('Proto LV-2', 'Mwet', 4500.0),
+            ('Proto LV-3', 'Mdry', 180.0),
+            ('Proto LV-1', 'Isp', 300.0),
+            ('payload', 'Mwet', 400.0), ):
+        design['stages'][name][field] = value
+        if name == 'payload':
+            design['stages'][name]['Mdry'] = value
+            staging.update(name, Mwet=value, Mdry=value)
+        else:
+            staging.update(name, **{field: value})
+        want = multistage.performance(design)
+        got = staging.results()
+        for stage in design['stageorder']:
+            for key in ('Mignite', 'Mburnout', 'deltaV'):
+                eps12(want[stage][key], got[stage][key])
+        eps12(want['totalDeltaV'], got['totalDeltaV'])
+
+def testOptimalDesign():
+    "Optimal staging reaches the target deltaV at minimum gross mass."
+    design = multistage.optimaldesign(protolv, 9000.0)
+    perf = multistage.performance(design)
+    assert abs(perf['totalDeltaV'] - 9000.0) < 1.0e-6
+    assert design['stages']['payload']['Mwet'] == 443.0
+    gross = perf['Proto LV-1']['Mignite']
+
+    # resizing stage 3, then stage 1 to get back to 9000 m/s, is heavier
+    for scale in (0.98, 0.99, 1.01, 1.02):
+        trial = copy.deepcopy(design)
+        name = 'Proto LV-3'
+        stage = trial['stages'][name]
+        stage['Mwet'] *= scale
+        stage['Mdry'] *= scale
+        staging = multistage.Staging(trial['stageorder'], trial['stages'])
+        lo, hi = 0.5, 2.0
+        for n in range(100):
+            mid = 0.5 * (lo + hi)
+            wet = design['stages']['Proto LV-1']['Mwet'] * mid
+            dry = design['stages']['Proto LV-1']['Mdry'] * mid
+            if staging.update('Proto LV-1', Mwet=wet, Mdry=dry) < 9000.0:
+                lo = mid
+            else:
+                hi = mid
+        assert staging.Mignite[0] > gross
+
+def testOptimalEqualStages():
+    "Identical stages share deltaV equally."
+    ratios = multistage.optimalratios(6000.0, [300, 300], [0.1, 0.1])
+    assert abs(ratios[0] - ratios[1]) < 1.0e-9
+    dv = multistage.rocketeq(300 * multistage.gEarth, ratios[0], 1.0)
+    assert abs(dv - 3000.0) < 1.0e-6
+
+# vim: set sw=4 tw=80 :
@@ -56,3 +56,63 @@ def testOrbitPlaneChange():
     dv = ito.planechange(sto, incline_rad)
     eps5(dv, 0.95257)
 
+
+def testOrbitLazyParams():
+    "Derived parameters follow changes of apsides."
+    o = orbit.Elliptical(mu=muEarth, peri=leo_r, apo=sto_apo_r)
+    assert not hasattr(o, '__dict__')
+    eps5(o.period, 116398.013)
+    o.apoapsis = leo_r
+    eps5(o.period, 5425.03357)
+    assert o.eccentricity == 0.0
+    o.set_circular(geo_r)
+    eps5(o.semimaj, geo_r)
+
+def testOrbitAssignedParams():
+    "Assigned parameters are dropped, like derived ones, on apsis change."
+    o = orbit.Elliptical(mu=muEarth, peri=leo_r, apo=sto_apo_r, ecc=0.5)
+    o.semimaj = 1.0
+    assert o.eccentricity == 0.5
+    o.apoapsis = leo_r
+    assert o.eccentricity == 0.0
+    eps5(o.semimaj, leo_r)
+    o.eccentricity = 0.25
+    o.periapsis = leo_r
+    assert o.eccentricity == 0.0
+
+def testOrbitArrayKnownParams():
+    "from_ellipticals() copies only parameters already known."
+    o = orbit.Elliptical(mu=muEarth, peri=leo_r, apo=sto_apo_r)
+    assert orbit.OrbitArray.from_ellipticals([o]).period is None
+    o.fill_params()
+    arr = orbit.OrbitArray.from_ellipticals([o])
+    eps12([o.period], arr.period)
+    eps12([o.eccentricity], arr.eccentricity)
+
+def eps12(want, got):
+    "Check relative agreement to 1.0e-12, elementwise."
+    for w, g in zip(want, got):
+        assert abs(w - g) <= 1.0e-12 * abs(w), "%r != %r" % (w, g)
+
+def testOrbitArray():
+    "Orbit arrays agree with Elliptical orbits."
+    orbits = [leo, sto, ito, geo]
+    fresh = [ orbit.Elliptical(apo=o.apoapsis, peri=o.periapsis, mu=muEarth)
+        for o in orbits ]
+    arr = orbit.OrbitArray.from_ellipticals(fresh)
+    assert arr.semimaj is None
+    arr.fill_params()
+    eps12([o.semimaj for o in orbits], arr.semimaj)
+    eps12([o.period for o in orbits], arr.period)
+    eps12([o.periapsis for o in orbits], arr.periapsis)
+    eps12([o.velo(o.periapsis) for o in orbits], arr.velo(arr.periapsis))
+    back = arr.to_ellipticals()
+    assert back[1].apoapsis == sto.apoapsis
+    eps12([sto.period], [back[1].period])
+
+def testOrbitArrayPlaneChange():
+    "Vectorized plane change."
+    itos = orbit.OrbitArray.from_ellipticals([ito, ito])
+    stos = orbit.OrbitArray.from_ellipticals([sto, sto])
+    dv = itos.planechange(stos, [incline_rad, 0.0])
+    eps12([ito.planechange(sto, incline_rad), ito.planechange(sto, 0.0)], dv)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import os
+import pickle
+import tempfile
+
+import samspy.vehicle.propel as propel
+from samspy.vehicle.propeldb import PropellantDB
+
+from testpropel import propellantdata
+
+def testPropDBDeduce():
+    "Compiled queries give the same results as propel.deduce()."
+    db = PropellantDB(propellantdata)
+    assert db.deduce('lox-lh2', 100) == \
+        propel.deduce(propellantdata, 'lox-lh2', 100)
+    assert propel.deduce(db, 'lox-lh2', 50) == \
+        propel.deduce(propellantdata, 'lox-lh2', 50)
+    assert db['matlprops']['LOX']['liqdens'] == 1.141
+
+def testPropDBUncompiled():
+    "Mixtures without an OFR are reported, not compiled."
+    db = PropellantDB(propellantdata)
+    assert 'lox-lch4' in db.uncompiled
+    try:
+        db.deduce('lox-lch4', 100)
+    except KeyError:
+        pass
+    else:
+        assert False, "expected KeyError"
+
+def testPropDBCache():
+    "Cached database follows changes of the source file."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ['SAMSPY_CACHE'] = os.path.join(tmpdir, 'cache')
+        try:
+            source = os.path.join(tmpdir, 'propellants.yaml')
+            text = ("mixtures: {lox-lh2: {components: [LOX, LH2], "
+                "OFR: %s}}\nmatlprops: {LOX: {liqdens: 1.141}, "
+                "LH2: {liqdens: 0.068}}\n")
+            with open(source, 'w') as fh:
+                fh.write(text % '6.0')
+            first = PropellantDB.load(source)
+            assert os.listdir(os.environ['SAMSPY_CACHE'])
+            again = PropellantDB.load(source)
+            assert again.fr_oxid[0] == first.fr_oxid[0] == 6.0/7.0
+            # same size, and the same mtime as within coarse granularity
+            stat = os.stat(source)
+            with open(source, 'w') as fh:
+                fh.write(text % '8.0')
+            os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            changed = PropellantDB.load(source)
+            assert changed.fr_oxid[0] == 8.0/9.0
+            assert changed['mixtures']['lox-lh2']['OFR'] == 8.0
+        finally:
+            del os.environ['SAMSPY_CACHE']
+
+def testPropDBPickle():
+    "Pickles hold the compiled columns, not the raw data."
+    propeldb = PropellantDB(propellantdata)
+    copied = pickle.loads(pickle.dumps(propeldb))
+    assert b'matlprops' not in pickle.dumps(propeldb)
+    assert copied.deduce('lox-lh2', 100.0) == propeldb.deduce('lox-lh2', 100.0)
+    try:
+        copied['mixtures']
+    except ValueError:
+        pass
+    else:
+        assert False, "expected ValueError"
+    source = os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), 'samspy', 'share', 'propellants.yaml')
+    loaded = pickle.loads(pickle.dumps(PropellantDB.load(source,
+        usecache=False)))
+    assert 'lox-rp1' in loaded['mixtures']
+
+# vim: set sw=4 tw=80 :
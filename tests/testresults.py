@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import numpy as np
+
+import samspy.vehicle.multistage as multistage
+import samspy.vehicle.propel as propel
+from samspy.vehicle.results import StageResults, STAGE_DTYPE
+
+from testmultistage import protolv, perturbed, eps12
+from testpropel import propellantdata
+
+def testRecordsView():
+    "Single-design records read like performance()."
+    staging = multistage.Staging(protolv['stageorder'], protolv['stages'])
+    want = multistage.performance(protolv)
+    got = staging.records()
+    assert got.records.dtype == STAGE_DTYPE
+    assert list(got) == list(want)
+    for name in protolv['stageorder']:
+        assert dict(got[name]) == want[name]
+    eps12(want['totalDeltaV'], got['totalDeltaV'])
+
+def testBatchRecords():
+    "Batch results are views into one array; flows match propel.flows()."
+    designs = perturbed(20, seed=3)
+    batch = multistage.performance_batch(*multistage.batchcolumns(designs))
+    assert batch.records.shape == (20, 4)
+    assert np.shares_memory(batch['Proto LV-2']['deltaV'], batch.records)
+    assert np.isnan(batch.records['thrust']).all()
+
+    gRange = propel.grange(protolv)
+    batch.addflows(gRange)
+    assert np.isnan(batch['payload']['thrust']).all()
+    for n in (0, 7, 19):
+        perf = multistage.performance(designs[n])
+        for name in protolv['stageorder'][:3]:
+            stageperf = dict(perf[name], gRange=gRange)
+            Mpropel = stageperf['Mignite'] - stageperf['Mburnout']
+            pplt = propel.deduce(propellantdata, 'lox-lh2', Mpropel)
+            flows, report = propel.flows(pplt, stageperf)
+            eps12(flows['thrust'], batch[name]['thrust'][n])
+            eps12(flows['burntime_min'], batch[name]['burntime'][n])
+
+    single = multistage.Staging(designs[5]['stageorder'],
+        designs[5]['stages']).records()
+    stacked = StageResults.concatenate([ batch.rows(slice(0, 5)), single ])
+    assert stacked.records.shape == (6, 4)
+    assert not stacked.hasflows
+    eps12(stacked['totalDeltaV'][5], batch['totalDeltaV'][5])
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import copy
+
+import samspy.vehicle.multistage as multistage
+import samspy.vehicle.propel as propel
+from samspy.vehicle.sensitivity import sensitivities, partials
+
+from testmultistage import protolv
+
+def evaluate(design):
+    "Results of performance() and flows(), labelled as sensitivities()."
+    perf = multistage.performance(design)
+    gRange = propel.grange(design)
+    pplt = { 'fractions': (0.7, 0.3), 'liqdens': [1.141, 0.91] }
+    results = { 'totalDeltaV': perf['totalDeltaV'] }
+    for name in design['stageorder']:
+        results[name + '.deltaV'] = perf[name]['deltaV']
+        if perf[name]['Isp'] > 0:
+            stageflows, report = propel.flows(pplt,
+                dict(perf[name], gRange=gRange))
+            results[name + '.thrust'] = stageflows['thrust']
+            results[name + '.burntime'] = stageflows['burntime_min']
+    return results
+
+def perturb(design, label, step):
+    "Copy of design with the input 'label' changed by 'step'."
+    design = copy.deepcopy(design)
+    if label == 'minG':
+        design['gRange'][0] += step
+    elif label == 'maxG':
+        design['maxG'] += step
+    else:
+        name, field = label.rsplit('.', 1)
+        design['stages'][name][field] += step
+    return design
+
+def checkdesign(design):
+    "Sensitivities agree with central differences of evaluate()."
+    sens = sensitivities(design)
+    want = evaluate(design)
+    assert set(sens['values']) == set(want)
+    for result, value in want.items():
+        assert abs(sens['values'][result] - value) <= 1.0e-9 * abs(value)
+    for label in sens['inputs']:
+        step = 1.0e-3 if label.endswith('G') else 1.0e-2
+        upper = evaluate(perturb(design, label, step))
+        lower = evaluate(perturb(design, label, -step))
+        for result in want:
+            numeric = (upper[result] - lower[result]) / (2.0 * step)
+            exact = partials(sens, result)[label]
+            assert abs(exact - numeric) < 1.0e-5 * (1.0 + abs(exact)), \
+                (result, label, exact, numeric)
+
+def testSensitivityFiniteDifference():
+    "Exact gradients match finite differences, for either thrust limit."
+    design = copy.deepcopy(protolv)
+    design['gRange'] = [2.0, 3.0]
+    checkdesign(design)             # maxG sets thrust, at burnout
+    design['gRange'] = [1.5, 3.0]
+    design['maxG'] = 1.6
+    checkdesign(design)             # minG sets thrust, at ignition
+
+def testSensitivityStructure():
+    "Upper stage masses reach the stages below, not those above."
+    sens = sensitivities(protolv)
+    d = partials(sens, 'Proto LV-2.deltaV')
+    assert d['Proto LV-1.Mwet'] == d['Proto LV-1.Mdry'] == 0.0
+    assert d['Proto LV-3.Mwet'] < 0.0 < d['Proto LV-2.Mwet']
+    assert d['Proto LV-2.Mdry'] < 0.0 < d['Proto LV-2.Isp']
+    total = partials(sens, 'totalDeltaV')
+    assert total['payload.Mwet'] < 0.0 and total['payload.Isp'] == 0.0
+
+# vim: set sw=4 tw=80 :
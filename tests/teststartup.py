@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+# the samspy tree under test, for child interpreters
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARE = os.path.join(ROOT, 'samspy', 'share')
+
+def loaded(code, modules):
+    "Which of 'modules' are loaded after running 'code' in a new Python."
+    env = dict(os.environ, PYTHONPATH=ROOT, SAMSPY_CACHE='')
+    check = "import sys; print(' '.join(m for m in %r if m in sys.modules))"
+    proc = subprocess.run([sys.executable, '-c', code + '\n' +
+        check % (modules,)], env=env, stdout=subprocess.PIPE, check=True)
+    return proc.stdout.decode().split()
+
+def testStartupCommands():
+    "Commands import without loading NumPy, YAML or the profiler."
+    assert loaded("import samspy.cmds.lvbasic, samspy.cmds.lvserve",
+        ('numpy', 'yaml', 'cProfile', 'pstats')) == []
+    assert loaded("import samspy.cmds.sto",
+        ('numpy', 'yaml', 'cProfile', 'pstats')) == []
+    assert loaded("import samspy.cmds.lvsweep, samspy.cmds.lvmc",
+        ('numpy', 'yaml', 'multiprocessing')) == []
+
+def testStartupScalarAnalysis():
+    "Scalar staging and propellant flows run without NumPy."
+    code = '''
+import yaml
+from samspy.vehicle import multistage, propel
+from samspy.vehicle.propeldb import PropellantDB
+with open(%r) as fh:
+    design = yaml.safe_load(fh)
+propeldb = PropellantDB.load(%r)
+stage = multistage.performance(design)['Proto LV-1']
+pplt = propel.deduce(propeldb, 'lox-rp1', stage['Mignite'] - stage['Mburnout'])
+propel.flows(pplt, dict(stage, gRange=propel.grange(design)))
+''' % (os.path.join(SHARE, 'protolv.yaml'),
+        os.path.join(SHARE, 'propellants.yaml'))
+    assert loaded(code, ('numpy',)) == []
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import samspy.vehicle.sweep as sweep
+
+from testmultistage import protolv
+from testpropel import propellantdata
+
+sweepspec = {
+    'stages': {
+        'Proto LV-1': {
+            'Mwet': {'start': 16000.0, 'stop': 20000.0, 'num': 5},
+            'Isp': [290, 300],
+        },
+    },
+    'design': {
+        'maxG': {'start': 2.5, 'stop': 3.5, 'step': 0.5},
+    },
+}
+
+def design():
+    "Prototype vehicle burning LOX/hydrogen."
+    base = dict(protolv)
+    base['stages'] = dict((s, dict(info, mixture='lox-lh2'))
+        for s, info in protolv['stages'].items())
+    return base
+
+def testSweepValues():
+    "Range expansion."
+    assert sweep.values([1, 2]) == [1, 2]
+    assert sweep.values({'start': 0.0, 'stop': 1.0, 'num': 3}) == \
+        [0.0, 0.5, 1.0]
+    assert sweep.values({'start': 1.0, 'stop': 2.0, 'step': 0.25})[-1] == 2.0
+    assert sweep.npoints(sweep.axes(sweepspec)) == 30
+
+def testSweepOrder():
+    "Pooled sweep streams the same rows, in order, as a serial one."
+    serial = list(sweep.sweep(design(), propellantdata, sweepspec,
+        processes=1))
+    pooled = list(sweep.sweep(design(), propellantdata, sweepspec,
+        processes=2, chunksize=4))
+    assert len(serial) == 30
+    assert serial == pooled
+    assert serial[0]['Proto LV-1.Mwet'] == 16000.0
+    assert serial[-1]['maxG'] == 3.5
+
+# vim: set sw=4 tw=80 :
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import io
+import json
+import time
+
+from samspy import timing
+
+def testTimingDisabled():
+    "Disabled sections record nothing."
+    timings = timing.Timings()
+    with timings.section('load'):
+        pass
+    assert timings.section('load') is timing.NULLSECTION
+    assert timings.rows() == []
+
+def testTimingNested():
+    "Nested sections split self time from cumulative time."
+    timings = timing.Timings()
+    timings.enable()
+    with timings.section('outer'):
+        time.sleep(0.01)
+        for n in range(2):
+            with timings.section('inner'):
+                time.sleep(0.01)
+    rows = dict((name, (calls, cumulative, selftime))
+        for name, calls, cumulative, selftime in timings.rows())
+    assert list(rows) == ['outer', 'inner']
+    assert rows['outer'][0] == 1 and rows['inner'][0] == 2
+    assert rows['inner'][1] >= 0.02
+    assert rows['outer'][1] >= rows['inner'][1] + 0.01
+    assert abs(rows['outer'][1] - rows['outer'][2] - rows['inner'][1]) < 1e-6
+
+def testTimingTimed():
+    "Decorated functions are timed under their section name."
+    timings = timing.Timings()
+    @timings.timed('work')
+    def work(x):
+        return 2 * x
+    assert work(3) == 6
+    assert timings.rows() == []
+    timings.enable()
+    assert work(4) == 8
+    # recursion counts calls, but cumulative time only once
+    @timings.timed('fact')
+    def fact(n):
+        return 1 if n <= 1 else n * fact(n - 1)
+    assert fact(5) == 120
+    rows = dict((row[0], row[1:]) for row in timings.rows())
+    assert rows['work'][0] == 1 and rows['fact'][0] == 5
+    assert rows['fact'][1] <= sum(row[2] for row in timings.rows()) + 1e-6
+
+def testTimingReport():
+    "Table and JSON reports list every section."
+    timings = timing.Timings()
+    timings.enable()
+    with timings.section('write'):
+        pass
+    stream = io.StringIO()
+    timings.report('json', stream)
+    assert json.loads(stream.getvalue())['write']['calls'] == 1
+    stream = io.StringIO()
+    timings.report(stream=stream)
+    lines = stream.getvalue().splitlines()
+    assert lines[0].split()[0] == 'section'
+    assert lines[1].split()[:2] == ['write', '1']
+    timings.reset()
+    assert timings.rows() == []
+
+# vim: set sw=4 tw=80 :
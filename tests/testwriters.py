@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+import io
+
+import samspy.vehicle.multistage as multistage
+import samspy.vehicle.propel as propel
+from samspy.writers.Text import Text
+from samspy.writers.BufferedText import BufferedText
+from samspy.writers.ReportsLV1 import BasicLV
+
+from testmultistage import protolv
+from testpropel import propellantdata
+
+def report(writer):
+    "Write a sample report through 'writer'."
+    lv = BasicLV(writer)
+    perf = multistage.performance(protolv)
+    gRange = propel.grange(protolv)
+    for name in protolv['stageorder'][:3]:
+        stageperf = dict(perf[name], gRange=gRange)
+        lv.putStageMassesDeltaV(name, stageperf)
+        Mpropel = stageperf['Mignite'] - stageperf['Mburnout']
+        pplt = propel.deduce(propellantdata, 'lox-lh2', Mpropel)
+        stageflows, flowfmt = propel.flows(pplt, stageperf)
+        lv.putPropellants(name, stageperf, pplt,
+            { 'propel.deduce': propel.reptfmt_deduce,
+              'propel.flows': flowfmt })
+    writer.putfmtrow('empty', '%7.3f', [])
+    writer.putfmtrow('100%', '%5d%%', range(3), labelfmt="%-32s")
+    writer.putfmtrow('generator', '%7.3f', (x/3 for x in range(4)))
+
+def testBufferedText():
+    "Buffered output is identical to Text, across buffer flushes."
+    want = io.StringIO()
+    report(Text(want))
+    for bufsize in (1, 100, 1<<16):
+        got = io.StringIO()
+        with BufferedText(got, bufsize=bufsize) as writer:
+            report(writer)
+            if bufsize > len(want.getvalue()):
+                assert got.getvalue() == ''
+        assert got.getvalue() == want.getvalue()
+
+# vim: set sw=4 tw=80 :